@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Diabetes prediction and dialysis facility finder, as one multipage app.
+
+    streamlit run app.py
+
+Pages live in app_pages/ and call the process-wide services in services.py,
+so one server process holds one model, one facility table and one outbox
+whichever pages its sessions open. Hospital.py, Model.py,
+Diabetes_Prediction.py, DialysisHospital.py and Hospitals.py run subsets of
+these pages for deployments that still point at them.
+"""
+
+import streamlit as st
+
+from metrics import timed
+
+# name -> (script, title, icon)
+PAGES = {
+    'prediction': ("app_pages/prediction.py", "Diabetes Prediction", "🩺"),
+    'facilities': ("app_pages/facility_finder.py", "Facility Finder", "🏥"),
+    'debugging': ("app_pages/debugging.py", "Debugging", "🐞"),
+    'help': ("app_pages/help.py", "Help & Feedback", "💬"),
+}
+
+
+def run(pages=tuple(PAGES), title="Diabetes Prediction & Hospital Recommendation"):
+    st.set_page_config(page_title=title, page_icon="🏥", layout="wide")
+    navigation = st.navigation([st.Page(PAGES[name][0], title=PAGES[name][1], icon=PAGES[name][2])
+                                for name in pages])
+    with timed('rerun'):
+        navigation.run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Debug predictions of the active model; stage latencies and models with ?admin=1."""
+
+import logging
+
+import streamlit as st
+
+import services
+from metrics import render_admin_panel
+
+st.header("Debugging Predictions")
+st.write("Use this section to debug model predictions.")
+
+# Inputs in a form: editing them doesn't rerun the page until Debug Predict
+with st.form('debugging'):
+    Pregnancies = st.text_input('Number of Pregnancies (Enter 0 if Male)', "2")
+    Glucose = st.text_input('Glucose Level', "120")
+    BloodPressure = st.text_input('BloodPressure Value', "70")
+    SkinThickness = st.text_input('Skin Thickness Value', "30")
+    Insulin = st.text_input('Insulin Level', "80")
+    BMI = st.text_input('BMI Value', "25.0")
+    DiabetesPedigreeFunction = st.text_input('Diabetes Pedigree Function Value', "0.5")
+    Age = st.slider('Choose your Age', 1, 100, 35)
+    submitted = st.form_submit_button("Debug Predict")
+
+if submitted:
+    try:
+        features = [float(Pregnancies), float(Glucose), float(BloodPressure), float(SkinThickness),
+                    float(Insulin), float(BMI), float(DiabetesPedigreeFunction), Age]
+        st.write("Input Features:", features)
+        st.write("Model Output:", services.predict(features))
+        explanation = services.explain(features)
+        if explanation is not None:
+            from explanations import render_explanation
+            st.write("Contributions:", [{'Feature': name, 'Value': value, 'Contribution': contribution}
+                                        for name, value, contribution in explanation['features']])
+            render_explanation(st, explanation)
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+        logging.error(f"Debugging error: {e}")
+
+# Stage latencies and served models, only shown with ?admin=1 in the URL
+if st.query_params.get('admin') == '1':
+    from model_registry import render_registry_panel
+    from prediction_cache import render_cache_panel
+    from shadow import render_shadow_panel
+    with st.expander("📈 Stage latencies"):
+        render_admin_panel(st)
+    with st.expander("🧠 Models"):
+        render_registry_panel(st)
+        render_cache_panel(st)
+        render_shadow_panel(st, services.shadow())
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Dialysis facility finder: filter by county, NHIF office, name or location.
+
+The filters and result tables are one fragment, so a filter change reruns
+only them, not the page's image and text.
+"""
+
+import streamlit as st
+
+import services
+from facility_geo import county_choices
+
+index = services.facility_index()
+geo = services.geo_index()
+
+st.title("Welcome to the Hospital Recommendation System 🏥")
+st.image("Dialysis_Center.jpg", caption="Keeping The Kidneys Healthy!", use_container_width=True)
+st.markdown("""
+    # Welcome to the Hospital Finder App! 🏥
+
+    This app is designed to help you easily find dialysis hospitals across Kenya, tailored to your specific needs and preferences. Whether you're looking for a hospital based on its **county**, **NHIF office**, or **hospital name**, we've got you covered.
+
+    ## How It Works:
+    - **Filter by County**: Select your preferred county, and we'll show you all dialysis hospitals in that area.
+    - **Filter by NHIF Office**: If you have a specific NHIF office in mind, you can filter hospitals by their affiliated NHIF office for easier access.
+    - **Search by Hospital Name**: If you already know the name of the hospital, you can quickly find it using the search functionality.
+
+    ## Features:
+    - **Personalized Recommendations**: Based on your preferences, we will suggest the best dialysis hospitals that meet your criteria.
+    - **Easy Navigation**: With an intuitive user interface, you can quickly find the information you need without any hassle.
+    - **Comprehensive Data**: The database includes detailed information on hospitals, including their names, locations, and NHIF affiliations.
+
+    ## Why Use This App?
+    Finding a dialysis facility that fits your specific needs has never been easier! This app simplifies your search, ensuring that you can access the best hospitals in your area or any part of Kenya.
+
+    **Your health is important, and we’re here to help you make informed decisions for your well-being.**
+
+    Let's get started—just choose your preferences and let us help you find the perfect dialysis hospital for you!
+""")
+
+
+FILTER_KEYS = ['finder_county', 'finder_office', 'finder_office_query', 'finder_name', 'finder_location']
+
+
+def reset_filters():
+    for key in FILTER_KEYS:
+        st.session_state.pop(key, None)
+
+
+# Custom Sidebar
+st.sidebar.header("🔍 Filter Options")
+
+# Sidebar introduction
+st.sidebar.markdown("""
+    Use the filters below to customize your search for dialysis hospitals in Kenya.
+    Narrow down your options based on county, NHIF office, or hospital name.
+""")
+
+# The filters and the tables they drive rerun on their own: changing a filter
+# doesn't redraw the rest of the page
+@st.fragment
+def filters_and_results():
+    # County Selection
+    county = st.sidebar.selectbox(
+        "🏙️ Select County:",
+        county_choices(index),
+        help="Choose the county where you want to find a dialysis hospital.",
+        key='finder_county',
+    )
+    nhif_office = st.sidebar.selectbox(
+        "🏢 Select NHIF Office:",
+        options=["All"] + index.offices_in(county),
+        help="Filter hospitals by NHIF office affiliation.",
+        key='finder_office',
+    )
+
+    # Search for NHIF office and hospital name (typo-tolerant, see facility_search.py)
+    search_office = st.sidebar.text_input("🏢 Search by NHIF Office (optional):", key='finder_office_query')
+    search_name = st.sidebar.text_input("🏥Search by Hospital Name (optional):", key='finder_name')
+
+    # Optional location for distance-ranked results across county borders
+    location = st.sidebar.text_input(
+        "📍 Your location (optional):",
+        placeholder="latitude, longitude e.g. -1.29, 36.82",
+        help="Lists the dialysis hospitals nearest to these coordinates, whatever their county.",
+        key='finder_location',
+    )
+
+    # Filter data by selected county, NHIF office and the search boxes
+    filtered_data = index.rows(index.search(county=county, office=nhif_office, office_query=search_office,
+                                            name_query=search_name))
+
+    # Display Results with Enhanced UI
+    st.subheader(f"Dialysis Hospitals in {county}")
+
+    # Nearest hospitals to the given location, or to the county when it has none
+    nearest_data = None
+    if location:
+        try:
+            latitude, longitude = (float(value) for value in location.split(','))
+        except ValueError:
+            st.sidebar.error("Enter the location as two numbers: latitude, longitude.")
+        else:
+            nearest_data = geo.nearest_rows(latitude, longitude, k=10)
+    elif filtered_data.empty and geo.locate(county) is not None:
+        nearest_data = geo.nearest_rows(*geo.locate(county), k=10)
+
+    # If no hospitals are found, show a message
+    if filtered_data.empty:
+        st.warning("No hospitals found with the selected filters. Try refining your search.")
+
+    # Add a reset button: runs before the next rerun, so every filter is back to its default
+    st.sidebar.button("🔄 Reset Filters", on_click=reset_filters)
+
+    # Display the hospitals in a table
+    st.markdown("### 🏥 Recommended Dialysis Hospitals")
+    st.markdown("""
+        Below is a list of dialysis hospitals based on your selected filters.
+        Click on column headers to sort data or use the search options for a more refined view.
+    """)
+    # Display the interactive table
+    st.dataframe(filtered_data[['HOSPITAL_NAME', 'NHIF_OFFICE', 'NHIF_HOSPITAL_CODE']],
+                 use_container_width=True,
+                 )
+
+    if nearest_data is not None:
+        st.markdown("### 📍 Nearest Dialysis Hospitals")
+        st.dataframe(nearest_data[['HOSPITAL_NAME', 'COUNTY', 'NHIF_OFFICE', 'NHIF_HOSPITAL_CODE', 'DISTANCE_KM']],
+                     use_container_width=True)
+
+
+filters_and_results()
+
+# Sidebar footer with an icon or note
+st.sidebar.markdown("""
+    ---
+    🤝 **Tip**: Use multiple filters together for a more refined search!
+""")
+
+# Add a footer or contact section
+st.markdown("""
+    ---
+    ### Need Help? 💬
+    - **Contact Us**: For further assistance, email us at [support@hospitalfinder.com](mailto:support@hospitalfinder.com).
+    - **Frequently Asked Questions (FAQs)**: Visit our [FAQ page](https://hospitalfinder.com/faqs) for common queries.
+    - **Feedback**: We value your input! Let us know how we can improve by filling out [this form](https://hospitalfinder.com/feedback).
+
+    ---
+    #### ❤️ Thank You for Using Our App!
+    We are committed to making healthcare accessible and seamless.
+    Stay healthy and take care! 😊
+""")
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Help with sample inputs, the feedback form and contact details."""
+
+import streamlit as st
+
+import services
+
+FOOTER = """<div style="position: fixed; bottom: 7.6px; left: 10px; right: 10px; text-align: left; color: grey; font-size: 14px;">Made by <span style="font-weight: bold; color: grey;">Akshay</span>🎈</div>"""
+
+# Sample rows from diabetes.csv, to try the prediction page with
+SAMPLE_DATA = {
+    "Pregnancies": [6, 1, 8, 1, 0, 5, 3, 10, 2],
+    "Glucose": [148, 85, 183, 89, 137, 116, 78, 115, 197],
+    "BloodPressure": [72, 66, 64, 66, 40, 74, 50, 0, 70],
+    "SkinThickness": [35, 29, 0, 23, 35, 0, 32, 0, 45],
+    "Insulin": [0, 0, 0, 94, 168, 0, 88, 0, 543],
+    "BMI": [33.6, 26.6, 23.3, 28.1, 43.1, 25.6, 31, 35.3, 30.5],
+    "PedigreeFunction": [0.627, 0.351, 0.672, 0.167, 2.288, 0.201, 0.248, 0.134, 0.158],
+    "Age": [50, 31, 32, 21, 33, 30, 26, 29, 53]
+}
+
+tab1, tab2, tab3 = st.tabs(["❓Help", "💬 Feedback", "📩 Contact"])
+
+with tab1:
+    st.header("Welcome to the Help Page!", divider='rainbow')
+    st.write("This application is designed to predict whether a person is diabetic or not based on input data such as the number of pregnancies, glucose level, blood pressure, and other relevant factors.")
+    st.write("It works in real-time with 90% accuracy, since it is built using a trained and tested machine learning model.")
+    st.write("If you possess true values for pregnancies, BMI, insulin, etc., enter them for precise predictions.")
+    st.write("To experience how the application functions, you can use the sample values provided below.")
+
+    st.caption("Sample Data:")
+    st.dataframe(SAMPLE_DATA)
+
+    st.subheader("Note:")
+    st.info(
+        "This webpage requests your name and email to send you details about your test results.\n\n"
+        "Rest assured, your information is safe and will be kept confidential."
+    )
+
+with tab2:
+    st.subheader("Your Feedback is Valuable!", divider='rainbow')
+    # A form, so typing the message doesn't rerun the page
+    with st.form('feedback'):
+        user_message = st.text_area("Have questions or suggestions? I'd love to hear from you.", height=80, placeholder="Type here...")
+        sent = st.form_submit_button("Send")
+    if sent:
+        if services.submit_feedback(user_message, st.session_state):
+            st.success("Message sent successfully!")
+        else:
+            st.error("Failed to send message, Please try again.")
+
+with tab3:
+    st.write(f"Connect: [LinkedIn Profile]({services.LINKEDIN_PROFILE})")
+    st.write(f"Email: [{services.SENDER_EMAIL}](mailto:{services.SENDER_EMAIL})")
+    st.image('https://pngimg.com/d/thank_you_PNG88.png', width=220)
+    st.markdown(FOOTER, unsafe_allow_html=True)
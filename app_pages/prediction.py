@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Diabetes prediction with hospital recommendations for positive results.
+
+The inputs sit in a form, so typing into them doesn't rerun the page; only
+Predict does. The result is kept in session state and the recommendation
+panel is a fragment: picking a county reruns just that panel. Predictions,
+and the county picked for each, go to the audit log.
+"""
+
+import time
+
+import streamlit as st
+
+import services
+from metrics import timed
+
+
+# Delivery status of the last queued thank-you email, if any
+def show_email_status():
+    message_id = st.session_state.get('email_message_id')
+    if message_id is None:
+        return
+    status = services.email_status(message_id)
+    if status is not None:
+        st.caption(f"Email status: {status['status']}")
+
+
+# Audit the county a user picks (not the default the panel opens with)
+def record_county(audit_id):
+    services.audit_county(audit_id, st.session_state['recommendation_county'])
+
+
+# Dialysis facilities in the chosen county, plus the nearest ones across county borders
+@st.fragment
+def show_recommendations(audit_id):
+    from facility_geo import county_choices, recommend
+
+    st.header("Hospital Recommendation")
+    st.markdown("""
+    Based on your diabetes prediction, here are hospital recommendations. Select your county to filter results.
+    """)
+    index = services.facility_index()
+    selected_county = st.selectbox("Select County:", county_choices(index), key='recommendation_county',
+                                   on_change=record_county, args=(audit_id,))
+    with timed('recommend'):
+        filtered_hospitals, nearby_hospitals = recommend(selected_county, index=index, geo=services.geo_index())
+    if filtered_hospitals.empty:
+        st.warning("No dialysis hospitals found in the selected county. The nearest ones are listed below.")
+    else:
+        with timed('render_results'):
+            st.dataframe(filtered_hospitals[['HOSPITAL_NAME', 'NHIF_OFFICE', 'NHIF_HOSPITAL_CODE']], use_container_width=True)
+    if not nearby_hospitals.empty:
+        st.markdown("**Nearest dialysis hospitals outside the county**")
+        st.dataframe(nearby_hospitals[['HOSPITAL_NAME', 'COUNTY', 'NHIF_OFFICE', 'DISTANCE_KM']], use_container_width=True)
+
+
+st.title('Diabetes Prediction Web App')
+st.write('This web application is designed to predict whether a person is diabetic or not.')
+
+with st.form('prediction'):
+    # Input fields
+    name = st.text_input('Enter Your Name')
+    email = st.text_input('Enter Your Email')
+
+    st.caption("**Having confusion in giving inputs? Open **Help & Feedback** in the sidebar for sample values.")
+
+    sex = st.selectbox('Gender', ('Male', 'Female'))
+    Pregnancies = st.text_input('Number of Pregnancies (Enter 0 if Male)')
+    Glucose = st.text_input('Glucose Level')
+    BloodPressure = st.text_input('BloodPressure Value')
+    SkinThickness = st.text_input('Skin Thickness Value')
+    Insulin = st.text_input('Insulin Level')
+    BMI = st.text_input('BMI Value')
+    DiabetesPedigreeFunction = st.text_input('Diabetes Pedigree Function Value')
+    Age = st.slider('Choose your Age', 1, 100)
+
+    # Prediction Button
+    submitted = st.form_submit_button('Predict')
+
+if submitted:
+    # Input fields validation
+    if not name or not email:
+        st.warning('Please enter both Name and Email to proceed!', icon="⚠️")
+        st.stop()
+
+    if not email.endswith('@gmail.com'):
+        st.error("Invalid email address!", icon="❌")
+        st.stop()
+
+    # Check if the entered values are numeric
+    if not all(value.replace('.', '', 1).isdigit() for value in [Pregnancies, Glucose, BloodPressure, SkinThickness, Insulin, BMI, DiabetesPedigreeFunction]):
+        st.error("❗Please enter valid numerical values for the input fields.")
+        st.stop()
+
+    features = [float(Pregnancies), float(Glucose), float(BloodPressure), float(SkinThickness),
+                float(Insulin), float(BMI), float(DiabetesPedigreeFunction), Age]
+    diagnosis, version = services.diagnose(features)
+    explanation = services.explain(features)
+    audit_id = services.audit_prediction(features, diagnosis, version)
+
+    # Send a thank-you email with the test result and contact details
+    st.session_state['email_message_id'] = services.send_result_email(name, email, diagnosis, explanation)
+
+    # Display the test result
+    with timed('spinner_sleep'), st.spinner('Please wait, loading...'):
+        time.sleep(2)
+    st.session_state['prediction_result'] = (diagnosis, explanation, audit_id)
+
+# Display prediction
+if 'prediction_result' in st.session_state:
+    from explanations import render_explanation
+    diagnosis, explanation, audit_id = st.session_state['prediction_result']
+    st.subheader("Prediction Result")
+    if diagnosis == "Diabetic":
+        st.error("Prediction: You are likely Diabetic.")
+        render_explanation(st, explanation)
+        show_recommendations(audit_id)
+    else:
+        st.success("Prediction: Great! You are not Diabetic.")
+        render_explanation(st, explanation)
+
+    st.info('Do check your email for more details, Thank You.', icon="ℹ️")
+
+show_email_status()
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only audit log of predictions, for clinical review.
+
+Every prediction the app serves is recorded as an event with its time, the
+model version, the eight features and the outcome. When the user then picks
+a county for the hospital recommendations, that is recorded as a second event
+with the same prediction id. Recording is one append to an in-memory deque
+on the request thread. A background thread writes the buffered events in
+batches to the current segment,
+
+    .audit/predictions-<start>-<run>.jsonl
+
+(one JSON object per line, flushed and fsynced per batch). A segment is
+rotated once it reaches MAX_BYTES (64 MB) or MAX_AGE (an hour). Rotated
+segments are rewritten as Parquet, named with the time span they cover, when
+pyarrow is available:
+
+    .audit/predictions-<start>-<end>-<run>.parquet
+
+`query` reads both kinds. It skips segments outside the requested time span
+by their names, reads only the requested columns and pushes the time,
+outcome and version filters into the Parquet scan. It returns one row per
+prediction with the county chosen last.
+
+    python audit_log.py query [--since 2025-01-01] [--until ...] [--outcome Diabetic]
+                              [--version V] [--county NAIROBI] [--events] [--csv out.csv]
+    python audit_log.py compact     # rewrite stale JSONL segments as Parquet
+"""
+
+import argparse
+import atexit
+import glob
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from features import FEATURES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIT_DIR = os.path.join(BASE_DIR, '.audit')
+PREFIX = 'predictions'
+MAX_BYTES = 64 * 1024 * 1024
+MAX_AGE = 3600.0  # seconds
+FLUSH_INTERVAL = 1.0  # seconds
+MAXSIZE = 100_000  # events waiting to be written
+
+PREDICTION = 'prediction'
+COUNTY = 'county'
+
+COLUMNS = ['ts', 'event', 'prediction_id', 'model_version'] + FEATURES + ['outcome', 'county']
+
+_STAMP = '%Y%m%dT%H%M%S%f'
+_SEGMENT = re.compile(rf'^{PREFIX}-(\d{{8}}T\d{{12}})(?:-(\d{{8}}T\d{{12}}))?-(\w+)\.(jsonl|parquet)$')
+
+logger = logging.getLogger(__name__)
+
+
+def _stamp(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(_STAMP)
+
+
+def _parse_stamp(stamp):
+    return datetime.strptime(stamp, _STAMP).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _schema():
+    import pyarrow as pa
+    types = {'ts': pa.float64(), 'event': pa.string(), 'prediction_id': pa.string(),
+             'model_version': pa.string(), 'outcome': pa.string(), 'county': pa.string()}
+    return pa.schema([(name, types.get(name, pa.float64())) for name in COLUMNS])
+
+
+# Rewrite a closed JSONL segment as Parquet covering [first, last] event time.
+# Returns the new path, or None when pyarrow isn't installed or the segment is empty.
+def compact(path):
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.json as pj
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    match = _SEGMENT.match(os.path.basename(path))
+    if os.path.getsize(path) == 0:
+        os.remove(path)
+        return None
+    table = pj.read_json(path, parse_options=pj.ParseOptions(explicit_schema=_schema()))
+    first, last = pc.min(table.column('ts')).as_py(), pc.max(table.column('ts')).as_py()
+    target = os.path.join(os.path.dirname(path),
+                          f"{PREFIX}-{_stamp(first)}-{_stamp(last)}-{match.group(3)}.parquet")
+    pq.write_table(table, target + '.tmp', compression='zstd')
+    os.replace(target + '.tmp', target)
+    os.remove(path)
+    return target
+
+
+class AuditLog:
+
+    def __init__(self, directory=AUDIT_DIR, max_bytes=MAX_BYTES, max_age=MAX_AGE, flush_interval=FLUSH_INTERVAL,
+                 maxsize=MAXSIZE, columnar=True, clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+        self.columnar = columnar
+        self.clock = clock
+        self.run = uuid.uuid4().hex[:12]  # this process's prediction ids are <run>-<n>
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.segments = 0
+        self._ids = itertools.count(1)
+        self._pending = deque()
+        self._segment = None  # (path, handle, opened at)
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _append(self, event):
+        if len(self._pending) >= self.maxsize:
+            self.dropped += 1
+            return
+        self._pending.append(event)
+        self.recorded += 1
+
+    # Called on the request thread. Returns the prediction id to pass to record_county.
+    def record_prediction(self, features, outcome, model_version=None):
+        number = next(self._ids)
+        self._append((self.clock(), PREDICTION, number, model_version, tuple(features), outcome, None))
+        return f"{self.run}-{number}"
+
+    def record_county(self, prediction_id, county):
+        self._append((self.clock(), COUNTY, prediction_id, None, None, None, county))
+
+    def _line(self, event):
+        ts, kind, prediction_id, version, features, outcome, county = event
+        record = {'ts': ts, 'event': kind,
+                  'prediction_id': f"{self.run}-{prediction_id}" if kind == PREDICTION else prediction_id,
+                  'model_version': version}
+        if features is not None:
+            record.update(zip(FEATURES, (float(value) for value in features)))
+        record['outcome'] = outcome
+        record['county'] = county
+        return json.dumps(record) + '\n'
+
+    def _open(self, now):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{PREFIX}-{_stamp(now)}-{self.run}.jsonl")
+        self._segment = (path, open(path, 'a', encoding='utf-8'), now)
+        self.segments += 1
+
+    # Close the current segment and rewrite it as Parquet
+    def rotate(self):
+        with self._flush_lock:
+            self._rotate()
+
+    def _rotate(self):
+        if self._segment is None:
+            return
+        path, handle, _ = self._segment
+        handle.close()
+        self._segment = None
+        if self.columnar:
+            try:
+                compact(path)
+            except Exception:
+                logger.exception("Could not compact audit segment %s; it stays JSONL", path)
+
+    # Write everything buffered so far as one batch. Returns the number of events written.
+    def flush(self):
+        with self._flush_lock:
+            events = []
+            while self._pending:
+                events.append(self._pending.popleft())
+            now = self.clock()
+            if self._segment is not None and now - self._segment[2] >= self.max_age:
+                self._rotate()
+            if not events:
+                return 0
+            if self._segment is None:
+                self._open(now)
+            path, handle, _ = self._segment
+            handle.write(''.join(self._line(event) for event in events))
+            handle.flush()
+            os.fsync(handle.fileno())
+            self.written += len(events)
+            if handle.tell() >= self.max_bytes:
+                self._rotate()
+            return len(events)
+
+    def _work(self):
+        if self.columnar:
+            try:
+                compact_stale(self.directory, self.max_age)
+            except Exception:
+                logger.exception("Could not compact stale audit segments")
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed; %d events still buffered", len(self._pending))
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._work, name='audit-log', daemon=True)
+            self._thread.start()
+        return self
+
+    # Stop the writer, flush what is buffered and close the segment (which compacts it)
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+        self.rotate()
+
+    def stats(self):
+        return {
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'buffered': len(self._pending),
+            'segments': self.segments,
+            'current': self._segment[0] if self._segment is not None else None,
+        }
+
+
+# Segments that may hold events between since and until (epoch seconds), oldest
+# first. A JSONL segment ends where the next one from the same process starts.
+def segments(directory=AUDIT_DIR, since=None, until=None):
+    found = []
+    for path in glob.glob(os.path.join(directory, f'{PREFIX}-*')):
+        match = _SEGMENT.match(os.path.basename(path))
+        if match is not None:
+            end = _parse_stamp(match.group(2)) if match.group(2) else None
+            found.append((_parse_stamp(match.group(1)), end, match.group(3), path))
+    found.sort()
+    following = {}
+    selected = []
+    for start, end, run, path in reversed(found):
+        if end is None:
+            end = following.get(run)
+        following[run] = start
+        if until is not None and start > until:
+            continue
+        if since is not None and end is not None and end < since:
+            continue
+        selected.append(path)
+    return selected[::-1]
+
+
+# JSONL segments no longer written to: older than max_age plus a margin, or
+# left behind by a process that has exited
+def compact_stale(directory=AUDIT_DIR, max_age=MAX_AGE, margin=60.0):
+    compacted = []
+    for path in segments(directory):
+        if path.endswith('.jsonl') and time.time() - os.path.getmtime(path) > max_age + margin:
+            target = compact(path)
+            if target is not None:
+                compacted.append(target)
+    return compacted
+
+
+def _timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    import pandas as pd
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize('UTC')
+    return stamp.timestamp()
+
+
+# Audit events in [since, until) as a DataFrame. With events=False (the
+# default) one row per prediction, with the last county chosen for it (and
+# county filters applied to that). since/until take epoch seconds,
+# datetimes or ISO strings; features=False leaves the feature columns out.
+def query(directory=AUDIT_DIR, since=None, until=None, outcome=None, model_version=None, county=None,
+          features=True, events=False):
+    import pandas as pd
+
+    since, until = _timestamp(since), _timestamp(until)
+    columns = COLUMNS if features else [name for name in COLUMNS if name not in FEATURES]
+    files = segments(directory, since, until)
+    parquet = [path for path in files if path.endswith('.parquet')]
+    frames = []
+    if parquet:
+        import pyarrow.dataset as ds
+        # County events carry no outcome or version; they are kept for the merge below
+        county_event = ds.field('event') == COUNTY
+        condition = None
+        for expression in (ds.field('ts') >= since if since is not None else None,
+                           ds.field('ts') < until if until is not None else None,
+                           county_event | (ds.field('outcome') == outcome) if outcome is not None else None,
+                           county_event | (ds.field('model_version') == model_version)
+                           if model_version is not None else None):
+            if expression is not None:
+                condition = expression if condition is None else condition & expression
+        frames.append(ds.dataset(parquet, format='parquet', schema=_schema())
+                      .to_table(columns=columns, filter=condition).to_pandas())
+    for path in files:
+        if path.endswith('.jsonl') and os.path.getsize(path):
+            frame = pd.read_json(path, lines=True, dtype=False).reindex(columns=columns)
+            if since is not None:
+                frame = frame[frame['ts'] >= since]
+            if until is not None:
+                frame = frame[frame['ts'] < until]
+            frames.append(frame)
+    data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    if events:
+        result = data
+        if outcome is not None:
+            result = result[result['outcome'] == outcome]
+        if model_version is not None:
+            result = result[result['model_version'] == model_version]
+    else:
+        counties = (data.loc[data['event'] == COUNTY, ['ts', 'prediction_id', 'county']]
+                    .sort_values('ts').drop_duplicates('prediction_id', keep='last')
+                    .set_index('prediction_id')['county'])
+        result = data[data['event'] == PREDICTION]
+        if outcome is not None:
+            result = result[result['outcome'] == outcome]
+        if model_version is not None:
+            result = result[result['model_version'] == model_version]
+        result = result.drop(columns=['event', 'county']).assign(county=result['prediction_id'].map(counties))
+    if county is not None:
+        result = result[result['county'] == county]
+    result = result.sort_values('ts', kind='stable').reset_index(drop=True)
+    result.insert(0, 'time', pd.to_datetime(result['ts'], unit='s', utc=True))
+    return result
+
+
+_lock = threading.Lock()
+_logs = {}
+
+
+# Process-wide audit log for a directory, with its writer started on first
+# use and flushed at interpreter exit
+def get_audit_log(directory=AUDIT_DIR):
+    directory = os.path.abspath(directory)
+    audit = _logs.get(directory)
+    if audit is not None:
+        return audit
+    with _lock:
+        audit = _logs.get(directory)
+        if audit is None:
+            audit = _logs[directory] = AuditLog(directory).start()
+            atexit.register(audit.stop)
+        return audit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=AUDIT_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    search = commands.add_parser('query', help='predictions (or raw events) in a time span')
+    search.add_argument('--since')
+    search.add_argument('--until')
+    search.add_argument('--outcome', choices=['Diabetic', 'Not Diabetic'])
+    search.add_argument('--version', help='model version')
+    search.add_argument('--county')
+    search.add_argument('--events', action='store_true', help='raw prediction and county events')
+    search.add_argument('--csv', help='write the result here instead of printing it')
+    stale = commands.add_parser('compact', help='rewrite stale JSONL segments as Parquet')
+    stale.add_argument('--max-age', type=float, default=MAX_AGE)
+    args = parser.parse_args(argv)
+
+    if args.command == 'compact':
+        for path in compact_stale(args.dir, args.max_age):
+            print(f"Compacted {os.path.basename(path)}")
+        return 0
+
+    result = query(args.dir, args.since, args.until, args.outcome, args.version, args.county, events=args.events)
+    if args.csv:
+        result.to_csv(args.csv, index=False)
+        print(f"{len(result)} rows written to {args.csv}")
+    else:
+        print(result.drop(columns=['ts']).to_string(index=False, max_rows=50))
+        print(f"{len(result)} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Per-event cost of the prediction audit log, and what reading it back costs.
+
+    python benchmarks/bench_audit_log.py [--calls 200000] [--events 1000000] [--repeat 3]
+
+hot path   time added to a prediction request by recording it, per event:
+           none     nothing recorded
+           logging  the two eager `logging.info(f"...")` calls Model.py used to
+                    make (features, then result), to a log file
+           audit    AuditLog.record_prediction, with the writer thread
+                    flushing to a temporary directory every second
+writer     events/s the background writer gets to disk (JSON lines, fsync
+           per batch), bytes per event as JSONL and after Parquet compaction
+query      --events synthetic predictions spread over 30 days (a segment per
+           day, a county picked for a third of them), read back with
+           audit_log.query from Parquet segments and from JSONL only: all of
+           them, the last day, and the Diabetic ones without features
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from audit_log import AuditLog, query, segments  # noqa: E402
+from synthetic import FEATURES, patient_table  # noqa: E402
+
+DAY = 86400.0
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def best(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+# ns per call of record(features, outcome): mean over the loop, then p50/p99 of single calls
+def hot_path(record, rows):
+    start = time.perf_counter_ns()
+    for features in rows:
+        record(features, 'Diabetic')
+    mean = (time.perf_counter_ns() - start) / len(rows)
+    single = []
+    for features in rows[:50_000]:
+        begin = time.perf_counter_ns()
+        record(features, 'Diabetic')
+        single.append(time.perf_counter_ns() - begin)
+    return mean, percentile(single, 0.5), percentile(single, 0.99)
+
+
+def eager_logger(path):
+    logger = logging.getLogger('bench_audit.eager')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(logging.FileHandler(path))
+
+    def record(features, outcome):
+        logger.info(f"Features received for prediction: {features}")
+        logger.info(f"Prediction result: {outcome}")
+    return record
+
+
+# A store with `events` predictions over 30 days, one segment per day
+def build_store(directory, rows, events, columnar):
+    clock = [time.time() - 30 * DAY]
+    audit = AuditLog(directory, max_age=DAY, columnar=columnar, clock=lambda: clock[0])
+    step = 30 * DAY / events
+    rng = random.Random(0)
+    for number in range(events):
+        features = rows[number % len(rows)]
+        prediction_id = audit.record_prediction(features, 'Diabetic' if features[1] > 140 else 'Not Diabetic',
+                                                'v1' if number < events // 2 else 'v2')
+        if number % 3 == 0:
+            audit.record_county(prediction_id, rng.choice(['NAIROBI', 'KISUMU', 'MOMBASA']))
+        clock[0] += step
+        if number % 10_000 == 9_999:
+            audit.flush()
+    audit.flush()
+    audit.rotate()
+    return clock[0]
+
+
+def size(directory):
+    return sum(os.path.getsize(path) for path in segments(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    patients = patient_table(min(args.calls, 100_000))[FEATURES]
+    rows = [[float(value) for value in row] for row in patients.itertuples(index=False)]
+    rows = (rows * (args.calls // len(rows) + 1))[:args.calls]
+    workdir = tempfile.mkdtemp(prefix='audit_bench_')
+    try:
+        audit = AuditLog(os.path.join(workdir, 'hot'), maxsize=2 * args.calls).start()
+        results = {
+            'none': hot_path(lambda features, outcome: None, rows),
+            'logging': hot_path(eager_logger(os.path.join(workdir, 'eager.log')), rows),
+            'audit': hot_path(lambda features, outcome: audit.record_prediction(features, outcome, 'v1'), rows),
+        }
+        audit.stop()
+        print(f"{'hot path':<8} {'mean ns':>8} {'p50 ns':>8} {'p99 ns':>8} {'added':>8}")
+        for name, (mean, p50, p99) in results.items():
+            print(f"{name:<8} {mean:8.0f} {p50:8.0f} {p99:8.0f} {mean - results['none'][0]:8.0f}")
+        print(f"audit: {audit.recorded} recorded, {audit.dropped} dropped, {audit.segments} segment(s)")
+
+        writer = AuditLog(os.path.join(workdir, 'writer'), columnar=False)
+        for features in rows:
+            writer.record_prediction(features, 'Diabetic', 'v1')
+        start = time.perf_counter()
+        writer.flush()
+        seconds = time.perf_counter() - start
+        jsonl = size(writer.directory)
+        start = time.perf_counter()
+        writer.columnar = True
+        writer.rotate()
+        compaction = time.perf_counter() - start
+        parquet = size(writer.directory)
+        print(f"\nwriter: {len(rows) / seconds:,.0f} events/s, {jsonl / len(rows):.0f} B/event as JSONL; "
+              f"Parquet compaction {compaction * 1000:.0f} ms, {parquet / len(rows):.1f} B/event")
+
+        print(f"\nquery over {args.events:,} predictions, 30 days")
+        print(f"{'store':<8} {'segments':>8} {'MB':>7} {'all':>9} {'last day':>9} {'Diabetic':>9}")
+        for name, columnar in (('parquet', True), ('jsonl', False)):
+            directory = os.path.join(workdir, name)
+            end = build_store(directory, rows, args.events, columnar)
+            timings = [best(lambda: query(directory), args.repeat),
+                       best(lambda: query(directory, since=end - DAY), args.repeat),
+                       best(lambda: query(directory, outcome='Diabetic', features=False), args.repeat)]
+            print(f"{name:<8} {len(segments(directory)):>8} {size(directory) / 1e6:7.1f} "
+                  + ' '.join(f"{seconds * 1000:7.0f}ms" for seconds in timings), flush=True)
+        print(f"rows: all {len(query(directory))}, last day {len(query(directory, since=end - DAY))}, "
+              f"Diabetic {len(query(directory, outcome='Diabetic', features=False))}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
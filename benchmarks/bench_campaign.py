@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Screening campaign against a local SMTP sink (requires aiosmtpd).
+
+    python benchmarks/bench_campaign.py [--rows 2000] [--workers 1 4] [--latency-ms 0]
+
+Compares the app's per-person path (rebuild the whole email, open a fresh SMTP
+session, send) with campaign.py over one connection, reporting messages/sec.
+It also stops a campaign halfway and resumes it from its checkpoint, then
+checks that every patient got exactly one email.
+"""
+
+import argparse
+import os
+import shutil
+import smtplib
+import sys
+import tempfile
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from bench_outbox import Sink, free_port  # noqa: E402
+from campaign import TIPS, EmailTemplate, run_campaign  # noqa: E402
+from email_outbox import SMTPConfig  # noqa: E402
+from synthetic import cohort_table  # noqa: E402
+
+SENDER = 'clinic@example.com'
+
+
+# What send_thank_you_email does for one person
+def send_one(port, name, email, diagnosis):
+    banner = """<img src="{}" alt="Banner Image" style="max-width: 100%; height: auto; margin-top: 20px;">""".format(
+        'https://d2jx2rerrg6sh3.cloudfront.net/images/Article_Images/ImageForArticle_22744_16565132428524067.jpg')
+    color = "red" if diagnosis == "Diabetic" else "green"
+    body = (f"Dear {name},<br><br>Thank you for visiting the Diabetes Prediction Web Application!<br><br>"
+            f"<b>Test Result:</b> <b style='color:{color}'>{diagnosis}</b>{banner}{TIPS}")
+    message = MIMEMultipart()
+    message["From"] = f"Clinic <{SENDER}>"
+    message["To"] = email
+    message["Subject"] = "Thank You for Visiting Diabetes Prediction Web Application!"
+    message.attach(MIMEText(body, "html"))
+    with smtplib.SMTP('127.0.0.1', port) as server:
+        server.sendmail(SENDER, email, message.as_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = Sink(args.latency_ms / 1000)
+    port = free_port()
+    controller = Controller(sink, hostname='127.0.0.1', port=port)
+    controller.start()
+    workdir = tempfile.mkdtemp(prefix='campaign_bench_')
+    cohort = cohort_table(args.rows)
+    cohort_path = os.path.join(workdir, 'cohort.csv')
+    cohort.to_csv(cohort_path, index=False)
+    config = SMTPConfig('127.0.0.1', port, starttls=False)
+    template = EmailTemplate('Clinic', SENDER)
+    quiet = lambda message: None  # noqa: E731
+    try:
+        sample = cohort.head(min(args.rows, 500))
+        start = time.perf_counter()
+        for name, email in zip(sample['Name'], sample['Email']):
+            send_one(port, name, email, 'Not Diabetic')
+        print(f"per person (fresh session)      {len(sample) / (time.perf_counter() - start):8.0f} messages/sec")
+
+        for workers in args.workers:
+            checkpoint = os.path.join(workdir, f'run-{workers}.sent')
+            stats = run_campaign(cohort_path, config, template, checkpoint, render_workers=workers, log=quiet)
+            print(f"campaign, {workers} render worker{'s' if workers > 1 else ' '}    "
+                  f"{stats['messages_per_sec']:8.0f} messages/sec   (scoring {stats['score_seconds'] * 1000:.0f} ms, "
+                  f"{stats['positives']} positives)")
+
+        # Stop halfway, then resume from the checkpoint
+        received = sink.received
+        checkpoint = os.path.join(workdir, 'resume.sent')
+        first = run_campaign(cohort_path, config, template, checkpoint, limit=args.rows // 2, log=quiet)
+        second = run_campaign(cohort_path, config, template, checkpoint, log=quiet)
+        third = run_campaign(cohort_path, config, template, checkpoint, log=quiet)
+        delivered = sink.received - received
+        print(f"resume: sent {first['sent']} + {second['sent']} + {third['sent']} "
+              f"(skipped {second['skipped']}, then {third['skipped']}); "
+              f"sink received {delivered} for {args.rows} patients -> {'ok' if delivered == args.rows else 'MISMATCH'}")
+    finally:
+        controller.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Cold-start cost of the Streamlit entry points.
+
+    python benchmarks/bench_cold_start.py [app.py] [--repeat 5] [--budget-ms 600]
+
+For every script, in fresh interpreters:
+  import   `python -X importtime -c "import <script>"`: total import time and
+           the heaviest modules it pulls in directly
+  render   wall time of the first full script run through Streamlit's AppTest
+           (Streamlit itself is imported before the clock starts, as it is in
+           a running server)
+
+With --budget-ms the exit status is 1 when a median import time exceeds the
+budget, so the script can guard against regressions in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RENDER = """
+import json, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({script!r}, default_timeout=60).run()
+print(json.dumps({{'render': time.perf_counter() - start, 'exceptions': len(at.exception)}}))
+"""
+
+
+# (total microseconds, [(cumulative microseconds, module)] of direct imports)
+def import_profile(module):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative), name))
+
+    # importtime prints children before their parent: the script's direct
+    # imports are the lines one level deeper right above its own line
+    total = 0
+    children = []
+    for position, (cumulative, name) in enumerate(rows):
+        if name.strip() == module and not name.startswith('  '):
+            total = cumulative
+            for child_cumulative, child in reversed(rows[:position]):
+                if not child.startswith('  '):
+                    break
+                if not child.startswith('    '):
+                    children.append((child_cumulative, child.strip()))
+    return total, sorted(children, reverse=True)
+
+
+def first_render(script):
+    result = subprocess.run([sys.executable, '-c', RENDER.format(script=script)],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scripts', nargs='*', default=['app.py'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    over_budget = False
+    for script in args.scripts:
+        module = os.path.splitext(os.path.basename(script))[0]
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        imports = statistics.median(total for total, _ in profiles) / 1000
+        renders = [first_render(script) for _ in range(args.repeat)]
+        render = statistics.median(run['render'] for run in renders) * 1000
+
+        print(f"{script}: import {imports:.0f} ms, first render {render:.0f} ms (median of {args.repeat})")
+        for cumulative, name in profiles[-1][1][:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        if any(run['exceptions'] for run in renders):
+            print("    (the first render raised an exception)")
+
+        results[script] = {'import_ms': imports, 'first_render_ms': render}
+        if args.budget_ms is not None and imports > args.budget_ms:
+            print(f"    import time is over the {args.budget_ms:.0f} ms budget")
+            over_budget = True
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of explaining a batch on top of scoring it.
+
+    python benchmarks/bench_explanations.py [--rows 500000] [--chunksize 10000] [--repeat 3]
+
+For trained_model.sav and its NumPy export, times per chunk of synthetic
+patients:
+
+  score    score_frame alone (what batch_scoring.py always does)
+  explain  explain_frame alone (margins and per-feature contributions)
+
+and then the whole batch_scoring.score_file run with and without --explain,
+which includes reading and writing the CSV (9 more output columns).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_scoring import load_model, score_file, score_frame  # noqa: E402
+from explanations import explain_frame  # noqa: E402
+from linear_model import LINEAR_MODEL_FILE, MODEL_FILE  # noqa: E402
+from synthetic import patient_table  # noqa: E402
+
+
+def best(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--chunksize', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    patients = patient_table(args.rows)
+    chunk = patients.head(args.chunksize)
+    workdir = tempfile.mkdtemp(prefix='explain_bench_')
+    input_path = os.path.join(workdir, 'patients.csv')
+    output_path = os.path.join(workdir, 'scored.csv')
+    patients.to_csv(input_path, index=False)
+
+    try:
+        for label, path in (('sklearn', MODEL_FILE), ('linear', LINEAR_MODEL_FILE)):
+            model = load_model(path)
+            explain_frame(chunk, model)  # folds the model into a LinearScorer once
+            score = best(lambda: score_frame(model, chunk), args.repeat)
+            explain = best(lambda: explain_frame(chunk, model), args.repeat)
+            print(f"{label:<8} per {args.chunksize} rows: score {score * 1000:7.2f} ms   "
+                  f"explain {explain * 1000:6.2f} ms ({explain / score:.0%} of scoring)")
+
+            plain = statistics.median(score_file(input_path, output_path, model, args.chunksize)['seconds']
+                                      for _ in range(args.repeat))
+            explained = statistics.median(score_file(input_path, output_path, model, args.chunksize,
+                                                     explain=True)['seconds'] for _ in range(args.repeat))
+            print(f"{label:<8} score_file {args.rows} rows: {plain:6.2f} s   --explain {explained:6.2f} s "
+                  f"(+{(explained - plain) / plain:.0%})")
+    finally:
+        for path in (input_path, output_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
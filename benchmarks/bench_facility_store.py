@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Cold vs. warm load times of the shared facility store.
+
+    python benchmarks/bench_facility_store.py [--repeat 20]
+
+cold     : no snapshot, the workbook is parsed with openpyxl and the snapshot written
+snapshot : new process state, served from the columnar snapshot
+warm     : served from the in-process copy
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import facility_store  # noqa: E402
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--workbook', default=facility_store.FACILITY_FILE)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='facility_bench_')
+    try:
+        workbook = os.path.join(workdir, os.path.basename(args.workbook))
+        shutil.copy(args.workbook, workbook)
+        snapshot_dir = os.path.join(workdir, facility_store.SNAPSHOT_DIRNAME)
+
+        def cold():
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            facility_store.clear_memory_cache()
+            facility_store.load_data(workbook)
+
+        def snapshot():
+            facility_store.clear_memory_cache()
+            facility_store.load_data(workbook)
+
+        def warm():
+            facility_store.load_data(workbook)
+
+        results = [
+            ('cold', timed(cold, args.repeat)),
+            ('snapshot', timed(snapshot, args.repeat)),
+            ('warm', timed(warm, args.repeat * 100)),
+        ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results[0][1]
+    print(f"{'path':<10}{'median':>14}{'speedup':>10}")
+    for name, seconds in results:
+        print(f"{name:<10}{seconds * 1000:>11.3f} ms{baseline / seconds:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Feedback queue against a local stand-in for the Formspree endpoint.
+
+    python benchmarks/bench_feedback.py [--messages 500] [--latency-ms 50] [--fail-every 10]
+
+Reports the Send-click cost of the old inline `requests.post` vs. queueing
+the submission, and how fast the forwarder drains the queue. The stand-in
+answers every --fail-every'th request with a 503 and drops the connection on
+another one after recording it (a lost response), so retries and the
+idempotency keys are exercised: every message must arrive exactly once.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from bench_outbox import percentile  # noqa: E402
+from feedback_queue import FeedbackQueue  # noqa: E402
+
+
+class StandIn(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, latency, fail_every):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.keys = {}
+        self.lock = threading.Lock()
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            number = server.requests
+        time.sleep(server.latency)
+        if server.fail_every and number % server.fail_every == 0:
+            self._reply(503)
+            return
+        key = self.headers.get('Idempotency-Key')
+        with server.lock:
+            duplicate = key in server.keys
+            server.keys[key] = server.keys.get(key, 0) + 1
+        if server.fail_every and number % server.fail_every == server.fail_every // 2 and not duplicate:
+            self.close_connection = True  # recorded, but the client never hears back
+            self.connection.shutdown(2)
+            return
+        self._reply(200)
+
+    def _reply(self, status):
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--fail-every', type=int, default=10)
+    args = parser.parse_args()
+
+    server = StandIn(args.latency_ms / 1000, args.fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f'http://127.0.0.1:{server.server_address[1]}/f/test'
+    workdir = tempfile.mkdtemp(prefix='feedback_bench_')
+    try:
+        # Before: the click waits for the remote form endpoint (no failures
+        # injected here, the old code had no way to recover from them)
+        server.fail_every = 0
+        clicks = []
+        for number in range(min(args.messages, 50)):
+            start = time.perf_counter()
+            requests.post(endpoint, data={'message': f'inline {number}'}, headers={'Idempotency-Key': f'i{number}'})
+            clicks.append(time.perf_counter() - start)
+        print(f"inline requests.post   click p50 {percentile(clicks, .5) * 1000:8.2f} ms   "
+              f"p99 {percentile(clicks, .99) * 1000:8.2f} ms")
+
+        # After: the click is one insert
+        server.fail_every = args.fail_every
+        queue = FeedbackQueue(endpoint, os.path.join(workdir, 'feedback.db'), backoff=0.01, max_backoff=0.05)
+        clicks = []
+        for number in range(args.messages):
+            start = time.perf_counter()
+            queue.submit({'message': f'queued {number}'}, key=f'q{number}')
+            clicks.append(time.perf_counter() - start)
+        print(f"feedback queue         click p50 {percentile(clicks, .5) * 1000:8.2f} ms   "
+              f"p99 {percentile(clicks, .99) * 1000:8.2f} ms")
+
+        start = time.perf_counter()
+        queue.start()
+        queue.drain()
+        seconds = time.perf_counter() - start
+        queue.stop()
+        delivered = {key: count for key, count in server.keys.items() if key.startswith('q')}
+        duplicates = sum(count - 1 for count in delivered.values())
+        print(f"forwarder drained {args.messages} in {seconds:.2f} s ({args.messages / seconds:.0f} msg/s), "
+              f"{queue.counts()}; endpoint saw {len(delivered)} distinct keys, {duplicates} retried deliveries "
+              f"it could drop by key")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the Streamlit apps: N concurrent sessions against a local server.
+
+    python benchmarks/bench_load.py [--flows predict search feedback] [--sessions 1 10 50]
+                                    [--duration 20] [--think-ms 0] [--json results.json]
+
+Every (flow, session count) pair gets a fresh `streamlit run app.py`. Each
+simulated session is a websocket client speaking Streamlit's protocol the way
+a browser tab does: it sends all its widget values with every rerun (scoped
+to the fragment when the widget is in one, and none while typing into a
+form) and waits for the script to finish. Sessions open the flow's page and
+repeat the flow until --duration runs out:
+
+  predict   prediction page: type name, email and the seven fields and move
+            the Age slider, then Predict (and for a Diabetic result, pick a
+            county for the recommendations)
+  search    facility finder: pick a county, then search for a name
+  feedback  help page (opened from the prediction page each time): type a
+            message, Send
+
+Mail goes through the real outbox to a local SMTP sink (aiosmtpd) and feedback
+is forwarded to a local HTTP stub, both wired up in the server process before
+Streamlit starts. The 2 s spinner sleep stays in: users wait for it too.
+
+Reported per run: reruns/s and completed flows/s, p50/p99 latency of every
+rerun and of the flow's last step, reruns and server CPU per flow (one user
+interaction: every session finishes the flow it is in when time runs out),
+and server RSS after a warm-up session, at its peak under load and the
+increase per session.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import websockets
+from aiosmtpd.controller import Controller
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_outbox import Sink, free_port, percentile  # noqa: E402
+from synthetic import patient_table  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+# Runs in the server process: point mail and feedback at the stubs, then
+# hand over to the streamlit CLI
+SERVE = """
+import sys
+sys.path.insert(0, {root!r})
+import email_outbox, feedback_queue
+_get_outbox, _message_status = email_outbox.get_outbox, email_outbox.message_status
+email_outbox.get_outbox = lambda *args, **kwargs: _get_outbox('127.0.0.1', {smtp_port}, starttls=False, path={outbox!r})
+email_outbox.message_status = lambda message_id, path=None: _message_status(message_id, {outbox!r})
+feedback_queue.submit_feedback = lambda payload, endpoint=None, key=None: (
+    feedback_queue.get_feedback_queue({form_url!r}, {feedback!r}).submit(payload, key))
+from streamlit.web import cli
+cli.main(['run', {script!r}, '--server.headless=true', '--server.port={port}', '--server.address=127.0.0.1',
+          '--server.fileWatcherType=none', '--browser.gatherUsageStats=false'], prog_name='streamlit')
+"""
+
+NAME_WORDS = ['hospital', 'medical', 'mission', 'county', 'health', 'nairobi', 'mombasa', 'kenyatta', 'st.']
+
+
+# Feedback endpoint that accepts everything
+class FormStub(BaseHTTPRequestHandler):
+    received = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        FormStub.received += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+def _rss(pid):
+    with open(f'/proc/{pid}/status') as handle:
+        return next(int(line.split()[1]) * 1024 for line in handle if line.startswith('VmRSS'))
+
+
+def _cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as handle:
+        fields = handle.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+# One browser tab: the widgets of its last run and the values it has entered
+class Session:
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}  # label -> (kind, id, form id, fragment id, element)
+        self.pages = {}    # page title -> page script hash
+        self.page = ''
+        self.states = {}   # widget id -> (kind, value)
+        self.triggers = set()
+        self.latencies = []  # (step, seconds, finished at)
+        self.exceptions = 0
+        self.websocket = None
+
+    async def connect(self):
+        self.websocket = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+        await self.rerun('load')
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+
+    # Open a page of a multipage app (nothing to do if it's already open or
+    # the script has no pages)
+    async def goto(self, page, step='page'):
+        page_hash = self.pages.get(page, self.page)
+        if page_hash != self.page:
+            self.page = page_hash
+            await self.rerun(step)
+
+    def widget(self, label):
+        for name, widget in self.widgets.items():
+            if label in name:
+                return widget
+        raise KeyError(f"no widget labelled {label!r} (have {sorted(self.widgets)})")
+
+    def options(self, label):
+        return list(self.widget(label)[4].options)
+
+    # Enter a value the way the browser does: a rerun (of the widget's
+    # fragment, if any) unless the widget sits in a form
+    async def input(self, label, value, step='input'):
+        kind, widget_id, form_id, fragment_id, _ = self.widget(label)
+        self.states[widget_id] = (kind, value)
+        if not form_id:
+            await self.rerun(step, fragment_id)
+
+    async def click(self, label, step):
+        kind, widget_id, _, fragment_id, _ = self.widget(label)
+        self.triggers.add(widget_id)
+        await self.rerun(step, fragment_id)
+
+    def _message(self, fragment_id):
+        message = BackMsg()
+        rerun = message.rerun_script
+        rerun.query_string = ''
+        rerun.page_script_hash = self.page
+        if fragment_id:
+            rerun.fragment_id = fragment_id
+        for widget_id, (kind, value) in self.states.items():
+            state = rerun.widget_states.widgets.add()
+            state.id = widget_id
+            if kind == 'slider':
+                state.double_array_value.data[:] = [value]
+            elif kind == 'component_instance':
+                state.json_value = json.dumps(value)
+            else:
+                state.string_value = value
+        for widget_id in self.triggers:
+            state = rerun.widget_states.widgets.add()
+            state.id = widget_id
+            state.trigger_value = True
+        self.triggers = set()
+        return message.SerializeToString()
+
+    async def rerun(self, step, fragment_id=''):
+        start = time.perf_counter()
+        await self.websocket.send(self._message(fragment_id))
+        if not fragment_id:
+            self.widgets = {}
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await asyncio.wait_for(self.websocket.recv(), self.timeout))
+            kind = message.WhichOneof('type')
+            if kind == 'delta' and message.delta.WhichOneof('type') == 'new_element':
+                self._element(message.delta)
+            elif kind == 'navigation':
+                self.pages = {page.page_name: page.page_script_hash for page in message.navigation.app_pages}
+                self.page = message.navigation.page_script_hash
+            elif kind == 'script_finished':
+                if message.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                break
+        finished = time.perf_counter()
+        self.latencies.append((step, finished - start, finished))
+
+    def _element(self, delta):
+        element = delta.new_element
+        kind = element.WhichOneof('type')
+        if kind == 'exception':
+            self.exceptions += 1
+            return
+        if kind not in ('text_input', 'text_area', 'selectbox', 'slider', 'button', 'component_instance'):
+            return
+        proto = getattr(element, kind)
+        label = proto.component_name if kind == 'component_instance' else proto.label
+        self.widgets[label] = (kind, proto.id, getattr(proto, 'form_id', ''), delta.fragment_id, proto)
+
+
+async def predict_flow(session, rng, patients, number):
+    patient = patients.iloc[rng.randrange(len(patients))]
+    await session.input('Enter Your Name', f'Patient {number}')
+    await session.input('Enter Your Email', f'patient{number}@gmail.com')
+    fields = [('Pregnancies', 'Pregnancies'), ('Glucose Level', 'Glucose'), ('BloodPressure Value', 'BloodPressure'),
+              ('Skin Thickness Value', 'SkinThickness'), ('Insulin Level', 'Insulin'), ('BMI Value', 'BMI'),
+              ('Diabetes Pedigree Function Value', 'DiabetesPedigreeFunction')]
+    for label, column in fields:
+        value = patient[column]
+        await session.input(label, str(int(value)) if float(value).is_integer() else str(value))
+    await session.input('Choose your Age', int(patient['Age']))
+    await session.click('Predict', 'predict')
+    if any(label == 'Select County:' for label in session.widgets):
+        await session.input('Select County:', rng.choice(session.options('Select County:')), 'county')
+
+
+async def search_flow(session, rng, patients, number):
+    await session.input('County:', rng.choice(session.options('County:')), 'county')
+    await session.input('Search by Hospital Name', rng.choice(NAME_WORDS), 'search')
+
+
+async def feedback_flow(session, rng, patients, number):
+    await session.goto('Help & Feedback')
+    await session.input('Have questions or suggestions', f'Load test message {number}')
+    await session.click('Send', 'send')
+    await session.goto('Diabetes Prediction')
+
+
+# name -> (page title, flow, its last step)
+FLOWS = {
+    'predict': ('Diabetes Prediction', predict_flow, 'predict'),
+    'search': ('Facility Finder', search_flow, 'search'),
+    'feedback': ('Diabetes Prediction', feedback_flow, 'send'),
+}
+
+
+class Server:
+
+    def __init__(self, script, workdir, smtp_port, form_url, root=ROOT):
+        self.port = free_port()
+        self.started = time.perf_counter()
+        serve = SERVE.format(root=root, script=os.path.join(root, script), port=self.port, smtp_port=smtp_port,
+                             outbox=os.path.join(workdir, 'outbox.db'), feedback=os.path.join(workdir, 'feedback.db'),
+                             form_url=form_url)
+        env = {key: value for key, value in os.environ.items() if key != 'PREDICTION_SERVICE_URL'}
+        self.process = subprocess.Popen([sys.executable, '-c', serve], cwd=root, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f'ws://127.0.0.1:{self.port}/_stcore/stream'
+
+    def wait(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"streamlit exited with status {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{self.port}/_stcore/health', timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError("streamlit didn't come up")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+async def load(server, flow, sessions, duration, think, timeout, patients):
+    page, run_flow, _ = FLOWS[flow]
+    pid = server.process.pid
+    counter = iter(range(10**9))
+
+    # One session through the flow first: imports, model and data loading
+    # aren't part of the per-session cost
+    warm = Session(server.url, timeout)
+    await warm.connect()
+    await warm.goto(page)
+    await run_flow(warm, random.Random(-1), patients, next(counter))
+    await warm.close()
+    await asyncio.sleep(1)
+    baseline = _rss(pid)
+    peak = baseline
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, _rss(pid))
+            await asyncio.sleep(0.2)
+
+    async def user(index, session, stop_at):
+        rng = random.Random(index)
+        flows = 0
+        try:
+            await session.connect()
+            await session.goto(page, 'open')
+            while time.perf_counter() < stop_at:
+                await run_flow(session, rng, patients, next(counter))
+                flows += 1
+                if think:
+                    await asyncio.sleep(rng.expovariate(1 / think))
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            session.exceptions += 1
+        return flows
+
+    sampler = asyncio.create_task(sample())
+    clients = [Session(server.url, timeout) for _ in range(sessions)]
+    cpu_before = _cpu_seconds(pid)
+    start = time.perf_counter()
+    flows = await asyncio.gather(*(user(index, session, start + duration) for index, session in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+    cpu = _cpu_seconds(pid) - cpu_before
+    peak = max(peak, _rss(pid))
+    sampler.cancel()
+    await asyncio.gather(*(session.close() for session in clients), return_exceptions=True)
+
+    steps = [(step, seconds) for session in clients for step, seconds, _ in session.latencies
+             if step not in ('load', 'open')]
+    return {
+        'flow': flow,
+        'sessions': sessions,
+        'seconds': elapsed,
+        'flows': sum(flows),
+        'reruns': len(steps),
+        'errors': sum(session.exceptions for session in clients),
+        'latencies': [seconds for _, seconds in steps],
+        'final_step': [seconds for step, seconds in steps if step == FLOWS[flow][2]],
+        'cpu_seconds': cpu,
+        'rss_baseline': baseline,
+        'rss_peak': peak,
+    }
+
+
+def summary(result):
+    latencies, final = result['latencies'], result['final_step']
+    reruns, flows = max(result['reruns'], 1), max(result['flows'], 1)
+    return {
+        'flow': result['flow'],
+        'sessions': result['sessions'],
+        'flows_per_sec': result['flows'] / result['seconds'],
+        'reruns_per_sec': result['reruns'] / result['seconds'],
+        'p50_ms': percentile(latencies, 0.5) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+        'final_p50_ms': percentile(final, 0.5) * 1000 if final else None,
+        'final_p99_ms': percentile(final, 0.99) * 1000 if final else None,
+        'cpu_ms_per_rerun': result['cpu_seconds'] * 1000 / reruns,
+        'reruns_per_flow': result['reruns'] / flows,
+        'cpu_ms_per_flow': result['cpu_seconds'] * 1000 / flows,
+        'rss_baseline_mb': result['rss_baseline'] / 1e6,
+        'rss_peak_mb': result['rss_peak'] / 1e6,
+        'rss_per_session_kb': (result['rss_peak'] - result['rss_baseline']) / result['sessions'] / 1e3,
+        'errors': result['errors'],
+    }
+
+
+def _ms(value):
+    return f"{value:8.0f}" if value is not None else f"{'-':>8}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--flows', nargs='+', choices=list(FLOWS), default=list(FLOWS))
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of load per run')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='mean pause between flows (exponential)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds before a rerun counts as failed')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    sink = Sink(0)
+    smtp_port = free_port()
+    controller = Controller(sink, hostname='127.0.0.1', port=smtp_port)
+    controller.start()
+    form = ThreadingHTTPServer(('127.0.0.1', 0), FormStub)
+    threading.Thread(target=form.serve_forever, daemon=True).start()
+    form_url = f'http://127.0.0.1:{form.server_address[1]}/feedback'
+    patients = patient_table(200)
+
+    print(f"{'flow':<9} {'sessions':>8} {'flows/s':>8} {'reruns/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'last p50':>8} {'last p99':>8} {'reruns/flow':>11} {'CPU ms/flow':>11} {'RSS MB':>7} {'peak MB':>8} "
+          f"{'/session':>10} {'errors':>6}")
+    results = []
+    try:
+        for flow in args.flows:
+            for sessions in args.sessions:
+                workdir = tempfile.mkdtemp(prefix='load_bench_')
+                server = Server('app.py', workdir, smtp_port, form_url).wait()
+                try:
+                    result = summary(asyncio.run(load(server, flow, sessions, args.duration, args.think_ms / 1000,
+                                                      args.timeout, patients)))
+                finally:
+                    server.stop()
+                    shutil.rmtree(workdir, ignore_errors=True)
+                results.append(result)
+                print(f"{flow:<9} {sessions:>8} {result['flows_per_sec']:8.2f} {result['reruns_per_sec']:9.1f} "
+                      f"{_ms(result['p50_ms'])} {_ms(result['p99_ms'])} {_ms(result['final_p50_ms'])} "
+                      f"{_ms(result['final_p99_ms'])} {result['reruns_per_flow']:11.1f} "
+                      f"{result['cpu_ms_per_flow']:11.0f} "
+                      f"{result['rss_baseline_mb']:7.1f} {result['rss_peak_mb']:8.1f} "
+                      f"{result['rss_per_session_kb']:7.0f} kB {result['errors']:>6}", flush=True)
+    finally:
+        controller.stop()
+        form.shutdown()
+    print(f"SMTP sink received {sink.received} emails, feedback stub {FormStub.received} posts")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Startup time and memory of the separate Streamlit scripts vs. app.py.
+
+    python benchmarks/bench_multipage.py [--before REV] [--repeat 3]
+
+`separate` runs Hospital.py, Model.py, Diabetes_Prediction.py,
+DialysisHospital.py and Hospitals.py as they were at REV (by default the
+commit before app.py was added), one server each, side by side. `app.py`
+runs the multipage app of the working tree as one server. Both trees are
+copied to a temporary directory and get their facility snapshot built before
+any server starts.
+
+Servers are started one after the other; for each one:
+
+  startup  from spawning `streamlit run` to the end of a first session's
+           first page run
+  warm-up  that session going through what the script offers: a prediction
+           on the prediction pages, a county and name search on the facility
+           finders (for app.py: every page, feedback included)
+
+With all servers still running, RSS and PSS (shared pages split between the
+processes that map them) are summed. Mail and feedback are stubbed as in
+bench_load.py.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from aiosmtpd.controller import Controller
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_load import (ROOT, FormStub, Server, Session, _rss, feedback_flow, predict_flow,  # noqa: E402
+                        search_flow)
+from bench_outbox import Sink, free_port  # noqa: E402
+from synthetic import patient_table  # noqa: E402
+
+SEPARATE = {
+    'Hospital.py': [predict_flow],
+    'Model.py': [predict_flow],
+    'Diabetes_Prediction.py': [predict_flow],
+    'DialysisHospital.py': [search_flow],
+    'Hospitals.py': [search_flow],
+}
+
+
+async def debug_flow(session, rng, patients, number):
+    await session.goto('Debugging')
+    await session.click('Debug Predict', 'predict')
+
+
+async def app_flow(session, rng, patients, number):
+    await predict_flow(session, rng, patients, number)
+    await session.goto('Facility Finder')
+    await search_flow(session, rng, patients, number)
+    await debug_flow(session, rng, patients, number)
+    await feedback_flow(session, rng, patients, number)
+
+
+def _pss(pid):
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as handle:
+            return next(int(line.split()[1]) * 1024 for line in handle if line.startswith('Pss:'))
+    except (OSError, StopIteration):
+        return _rss(pid)
+
+
+def export(revision, target):
+    os.makedirs(target)
+    archive = subprocess.run(['git', 'archive', revision], cwd=ROOT, capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', target], input=archive, check=True)
+
+
+def copy_tree(target):
+    shutil.copytree(ROOT, target, ignore=shutil.ignore_patterns(
+        '.git', '.facility_cache', '.outbox', '__pycache__', '.benchmarks', '*.db', '*.db-*'))
+
+
+def default_revision():
+    added = subprocess.run(['git', 'log', '--diff-filter=A', '--format=%H', '-1', '--', 'app.py'],
+                           cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    return f'{added}^' if added else 'HEAD'
+
+
+async def start(root, script, flows, workdir, smtp_port, form_url, patients):
+    server = Server(script, workdir, smtp_port, form_url, root=root).wait()
+    session = Session(server.url, timeout=120)
+    await session.connect()
+    startup = time.perf_counter() - server.started
+    begin = time.perf_counter()
+    for flow in flows:
+        await flow(session, random.Random(0), patients, 0)
+    warm_up = time.perf_counter() - begin
+    if session.exceptions:
+        raise RuntimeError(f"{script} raised {session.exceptions} exceptions")
+    return server, session, startup, warm_up
+
+
+async def measure(root, scripts, workdir, smtp_port, form_url, patients):
+    servers, sessions, startups, warm_ups = [], [], [], []
+    try:
+        for script, flows in scripts.items():
+            server, session, startup, warm_up = await start(root, script, flows, workdir, smtp_port, form_url,
+                                                            patients)
+            servers.append(server)
+            sessions.append(session)
+            startups.append(startup)
+            warm_ups.append(warm_up)
+        await asyncio.sleep(1)
+        return {
+            'startup': sum(startups),
+            'startup_max': max(startups),
+            'warm_up': sum(warm_ups),
+            'rss': sum(_rss(server.process.pid) for server in servers),
+            'pss': sum(_pss(server.process.pid) for server in servers),
+        }
+    finally:
+        for session in sessions:
+            await session.close()
+        for server in servers:
+            server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--before', help='revision with the separate scripts (default: the one before app.py)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sink = Sink(0)
+    smtp_port = free_port()
+    controller = Controller(sink, hostname='127.0.0.1', port=smtp_port)
+    controller.start()
+    form = ThreadingHTTPServer(('127.0.0.1', 0), FormStub)
+    threading.Thread(target=form.serve_forever, daemon=True).start()
+    form_url = f'http://127.0.0.1:{form.server_address[1]}/feedback'
+    patients = patient_table(50)
+
+    revision = args.before or default_revision()
+    workdir = tempfile.mkdtemp(prefix='multipage_bench_')
+    trees = {'separate': os.path.join(workdir, 'before'), 'app.py': os.path.join(workdir, 'after')}
+    try:
+        export(revision, trees['separate'])
+        copy_tree(trees['app.py'])
+        for tree in trees.values():
+            subprocess.run([sys.executable, '-c', 'import facility_store; facility_store.load_data()'],
+                           cwd=tree, check=True, capture_output=True)
+        print(f"separate scripts from {revision[:12]}, app.py from the working tree")
+        print(f"{'setup':<9} {'servers':>7} {'startup':>9} {'slowest':>9} {'warm-up':>9} {'RSS':>9} {'PSS':>9}")
+        for label, scripts in (('separate', SEPARATE), ('app.py', {'app.py': [app_flow]})):
+            runs = []
+            for number in range(args.repeat):
+                state = os.path.join(workdir, f'{label}-{number}')
+                os.makedirs(state)
+                runs.append(asyncio.run(measure(trees[label], scripts, state, smtp_port, form_url, patients)))
+            result = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{label:<9} {len(scripts):>7} {result['startup']:7.2f} s {result['startup_max']:7.2f} s "
+                  f"{result['warm_up']:7.2f} s {result['rss'] / 1e6:6.0f} MB {result['pss'] / 1e6:6.0f} MB", flush=True)
+    finally:
+        controller.stop()
+        form.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Email outbox against a local SMTP sink (requires aiosmtpd).
+
+    python benchmarks/bench_outbox.py [--messages 500] [--workers 1 4] [--latency-ms 20]
+
+Reports the Predict-click cost of the old synchronous send (fresh connection
+per message) vs. queueing in the outbox, and the sustained send rate of the
+outbox workers over their pooled connections. --latency-ms makes the sink
+answer DATA slowly, like a remote server would.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import smtplib
+import socket
+import sys
+import tempfile
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from email_outbox import Outbox, SMTPConfig  # noqa: E402
+
+SENDER = 'clinic@example.com'
+
+
+class Sink:
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received += 1
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def render(number):
+    message = MIMEMultipart()
+    message["From"] = f"Clinic <{SENDER}>"
+    message["To"] = f"patient{number}@example.com"
+    message["Subject"] = "Thank You for Visiting Diabetes Prediction Web Application!"
+    message.attach(MIMEText(f"Dear patient {number},<br><br><b>Test Result:</b> Not Diabetic" + "<p>tips</p>" * 40,
+                            "html"))
+    return message.as_string()
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = Sink(args.latency_ms / 1000)
+    port = free_port()
+    controller = Controller(sink, hostname='127.0.0.1', port=port)
+    controller.start()
+    workdir = tempfile.mkdtemp(prefix='outbox_bench_')
+    bodies = [render(number) for number in range(args.messages)]
+    try:
+        # Before: every click opens, uses and closes its own SMTP session
+        clicks = []
+        start = time.perf_counter()
+        for number, body in enumerate(bodies):
+            began = time.perf_counter()
+            with smtplib.SMTP('127.0.0.1', port) as server:
+                server.sendmail(SENDER, f'patient{number}@example.com', body)
+            clicks.append(time.perf_counter() - began)
+        direct_rate = args.messages / (time.perf_counter() - start)
+        print(f"synchronous send   click p50 {percentile(clicks, .5) * 1000:8.2f} ms   "
+              f"p99 {percentile(clicks, .99) * 1000:8.2f} ms   {direct_rate:8.0f} msg/s")
+
+        for workers in args.workers:
+            config = SMTPConfig('127.0.0.1', port, starttls=False)
+            outbox = Outbox(config, path=os.path.join(workdir, f'outbox-{workers}.db'), workers=workers)
+
+            # After: a click only queues the message
+            clicks = []
+            for number, body in enumerate(bodies):
+                began = time.perf_counter()
+                outbox.enqueue(SENDER, f'patient{number}@example.com', body)
+                clicks.append(time.perf_counter() - began)
+
+            start = time.perf_counter()
+            outbox.start()
+            outbox.drain()
+            rate = args.messages / (time.perf_counter() - start)
+            outbox.stop()
+            print(f"outbox, {workers} worker{'s' if workers > 1 else ' '}  click p50 "
+                  f"{percentile(clicks, .5) * 1000:8.2f} ms   p99 {percentile(clicks, .99) * 1000:8.2f} ms   "
+                  f"{rate:8.0f} msg/s   {outbox.counts()}")
+    finally:
+        controller.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Load generator for prediction_service.py, with micro-batching on and off.
+
+    python benchmarks/bench_prediction_service.py [--requests 5000] [--concurrency 1 16 64]
+                                                  [--window-ms 2] [--model trained_model.sav]
+
+Starts a local service for each mode, drives it from keep-alive connections
+(one per simulated client, each sending its next request as soon as the last
+one is answered) and reports throughput, p50/p95/p99 latency and the mean
+batch size the service formed. By default the sklearn model the apps used to
+embed (trained_model.sav) is served, as batching pays off most there.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import FEATURES, patient_table  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def start_service(port, model, batching, window_ms):
+    command = [sys.executable, '-W', 'ignore', os.path.join(ROOT, 'prediction_service.py'),
+               '--port', str(port), '--window-ms', str(window_ms)]
+    if model:
+        command += ['--model', model]
+    if not batching:
+        command.append('--no-batching')
+    process = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            return process, health(port)
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("prediction service did not start")
+
+
+def health(port):
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=5) as response:
+        return json.load(response)
+
+
+# One simulated client: a keep-alive connection sending requests back to back
+async def client(port, bodies, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(b'POST /predict HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n'
+                         b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+            await writer.drain()
+            length = 0
+            status = await reader.readline()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            if not status.startswith(b'HTTP/1.1 200'):
+                raise RuntimeError(status.decode().strip())
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def drive(port, bodies, concurrency):
+    latencies = []
+    shares = [bodies[number::concurrency] for number in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, share, latencies) for share in shares))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--model', default=os.path.join(ROOT, 'trained_model.sav'),
+                        help="model to serve; '' serves the registry's active version")
+    args = parser.parse_args()
+
+    rows = patient_table(args.requests)[FEATURES].to_numpy().tolist()
+    bodies = [json.dumps({'features': row}).encode() for row in rows]
+
+    for batching in (False, True):
+        port = free_port()
+        process, _ = start_service(port, args.model, batching, args.window_ms)
+        try:
+            asyncio.run(drive(port, bodies[:200], 4))  # warm up
+            for concurrency in args.concurrency:
+                before = health(port)['batching']
+                latencies, seconds = asyncio.run(drive(port, bodies, concurrency))
+                after = health(port)['batching']
+                batch = '-'
+                if batching:
+                    formed = after['batches'] - before['batches']
+                    batch = f"{(after['rows'] - before['rows']) / formed:5.1f}" if formed else '-'
+                print(f"batching {'on ' if batching else 'off'}  clients {concurrency:4d}  "
+                      f"{len(latencies) / seconds:8.0f} req/s   p50 {percentile(latencies, .5) * 1000:7.2f} ms   "
+                      f"p95 {percentile(latencies, .95) * 1000:7.2f} ms   p99 {percentile(latencies, .99) * 1000:7.2f} ms"
+                      f"   mean batch {batch}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
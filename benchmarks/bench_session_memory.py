@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Per-session memory of the facility table with 1, 50 and 500 concurrent sessions.
+
+    python benchmarks/bench_session_memory.py [--rows 12600] [--sessions 1 50 500]
+
+Each simulated session holds what a rerun of the facility finder keeps alive:
+the facility rows for a county it picked (and, for `copy`, its own table).
+Every mode runs in a fresh interpreter; after one warm-up session, RSS is
+read before and after the sessions are created:
+
+  copy     every session parses its own object-dtype table and filters it
+           with boolean masks (the scripts before the shared store)
+  shared   one plain table per process, sessions filter it with masks
+  compact  the store's compact table plus FacilityIndex: sessions hold
+           position lists and slices of the shared table
+
+--rows 0 uses the real Dialysis-Facilities.xlsx (126 facilities).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN = """
+import gc, json, random, sys
+sys.path[:0] = [{root!r}, {bench!r}]
+import numpy as np, pandas as pd
+import facility_store, synthetic
+from facility_index import FacilityIndex
+
+def rss():
+    with open('/proc/self/status') as handle:
+        return next(int(line.split()[1]) * 1024 for line in handle if line.startswith('VmRSS'))
+
+rows, mode, sessions = {rows}, {mode!r}, {sessions}
+source = facility_store.read_workbook() if not rows else synthetic.facility_table(rows)
+plain = facility_store.expand(source)
+counties = sorted(plain['COUNTY'].unique())
+if mode == 'compact':
+    table = facility_store.compact(plain)
+    index = FacilityIndex(table)
+elif mode == 'shared':
+    table = plain
+else:
+    table = plain.astype(object)
+table_bytes = int(table.memory_usage(deep=True).sum())
+
+def session(county):
+    if mode == 'compact':
+        positions = index.search(county=county)
+        return {{'county': county, 'positions': positions, 'rows': index.rows(positions)}}
+    if mode == 'shared':
+        return {{'county': county, 'rows': table[table['COUNTY'] == county]}}
+    own = table.copy(deep=True)
+    return {{'county': county, 'data': own, 'rows': own[own['COUNTY'] == county]}}
+
+session(counties[0])  # first-call allocations aren't per-session cost
+gc.collect()
+before = rss()
+random.seed(0)
+states = [session(random.choice(counties)) for _ in range(sessions)]
+gc.collect()
+after = rss()
+print(json.dumps({{'table_bytes': table_bytes, 'rss_before': before, 'rss_after': after}}))
+"""
+
+
+def run(rows, mode, sessions):
+    script = RUN.format(root=ROOT, bench=os.path.join(ROOT, 'benchmarks'), rows=rows, mode=mode, sessions=sessions)
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=12_600, help='synthetic facilities (0: the real workbook)')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 50, 500])
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'sessions':>8} {'table':>10} {'RSS before':>11} {'RSS after':>10} {'per session':>12}")
+    for mode in ('copy', 'shared', 'compact'):
+        for sessions in args.sessions:
+            result = run(args.rows, mode, sessions)
+            per_session = (result['rss_after'] - result['rss_before']) / sessions
+            print(f"{mode:<8} {sessions:>8} {result['table_bytes'] / 1e6:>8.2f} MB {result['rss_before'] / 1e6:>8.1f} MB "
+                  f"{result['rss_after'] / 1e6:>7.1f} MB {per_session / 1e3:>9.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+What shadow evaluation costs the request path, and what it reports.
+
+    python benchmarks/bench_shadow.py [--requests 20000] [--threads 1 8] [--rate 2000]
+
+Builds a temporary model registry: trained_model.sav is the active version
+(served by the NumPy scorer, as in models/), and two candidates are
+registered next to it: the same model served by sklearn, and a logistic
+regression trained on diabetes.csv. Synthetic patients are then scored
+through the path `services.predict` takes (`cached_predict` on the registry,
+then `ShadowEvaluator.observe`), all rows distinct so the cache always
+misses, from 1 and 8 threads:
+
+  tight  each thread sends its next request as soon as the last returns
+         (saturation: the worker competes with them for the GIL)
+  paced  --rate requests/s across the threads, far above what a Streamlit
+         deployment sees, but leaving the process idle time
+
+each with shadowing
+
+  off  no SHADOW file: no worker runs and observe() returns at once
+  on   both candidates listed: every row queued for the background worker,
+       which sleeps whenever the queue is empty
+
+Reported per run: requests/s, p50/p99/max request latency, how long the
+worker took to catch up after the last request, and the rows it dropped;
+then the cost of observe() alone and the shadow report of one run.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import joblib  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from linear_model import MODEL_FILE  # noqa: E402
+from model_registry import ModelRegistry, register  # noqa: E402
+from prediction_cache import PredictionCache, cached_predict  # noqa: E402
+from shadow import SHADOW_FILE, ShadowEvaluator, write_candidates  # noqa: E402
+from synthetic import FEATURES, patient_table  # noqa: E402
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+# Registry with the served model active and two candidate versions
+def build_registry(root):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    served = register(MODEL_FILE, root, 'served')
+    sklearn_only = register(MODEL_FILE, root, 'served-sklearn')
+    sidecar = os.path.join(root, sklearn_only, 'model.json')
+    with open(sidecar) as handle:
+        metadata = json.load(handle)
+    del metadata['files']['linear']
+    with open(sidecar, 'w') as handle:
+        json.dump(metadata, handle)
+
+    data = pd.read_csv(os.path.join(ROOT, 'diabetes.csv'))
+    logistic = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+    logistic.fit(data[FEATURES], data['Outcome'])
+    path = os.path.join(root, 'logistic.sav')
+    joblib.dump(logistic, path)
+    candidate = register(path, root, 'logistic')
+
+    registry = ModelRegistry(root)
+    registry.activate(served)
+    registry.refresh()
+    return registry, [sklearn_only, candidate]
+
+
+def run(registry, evaluator, rows, threads, rate=None):
+    cache = PredictionCache(maxsize=len(rows) + 1)
+    latencies = [[] for _ in range(threads)]
+    interval = threads / rate if rate else 0.0
+    begin = time.perf_counter() + (0.1 if interval else 0.0)
+
+    def client(number):
+        samples = latencies[number]
+        due = begin + number * interval / threads
+        for row in rows[number::threads]:
+            if interval:
+                time.sleep(max(0.0, due - time.perf_counter()))
+                due += interval
+            start = time.perf_counter()
+            prediction = cached_predict(row, registry, cache)
+            evaluator.observe(row, int(prediction))
+            samples.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=client, args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - begin
+    finished = time.perf_counter()
+    evaluator.drain()
+    catch_up = time.perf_counter() - finished
+    samples = [sample for thread in latencies for sample in thread]
+    return {
+        'rate': len(samples) / elapsed,
+        'p50_us': percentile(samples, 0.5) * 1e6,
+        'p99_us': percentile(samples, 0.99) * 1e6,
+        'max_us': max(samples) * 1e6,
+        'catch_up_s': catch_up,
+    }
+
+
+# Cost of one observe() call, with no worker running so the deque only grows
+def observe_cost(registry, rows, candidates, enabled):
+    shadow_file = os.path.join(registry.root, SHADOW_FILE)
+    if enabled:
+        write_candidates(shadow_file, candidates)
+    elif os.path.exists(shadow_file):
+        os.remove(shadow_file)
+    evaluator = ShadowEvaluator(registry, path=os.devnull, maxsize=len(rows) + 1)
+    if enabled:
+        evaluator.refresh()
+    start = time.perf_counter()
+    for row in rows:
+        evaluator.observe(row, 0)
+    return (time.perf_counter() - start) / len(rows) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--rate', type=float, default=2000, help='requests/s of the paced runs')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='shadow_bench_')
+    registry, candidates = build_registry(root)
+    patients = patient_table(args.requests)[FEATURES]
+    rows = [tuple(float(value) for value in row) for row in patients.itertuples(index=False)]
+
+    print(f"{'load':<6} {'shadow':<6} {'threads':>7} {'req/s':>9} {'p50 us':>8} {'p99 us':>8} {'max us':>8} "
+          f"{'catch-up':>9} {'dropped':>8}")
+    results = {}
+    shadow_file = os.path.join(root, SHADOW_FILE)
+    for load, rate in (('tight', None), ('paced', args.rate)):
+        for mode in ('off', 'on'):
+            if mode == 'on':
+                write_candidates(shadow_file, candidates)
+            elif os.path.exists(shadow_file):
+                os.remove(shadow_file)
+            for threads in args.threads:
+                evaluator = ShadowEvaluator(registry, path=os.path.join(root, f'shadow-{load}-{mode}-{threads}.db'))
+                evaluator.refresh()
+                evaluator.start()
+                result = run(registry, evaluator, rows, threads, rate)
+                evaluator.stop()
+                results[load, mode, threads] = result
+                print(f"{load:<6} {mode:<6} {threads:>7} {result['rate']:9.0f} {result['p50_us']:8.1f} "
+                      f"{result['p99_us']:8.1f} {result['max_us']:8.0f} {result['catch_up_s']:7.2f} s "
+                      f"{evaluator.dropped:>8}", flush=True)
+        for threads in args.threads:
+            off, on = results[load, 'off', threads], results[load, 'on', threads]
+            print(f"  {load}, {threads} threads, on vs off: p50 {on['p50_us'] - off['p50_us']:+.1f} us, "
+                  f"p99 {on['p99_us'] - off['p99_us']:+.1f} us, throughput {on['rate'] / off['rate'] - 1:+.1%}")
+
+    off = statistics.median(observe_cost(registry, rows, candidates, False) for _ in range(3))
+    on = statistics.median(observe_cost(registry, rows, candidates, True) for _ in range(3))
+    print(f"observe(): {off:.0f} ns with no candidates, {on:.0f} ns queueing a row")
+
+    print()
+    from shadow import main as shadow_main
+    shadow_main(['--root', root, '--db', os.path.join(root, f'shadow-paced-on-{args.threads[0]}.db'), 'report'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Load time and peak memory of the streaming workbook reader vs. read_excel.
+
+    python benchmarks/bench_workbook_reader.py [--rows 100000] [--sheets 4] [--repeat 3]
+
+A synthetic NHIF-style workbook (title row, header row, data; split over
+several sheets) is written once, then each reader runs in a fresh interpreter:
+
+  read_excel  pd.read_excel(sheet_name=None) and a concat, as the store used to
+  stream      facility_store.read_workbook (openpyxl read-only, chunked)
+  chunks      facility_store.iter_workbook, dropping every chunk (the bound
+              for a consumer that doesn't keep the whole table)
+
+Peak RSS is reported above the interpreter's RSS once pandas and openpyxl are
+imported, so it is the cost of the load itself.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import facility_table, write_facility_workbook  # noqa: E402
+
+READERS = {
+    'read_excel': "data = pd.concat(pd.read_excel(path, sheet_name=None, header=None).values())",
+    'stream': "data = facility_store.read_workbook(path)",
+    'chunks': "data = sum(len(chunk) for chunk in facility_store.iter_workbook(path))",
+}
+
+RUN = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import openpyxl, pandas as pd, facility_store
+path = {path!r}
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': seconds, 'peak_mb': (peak - base) / 1024, 'rows': len(data) if hasattr(data, '__len__') else data}}))
+"""
+
+
+def run(reader, path):
+    script = RUN.format(root=ROOT, path=path, statement=READERS[reader])
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--sheets', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workbook', help='reuse this workbook instead of generating one')
+    args = parser.parse_args()
+
+    path = args.workbook
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f'nhif_facilities_{args.rows}x{args.sheets}.xlsx')
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            write_facility_workbook(facility_table(args.rows), path, sheets=args.sheets)
+            print(f"wrote {path} in {time.perf_counter() - start:.1f} s")
+    print(f"{os.path.getsize(path) / 1e6:.1f} MB workbook, {args.rows} rows over {args.sheets} sheets")
+
+    for reader in READERS:
+        samples = [run(reader, path) for _ in range(args.repeat)]
+        print(f"{reader:<11} {statistics.median(s['seconds'] for s in samples):7.2f} s   "
+              f"peak +{statistics.median(s['peak_mb'] for s in samples):7.1f} MB   rows {samples[0]['rows']}")
+
+
+if __name__ == "__main__":
+    main()
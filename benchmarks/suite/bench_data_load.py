@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""load_data(): openpyxl parse, columnar snapshot and in-memory copy."""
+
+import shutil
+
+import facility_store
+
+
+def bench_read_workbook(benchmark, facility_workbook):
+    benchmark.group = 'load_data'
+    benchmark.pedantic(facility_store.read_workbook, args=(facility_workbook,), rounds=3, iterations=1)
+
+
+def bench_load_data_snapshot(benchmark, facility_workbook, tmp_path):
+    benchmark.group = 'load_data'
+    snapshot_dir = str(tmp_path / 'snapshot')
+    facility_store.clear_memory_cache()
+    facility_store.load_data(facility_workbook, snapshot_dir=snapshot_dir)
+
+    def load():
+        facility_store.clear_memory_cache()
+        return facility_store.load_data(facility_workbook, snapshot_dir=snapshot_dir)
+
+    benchmark(load)
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def bench_load_data_warm(benchmark, facility_workbook, tmp_path):
+    benchmark.group = 'load_data'
+    facility_store.load_data(facility_workbook, snapshot_dir=str(tmp_path / 'snapshot'))
+    benchmark(facility_store.load_data, facility_workbook)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""MIME construction in services.send_result_email, with the outbox stubbed out."""
+
+import services
+
+
+def bench_thank_you_email(benchmark, stub_outbox):
+    benchmark.group = 'email'
+    benchmark(services.send_result_email, 'Jane Doe', 'jane@gmail.com', 'Diabetic')
+    assert stub_outbox.messages
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""County filter and name/office search: the apps' old pandas paths vs. the indexes."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic
+from facility_index import FacilityIndex
+from facility_ingest import apply_changes, diff_tables
+
+COUNTY = 'NAIROBI'
+NAME_QUERY = 'kenyatta'
+OFFICE_QUERY = 'nairob'
+
+
+@pytest.fixture(scope='session')
+def index(facilities):
+    return FacilityIndex(facilities)
+
+
+def bench_county_filter_mask(benchmark, facilities):
+    benchmark.group = 'county filter'
+
+    def run():
+        counties = sorted(facilities['COUNTY'].unique())
+        return counties, facilities[facilities['COUNTY'] == COUNTY]
+
+    benchmark(run)
+
+
+def bench_county_filter_index(benchmark, index):
+    benchmark.group = 'county filter'
+    benchmark(lambda: (index.counties, index.rows(index.filter(county=COUNTY))))
+
+
+def bench_search_str_contains(benchmark, facilities):
+    benchmark.group = 'search'
+
+    def run():
+        found = facilities[facilities['COUNTY'] == COUNTY]
+        found = found[found['NHIF_OFFICE'].str.contains(OFFICE_QUERY, case=False, na=False)]
+        return found[found['HOSPITAL_NAME'].str.contains(NAME_QUERY, case=False, na=False)]
+
+    benchmark(run)
+
+
+def bench_search_trigram(benchmark, index):
+    benchmark.group = 'search'
+    benchmark(lambda: index.rows(index.search(county=COUNTY, office_query=OFFICE_QUERY, name_query=NAME_QUERY)))
+
+
+def bench_build_index(benchmark, facilities):
+    benchmark.group = 'index build'
+    benchmark.pedantic(FacilityIndex, args=(facilities,), rounds=3, iterations=1)
+
+
+# A revised sheet with 1% of the facilities deleted, 1% renamed and 1% new
+@pytest.fixture(scope='session')
+def revision(facilities):
+    rng = np.random.default_rng(0)
+    churn = max(1, len(facilities) // 100)
+    revised = facilities.drop(facilities.index[rng.choice(len(facilities), churn, replace=False)])
+    renamed = rng.choice(len(revised), churn, replace=False)
+    revised.iloc[renamed, 3] = revised['HOSPITAL_NAME'].iloc[renamed] + ' ANNEX'
+    added = synthetic.facility_table(churn, seed=1)
+    added['NHIF_HOSPITAL_CODE'] += len(facilities)
+    change = diff_tables(facilities, pd.concat([revised, added], ignore_index=True))
+    return change, apply_changes(facilities, change)
+
+
+def bench_rebuild_index_after_revision(benchmark, revision):
+    benchmark.group = 'index update'
+    benchmark.pedantic(FacilityIndex, args=(revision[1],), rounds=3, iterations=1)
+
+
+def bench_update_index_after_revision(benchmark, index, revision):
+    benchmark.group = 'index update'
+    change, data = revision
+    benchmark.pedantic(index.updated, args=(data, [change]), rounds=3, iterations=1)
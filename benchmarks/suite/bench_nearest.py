@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""k nearest facilities to a point: KD-tree vs. a haversine scan of every facility."""
+
+import pytest
+
+import synthetic
+from facility_geo import GeoIndex
+
+POINT = (-0.4201, 36.9476)  # Nyeri
+K = 5
+
+
+@pytest.fixture(scope='session')
+def coordinates(facilities):
+    return synthetic.facility_coordinates(facilities)
+
+
+@pytest.fixture(scope='session')
+def geo_index(facilities, coordinates):
+    return GeoIndex(facilities, coordinates=coordinates)
+
+
+def bench_nearest_brute(benchmark, geo_index):
+    benchmark.group = 'nearest facilities'
+    benchmark(geo_index.nearest_brute, *POINT, K)
+
+
+def bench_nearest_tree(benchmark, geo_index):
+    benchmark.group = 'nearest facilities'
+    benchmark(geo_index.nearest, *POINT, K)
+
+
+def bench_geo_index_build(benchmark, facilities, coordinates):
+    benchmark.group = 'nearest facilities: build'
+    benchmark.pedantic(GeoIndex, args=(facilities,), kwargs={'coordinates': coordinates}, rounds=3)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Full-script reruns through Streamlit's AppTest.
+
+The facility table is swapped for the scaled synthetic one, emails go to a
+stub outbox and the 2 s spinner sleep is skipped, so the numbers show the
+cost of the script itself.
+"""
+
+import os
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import facility_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PATIENT = ['6', '148', '72', '35', '0', '33.6', '0.627']
+
+
+@pytest.fixture
+def scaled_store(monkeypatch, facilities):
+    monkeypatch.setattr(facility_index, 'load_data', lambda: facilities)
+
+
+def app(script):
+    return AppTest.from_file(os.path.join(ROOT, script), default_timeout=120)
+
+
+def bench_hospital_predict_rerun(benchmark, scaled_store, stub_outbox, monkeypatch):
+    benchmark.group = 'page rerun'
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    at = app('app.py').run()
+    at.text_input[0].input('Jane')
+    at.text_input[1].input('jane@gmail.com')
+    at.run()
+    for field, value in zip(at.text_input[2:9], PATIENT):
+        field.input(value)
+    at.slider[0].set_value(50)
+    at.run()
+
+    def predict():
+        at.button[0].click()
+        return at.run()
+
+    benchmark(predict)
+    assert not at.exception
+
+
+def bench_dialysis_county_and_search(benchmark, scaled_store):
+    benchmark.group = 'page rerun'
+    at = app('app.py').switch_page('app_pages/facility_finder.py').run()
+    counties = at.sidebar.selectbox[0].options
+
+    def interact():
+        at.sidebar.selectbox[0].select(counties[len(counties) // 2])
+        at.sidebar.text_input[0].input('hospital')
+        at.run()
+        at.sidebar.text_input[0].input('')
+        return at.run()
+
+    benchmark(interact)
+    assert not at.exception
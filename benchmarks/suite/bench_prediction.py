@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Single-row and batch predict on trained_model.sav, its NumPy export and the prediction cache,
+and the batch explanation (per-feature contributions) of the NumPy export."""
+
+ROW = [6.0, 148.0, 72.0, 35.0, 0.0, 33.6, 0.627, 50]
+
+
+def bench_predict_single_sklearn(benchmark, sklearn_model):
+    benchmark.group = 'predict single row'
+    benchmark(sklearn_model.predict, [ROW])
+
+
+def bench_predict_single_linear(benchmark, linear_scorer):
+    benchmark.group = 'predict single row'
+    benchmark(linear_scorer.predict, [ROW])
+
+
+def bench_predict_batch_sklearn(benchmark, sklearn_model, patients):
+    benchmark.group = 'predict batch'
+    benchmark(sklearn_model.predict, patients)
+
+
+def bench_predict_batch_linear(benchmark, linear_scorer, patients):
+    benchmark.group = 'predict batch'
+    benchmark(linear_scorer.predict, patients)
+
+
+def bench_predict_single_cached_hit(benchmark):
+    from prediction_cache import cached_predict
+    benchmark.group = 'predict single row'
+    cached_predict(ROW)
+    benchmark(cached_predict, ROW)
+
+
+def bench_explain_batch_linear(benchmark, linear_scorer, patients):
+    from explanations import explain_frame
+    benchmark.group = 'predict batch'
+    benchmark(explain_frame, patients, linear_scorer)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures for the benchmark suite.
+
+Data-dependent benchmarks run once per scale factor (--scales, default
+1,10,100,1000). Scale 1 is the size of the real data: 126 facilities and 768
+patients. Larger scales use the synthetic generators in benchmarks/synthetic.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+SUITE_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.dirname(SUITE_DIR)
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [ROOT, BENCH_DIR]
+
+import synthetic  # noqa: E402
+
+FACILITY_ROWS = 126
+PATIENT_ROWS = 768
+
+
+def pytest_addoption(parser):
+    parser.addoption('--scales', default='1,10,100,1000',
+                     help='comma-separated data scale factors (default: 1,10,100,1000)')
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(value) for value in metafunc.config.getoption('scales').split(',')]
+        metafunc.parametrize('scale', scales, scope='session')
+
+
+# The apps open files relative to the working directory
+@pytest.fixture(autouse=True, scope='session')
+def in_repo_root():
+    previous = os.getcwd()
+    os.chdir(ROOT)
+    yield
+    os.chdir(previous)
+
+
+@pytest.fixture(scope='session')
+def facilities(scale):
+    return synthetic.facility_table(FACILITY_ROWS * scale)
+
+
+@pytest.fixture(scope='session')
+def facility_workbook(facilities, scale, tmp_path_factory):
+    path = tmp_path_factory.mktemp(f'workbook-{scale}') / 'Dialysis-Facilities.xlsx'
+    return str(synthetic.write_facility_workbook(facilities, path))
+
+
+@pytest.fixture(scope='session')
+def patients(scale):
+    return synthetic.patient_table(PATIENT_ROWS * scale)
+
+
+# The pickled estimator of the active version; load_model() on its own would
+# return the NumPy export the apps serve
+@pytest.fixture(scope='session')
+def sklearn_model():
+    import batch_scoring
+    from model_registry import active_artifact
+    return batch_scoring.load_model(active_artifact('model') or batch_scoring.MODEL_FILE)
+
+
+@pytest.fixture(scope='session')
+def linear_scorer():
+    import linear_model
+    return linear_model.load_scorer()
+
+
+# Queueing emails must not reach a real SMTP server from a benchmark
+class StubOutbox:
+
+    def __init__(self):
+        self.messages = []
+
+    def enqueue(self, sender, recipient, body):
+        self.messages.append(body)
+        return len(self.messages)
+
+
+@pytest.fixture
+def stub_outbox(monkeypatch):
+    import email_outbox
+    outbox = StubOutbox()
+    monkeypatch.setattr(email_outbox, 'get_outbox', lambda *args, **kwargs: outbox)
+    monkeypatch.setattr(email_outbox, 'message_status', lambda *args, **kwargs: {'status': 'queued'})
+    return outbox
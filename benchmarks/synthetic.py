@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic data generators for the benchmarks.
+
+Facility tables are built from the vocabulary of the real NHIF sheet so that
+names, offices and counties look like the production data at any size.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COUNTIES = ['BARINGO', 'BOMET', 'BUNGOMA', 'BUSIA', 'ELGEYO MARAKWET', 'EMBU', 'GARISSA', 'HOMA BAY',
+            'ISIOLO', 'KAJIADO', 'KAKAMEGA', 'KERICHO', 'KIAMBU', 'KILIFI', 'KIRINYAGA', 'KISII',
+            'KISUMU', 'KITUI', 'KWALE', 'LAIKIPIA', 'LAMU', 'MACHAKOS', 'MAKUENI', 'MANDERA',
+            'MARSABIT', 'MERU', 'MIGORI', 'MOMBASA', "MURANG'A", 'NAIROBI', 'NAKURU', 'NANDI',
+            'NAROK', 'NYAMIRA', 'NYANDARUA', 'NYERI', 'SAMBURU', 'SIAYA', 'TAITA TAVETA',
+            'TANA RIVER', 'THARAKA NITHI', 'TRANS NZOIA', 'TURKANA', 'UASIN GISHU', 'VIHIGA',
+            'WAJIR', 'WEST POKOT']
+NAME_WORDS = ['ST', 'MARY', 'JOSEPH', 'MISSION', 'COUNTY', 'REFERRAL', 'DISTRICT', 'MEDICAL',
+              'NURSING', 'HOME', 'CENTRE', 'FAMILY', 'CARE', 'KENYATTA', 'NATIONAL', 'AGA', 'KHAN',
+              'MATER', 'MISERICORDIAE', 'CONSOLATA', 'ADVENTIST', 'METROPOLITAN', 'JAMAA', 'KIJABE',
+              'TENWEK', 'MARIAKANI', 'PCEA', 'ACK', 'AIC', 'CHRISTIAN', 'AFYA', 'UZIMA', 'NEEMA']
+SUFFIXES = ['HOSPITAL', 'MEDICAL CENTRE', 'NURSING HOME', 'HEALTH CENTRE', 'DIALYSIS CENTRE',
+            'RENAL UNIT', 'HOSPITAL LTD']
+
+# Column order of diabetes.csv
+FEATURES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI',
+            'DiabetesPedigreeFunction', 'Age']
+
+
+# Facility table in the facility store's schema with `rows` rows
+def facility_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    counties = np.asarray(COUNTIES, dtype=object)[rng.integers(len(COUNTIES), size=rows)]
+    words = np.asarray(NAME_WORDS, dtype=object)
+    suffixes = np.asarray(SUFFIXES, dtype=object)
+    first = words[rng.integers(len(words), size=rows)]
+    second = words[rng.integers(len(words), size=rows)]
+    suffix = suffixes[rng.integers(len(suffixes), size=rows)]
+    names = [f"{a} {b} {s} {c}-{i}" for i, (a, b, s, c) in enumerate(zip(first, second, suffix, counties))]
+    offices = [f"{c[:6]} {rng.integers(1, 4)}".strip() for c in counties]
+    return pd.DataFrame({
+        'COUNTY': counties,
+        'NHIF_OFFICE': offices,
+        'NHIF_HOSPITAL_CODE': np.arange(1_000_000, 1_000_000 + rows),
+        'HOSPITAL_NAME': names,
+    }, index=pd.RangeIndex(1, rows + 1))
+
+
+# Coordinates for a facility table in the facility_coordinates.csv schema:
+# every facility scattered around its county headquarters
+def facility_coordinates(data, seed=0, spread=0.3):
+    centroids = pd.read_csv(os.path.join(ROOT, 'county_centroids.csv')).set_index('NAME')
+    rng = np.random.default_rng(seed)
+    base = centroids.loc[data['COUNTY'].str.upper(), ['LATITUDE', 'LONGITUDE']].to_numpy()
+    points = base + rng.normal(scale=spread, size=base.shape)
+    return dict(zip(data['NHIF_HOSPITAL_CODE'], map(tuple, points)))
+
+
+# Patient table in the diabetes.csv schema, resampled from the real file
+def patient_table(rows, source=None, seed=0, with_outcome=False):
+    base = pd.read_csv(source or os.path.join(ROOT, 'diabetes.csv'))
+    rng = np.random.default_rng(seed)
+    sample = base.iloc[rng.integers(len(base), size=rows)].reset_index(drop=True)
+    return sample if with_outcome else sample[FEATURES]
+
+
+# Write a facility table as an NHIF-style workbook: a title row, the old
+# header row and then the data, which is what facility_store.read_workbook
+# expects. With sheets > 1 the rows are split across that many sheets.
+def write_facility_workbook(data, path, sheets=1):
+    header = pd.DataFrame([['COUNTY', 'NHIF OFFICE', 'NHIF HOSPITAL CODE', 'HOSPITAL NAME']], columns=data.columns)
+    with pd.ExcelWriter(path) as writer:
+        for number, part in enumerate(np.array_split(np.arange(len(data)), sheets), 1):
+            sheet = pd.concat([header, data.iloc[part]], ignore_index=True)
+            sheet.columns = ['COMPREHENSIVE DIALYSIS HOSPITALS', '', ' ', '  ']
+            sheet.to_excel(writer, sheet_name=f'Table {number}', index=False)
+    return path
+
+
+# Screening cohort for campaign.py: Name, Email, County and the features
+def cohort_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    cohort = patient_table(rows, seed=seed)
+    cohort.insert(0, 'Name', [f"Patient {number}" for number in range(rows)])
+    cohort.insert(1, 'Email', [f"patient{number}@example.com" for number in range(rows)])
+    cohort.insert(2, 'County', np.asarray(COUNTIES, dtype=object)[rng.integers(len(COUNTIES), size=rows)])
+    return cohort
+
+
+# Patient CSV in the diabetes.csv schema with `rows` rows
+def write_patient_csv(rows, path, seed=0):
+    patient_table(rows, seed=seed).to_csv(path, index=False)
+    return path
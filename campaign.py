@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk screening campaigns: score a cohort and email every result.
+
+    SMTP_PASSWORD=... python campaign.py cohort.csv --sender clinic@gmail.com \\
+        [--host smtp.gmail.com --port 587 --username clinic@gmail.com] [--rate 5] [--render-workers 4]
+
+The cohort is a CSV with Name, Email and the eight diabetes.csv feature
+columns, plus optionally County (or Latitude and Longitude) so positives can
+be sent the nearest dialysis facilities. The whole file is scored in one
+vectorized call; rows with a missing or non-numeric feature are not scored or
+emailed but marked failed in the checkpoint and listed. The email template is
+rendered once and only personalized per row, MIME messages are built in a
+process pool, and everything goes out over one SMTP connection, optionally
+rate limited. A permanent SMTP error (refused address, 5xx reply) marks the
+row failed; any other error stops the run. Every send is appended to a
+checkpoint file (cohort.csv.sent by default); running the same command again
+resumes where it stopped.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from html import escape
+
+import pandas as pd
+
+from batch_scoring import invalid_features, score_frame
+from email_outbox import SMTPConfig, SMTPConnection, is_permanent_error
+from features import FEATURES, LABELS
+
+SUBJECT = "Your Diabetes Screening Result"
+WEBAPP_URL = "https://diabetespredictionsystem-by-akshay.streamlit.app/"
+BANNER_URL = 'https://d2jx2rerrg6sh3.cloudfront.net/images/Article_Images/ImageForArticle_22744_16565132428524067.jpg'
+TIPS = """<p><strong><u>Tips for Diabetic Patients:</u></strong></p><ol>...</ol><p><strong><u>Tips for Diabetes Prevention:</u></strong></p><ol>...</ol>"""
+CHUNK = 1000  # rows rendered per batch handed to the pool
+
+
+# The result email, split around its personalized parts once so that each
+# message only costs a few string joins
+class EmailTemplate:
+
+    def __init__(self, sender_name, sender_email, subject=SUBJECT, signature="The Screening Team"):
+        self.sender = f"{sender_name} <{sender_email}>"
+        self.sender_email = sender_email
+        self.subject = subject
+        self._head = "Dear "
+        self._result = ",<br><br>Thank you for taking part in our diabetes screening.<br><br><b>Test Result:</b> "
+        self._tail = (f"""<img src="{BANNER_URL}" alt="Banner Image" style="max-width: 100%; height: auto; """
+                      f"""margin-top: 20px;">{TIPS}<br><br>WebApp URL: {WEBAPP_URL}<br><br><br>"""
+                      f"""Best regards,<br>{escape(signature)}""")
+        self._diagnoses = {
+            label: f"<b style='color:{'red' if label == 'Diabetic' else 'green'}'>{label}</b>"
+            for label in LABELS.values()
+        }
+
+    def body(self, name, diagnosis, facilities=''):
+        return ''.join((self._head, escape(name), self._result, self._diagnoses[diagnosis], facilities, self._tail))
+
+    def message(self, name, email, diagnosis, facilities=''):
+        message = MIMEMultipart()
+        message["From"] = self.sender
+        message["To"] = email
+        message["Subject"] = self.subject
+        message.attach(MIMEText(self.body(name, diagnosis, facilities), "html"))
+        return message.as_string()
+
+
+def facilities_html(rows):
+    if rows.empty:
+        return ''
+    items = ''.join(f"<li>{escape(str(name))} ({escape(str(county))}, {distance:.0f} km)</li>"
+                    for name, county, distance in zip(rows['HOSPITAL_NAME'], rows['COUNTY'], rows['DISTANCE_KM']))
+    return f"<p><strong><u>Dialysis facilities near you:</u></strong></p><ol>{items}</ol>"
+
+
+# Nearest-facility HTML for every positive row that has a location; one tree
+# query per distinct county or coordinate pair
+def nearest_facilities(cohort, positive, k=3, geo=None):
+    blocks = pd.Series('', index=cohort.index, dtype=object)
+    has_coordinates = {'Latitude', 'Longitude'} <= set(cohort.columns)
+    if not positive.any() or not (has_coordinates or 'County' in cohort.columns):
+        return blocks
+    if geo is None:
+        from facility_geo import load_geo_index
+        geo = load_geo_index()
+
+    found = {}
+    for label in cohort.index[positive]:
+        point = None
+        if has_coordinates and pd.notna(cohort.at[label, 'Latitude']) and pd.notna(cohort.at[label, 'Longitude']):
+            point = (float(cohort.at[label, 'Latitude']), float(cohort.at[label, 'Longitude']))
+        elif 'County' in cohort.columns and pd.notna(cohort.at[label, 'County']):
+            point = geo.locate(cohort.at[label, 'County'])
+        if point is None:
+            continue
+        if point not in found:
+            found[point] = facilities_html(geo.nearest_rows(*point, k=k))
+        blocks.at[label] = found[point]
+    return blocks
+
+
+# Worker entry point: a list of (key, name, email, diagnosis, facilities) to (key, email, MIME text)
+def _render(template, jobs):
+    return [(key, email, template.message(name, email, diagnosis, facilities))
+            for key, name, email, diagnosis, facilities in jobs]
+
+
+# Appends one line per finished row, so a rerun skips what is already done
+class Checkpoint:
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as handle:
+                self.done = {line.split('\t', 1)[0] for line in handle if line.strip()}
+        self._handle = open(path, 'a')
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark(self, key, status, detail=''):
+        self._handle.write(f"{key}\t{status}\t{detail}\n")
+        self._handle.flush()
+        self.done.add(key)
+
+    def close(self):
+        self._handle.close()
+
+
+# At most `rate` calls per second, evenly spaced
+class RateLimiter:
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_campaign(cohort_path, config, template, checkpoint_path=None, rate=None, render_workers=0,
+                 model=None, nearest=3, limit=None, log=print):
+    if model is None:
+        from model_registry import get_registry
+        model = get_registry().model()
+
+    start = time.perf_counter()
+    cohort = pd.read_csv(cohort_path)
+    missing = [column for column in ('Name', 'Email') if column not in cohort.columns]
+    if missing:
+        raise ValueError(f"Missing cohort columns: {', '.join(missing)}")
+    missing = [column for column in FEATURES if column not in cohort.columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+
+    # A blank or mistyped value must not be scored as if it were a number
+    problems = invalid_features(cohort)
+    valid = problems == ''
+    predictions = pd.Series(-1, index=cohort.index)
+    if valid.any():
+        predictions[valid] = score_frame(model, cohort[valid])
+    diagnoses = predictions.map(LABELS)
+    facilities = nearest_facilities(cohort, predictions == 1, k=nearest) if nearest else \
+        pd.Series('', index=cohort.index, dtype=object)
+    scored = time.perf_counter()
+
+    checkpoint = Checkpoint(checkpoint_path or cohort_path + '.sent')
+    jobs = [(f"{number}:{email}", str(name), str(email), diagnosis, block)
+            for number, name, email, diagnosis, block in zip(range(len(cohort)), cohort['Name'], cohort['Email'],
+                                                               diagnoses, facilities)]
+    stats = {'rows': len(cohort), 'positives': int((predictions == 1).sum()), 'invalid': int((~valid).sum()),
+             'sent': 0, 'failed': 0}
+    for job, problem in zip(jobs, problems):
+        if problem and job[0] not in checkpoint:
+            checkpoint.mark(job[0], 'failed', f"invalid features: {problem}")
+            stats['failed'] += 1
+            log(f"Not sent to row {job[0]}: invalid {problem}")
+    pending = [job for job, ok in zip(jobs, valid) if ok and job[0] not in checkpoint]
+    if limit is not None:
+        pending = pending[:limit]
+    stats['skipped'] = int(valid.sum()) - len(pending)
+
+    connection = SMTPConnection(config)
+    limiter = RateLimiter(rate)
+    pool = ProcessPoolExecutor(render_workers) if render_workers > 1 else None
+    try:
+        chunks = list(_chunks(pending, CHUNK))
+        if pool is not None:
+            rendered = (message for batch in pool.map(_render, [template] * len(chunks), chunks) for message in batch)
+        else:
+            rendered = (message for chunk in chunks for message in _render(template, chunk))
+        for key, email, text in rendered:
+            limiter.wait()
+            try:
+                connection.send(template.sender_email, email, text)
+            except Exception as error:
+                if not is_permanent_error(error):
+                    raise  # stop here; the checkpoint lets a rerun resume
+                checkpoint.mark(key, 'failed', repr(error))
+                stats['failed'] += 1
+            else:
+                checkpoint.mark(key, 'sent')
+                stats['sent'] += 1
+    finally:
+        connection.close()
+        checkpoint.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    stats.update({
+        'score_seconds': scored - start,
+        'seconds': seconds,
+        'messages_per_sec': stats['sent'] / (seconds - (scored - start)) if stats['sent'] else 0.0,
+    })
+    log(f"Scored {stats['rows'] - stats['invalid']} rows ({stats['positives']} positive, "
+        f"{stats['invalid']} with invalid features) in {stats['score_seconds']:.2f} s; "
+        f"sent {stats['sent']}, failed {stats['failed']}, skipped {stats['skipped']} already done; "
+        f"{stats['messages_per_sec']:.0f} messages/sec")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cohort', help='CSV with Name, Email and the diabetes.csv feature columns')
+    parser.add_argument('--sender', required=True, help='From address')
+    parser.add_argument('--sender-name', default='Diabetes Screening')
+    parser.add_argument('--host', default='smtp.gmail.com')
+    parser.add_argument('--port', type=int, default=587)
+    parser.add_argument('--username', help='SMTP login (default: --sender); password from $SMTP_PASSWORD')
+    parser.add_argument('--no-starttls', action='store_true')
+    parser.add_argument('--rate', type=float, default=None, help='maximum messages per second')
+    parser.add_argument('--render-workers', type=int, default=os.cpu_count() or 1,
+                        help='processes building MIME messages (1: in the sending process)')
+    parser.add_argument('--checkpoint', help='progress file (default: <cohort>.sent)')
+    parser.add_argument('--nearest', type=int, default=3, help='facilities listed for positives (0: none)')
+    parser.add_argument('--limit', type=int, help='send at most this many messages in this run')
+    args = parser.parse_args(argv)
+
+    username = args.username or args.sender
+    password = os.environ.get('SMTP_PASSWORD')
+    config = SMTPConfig(args.host, args.port, username if password else None, password, not args.no_starttls)
+    template = EmailTemplate(args.sender_name, args.sender)
+    run_campaign(args.cohort, config, template, args.checkpoint, args.rate, args.render_workers,
+                 nearest=args.nearest, limit=args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Background email outbox.
+
+Messages are written to a SQLite queue and sent by worker threads that keep
+one authenticated SMTP connection open each, so the Predict handler only pays
+for an insert. Failed sends are retried with exponential backoff; every
+message has a status (queued, sending, sent, failed) the UI can poll.
+Claims are leased, so several processes can share the queue (see
+sqlite_queue.py).
+"""
+
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+
+from sqlite_queue import LEASE, SENDING, LeaseQueue  # noqa: F401 (SENDING: a message's status)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTBOX_FILE = os.path.join(BASE_DIR, '.outbox', 'outbox.db')
+
+QUEUED = 'queued'
+SENT = 'sent'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    sent REAL,
+    claimed_by TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS messages_due ON messages (account, status, next_attempt);
+"""
+
+
+class SMTPConfig:
+
+    def __init__(self, host, port, username=None, password=None, starttls=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def key(self):
+        return self.host, self.port, self.username, self.starttls
+
+    # Messages are only ever sent through the account they were queued for
+    def account(self):
+        return f"{self.username or ''}@{self.host}:{self.port}"
+
+
+# One SMTP session that is opened on first use and reused until it breaks
+class SMTPConnection:
+
+    def __init__(self, config, idle_check=60):
+        self.config = config
+        self.idle_check = idle_check
+        self._server = None
+        self._last_used = 0.0
+
+    def _open(self):
+        server = smtplib.SMTP(self.config.host, self.config.port, timeout=self.config.timeout)
+        try:
+            if self.config.starttls:
+                server.starttls()
+            if self.config.username:
+                server.login(self.config.username, self.config.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _alive(self):
+        if time.monotonic() - self._last_used < self.idle_check:
+            return True
+        try:
+            return self._server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def send(self, sender, recipient, body):
+        if self._server is not None and not self._alive():
+            self.close()
+        if self._server is None:
+            self._server = self._open()
+        try:
+            self._server.sendmail(sender, recipient, body)
+        except smtplib.SMTPServerDisconnected:
+            self._reconnect_and_send(sender, recipient, body)
+        except smtplib.SMTPException:
+            # The server answered (refused recipient, bad auth, 4xx/5xx reply):
+            # a new connection would get the same answer, so the caller decides
+            raise
+        except OSError:
+            # Socket-level failure (reset, broken pipe, timeout)
+            self._reconnect_and_send(sender, recipient, body)
+        self._last_used = time.monotonic()
+
+    # The server dropped an idle connection: reconnect once
+    def _reconnect_and_send(self, sender, recipient, body):
+        self.close()
+        self._server = self._open()
+        self._server.sendmail(sender, recipient, body)
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._server.close()
+            self._server = None
+
+
+# Errors that will not go away by retrying
+def is_permanent_error(error):
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    return False
+
+
+class Outbox(LeaseQueue):
+
+    table = 'messages'
+    scope_column = 'account'
+    schema = _SCHEMA
+    waiting = QUEUED
+    claim_columns = ('sender', 'recipient', 'body')
+
+    def __init__(self, config, path=OUTBOX_FILE, workers=1, max_attempts=5, backoff=2.0, max_backoff=300.0,
+                 lease=LEASE):
+        self.config = config
+        self.account = config.account()
+        self.workers = workers
+        self._threads = []
+        super().__init__(path, self.account, max_attempts, backoff, max_backoff, lease)
+
+    # Queue a rendered message; returns its id for status polling
+    def enqueue(self, sender, recipient, body):
+        now = time.time()
+        with self._db() as db:
+            cursor = db.execute(
+                "INSERT INTO messages (account, sender, recipient, body, status, next_attempt, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (self.account, sender, recipient, body, QUEUED, now, now))
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def status(self, message_id):
+        return _status(self._db(), message_id)
+
+    def _finish(self, message_id, attempts, error=None):
+        with self._db() as db:
+            if error is None:
+                self._release(db, message_id, SENT, attempts=attempts, sent=time.time(), last_error=None)
+            elif attempts >= self.max_attempts or is_permanent_error(error):
+                self._release(db, message_id, FAILED, attempts=attempts, last_error=repr(error))
+            else:
+                self._retry(db, message_id, attempts, repr(error))
+
+    def _work(self):
+        connection = SMTPConnection(self.config)
+        try:
+            while not self._stopping.is_set():
+                claimed = self._claim()
+                if not claimed:
+                    self._wakeup.wait(self._idle_timeout())
+                    self._wakeup.clear()
+                    continue
+
+                message_id, sender, recipient, body, attempts = claimed[0]
+                try:
+                    connection.send(sender, recipient, body)
+                except Exception as error:
+                    connection.close()
+                    self._finish(message_id, attempts + 1, error)
+                else:
+                    self._finish(message_id, attempts + 1)
+        finally:
+            connection.close()
+
+    def start(self):
+        if self._threads:
+            return self
+        self._stopping.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'outbox-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+def _status(db, message_id):
+    row = db.execute("SELECT status, attempts, last_error, created, sent FROM messages WHERE id = ?",
+                     (message_id,)).fetchone()
+    if row is None:
+        return None
+    return dict(zip(('status', 'attempts', 'last_error', 'created', 'sent'), row))
+
+
+# Status of a queued message without needing the outbox (or its credentials)
+def message_status(message_id, path=OUTBOX_FILE):
+    if not os.path.exists(path):
+        return None
+    db = sqlite3.connect(path, timeout=30)
+    try:
+        return _status(db, message_id)
+    finally:
+        db.close()
+
+
+_lock = threading.Lock()
+_outboxes = {}
+
+
+# Process-wide outbox for an SMTP account, started on first use
+def get_outbox(host, port, username=None, password=None, starttls=True, path=OUTBOX_FILE, workers=1):
+    config = SMTPConfig(host, port, username, password, starttls)
+    key = config.key() + (os.path.abspath(path),)
+    with _lock:
+        outbox = _outboxes.get(key)
+        if outbox is None:
+            outbox = _outboxes[key] = Outbox(config, path=path, workers=workers).start()
+        return outbox
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Per-feature explanations of diabetes predictions.
+
+The model is linear, so its decision value w . x + b splits exactly into the
+value for an average patient (the diabetes.csv means) plus one signed term
+w_i * (x_i - mean_i) per feature. Positive terms push towards Diabetic. A
+batch is explained with one elementwise product, whatever its size; files
+are streamed through batch_scoring.py:
+
+    python batch_scoring.py patients.csv explained.csv --explain
+
+Sklearn pipelines of StandardScalers and a linear model are folded into a
+LinearScorer once per model object; models that aren't linear have no
+explanation (None).
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURES, LABELS
+from linear_model import DATA_FILE, LinearScorer
+
+_lock = threading.Lock()
+_references = {}
+_cached = None  # (model, LinearScorer or None)
+
+
+# Mean of every feature over a labelled CSV (diabetes.csv by default), read once
+def load_reference(path=DATA_FILE):
+    reference = _references.get(path)
+    if reference is None:
+        reference = _references[path] = pd.read_csv(path)[FEATURES].mean().to_numpy(dtype=np.float64)
+    return reference
+
+
+# LinearScorer equivalent to the model, or None when the model isn't linear
+def linear_scorer(model):
+    global _cached
+    if isinstance(model, LinearScorer):
+        return model
+    cached = _cached
+    if cached is not None and cached[0] is model:
+        return cached[1]
+    with _lock:
+        try:
+            scorer = LinearScorer.from_estimator(model)
+        except (AttributeError, ValueError):
+            scorer = None
+        _cached = (model, scorer)
+        return scorer
+
+
+def _active_model():
+    from model_registry import get_registry
+    return get_registry().model()
+
+
+# Explanation of one feature row: the margin (above 0 means Diabetic), the
+# average patient's margin and each feature's value and signed contribution,
+# largest effect first. None when the model isn't linear.
+def explain(features, model=None):
+    scorer = linear_scorer(_active_model() if model is None else model)
+    if scorer is None:
+        return None
+    reference = load_reference()
+    contributions, margins = scorer.explain([features], reference)
+    names = [str(name) for name in scorer.feature_names_in_]
+    order = np.argsort(-np.abs(contributions[0]), kind='stable')
+    return {
+        'margin': float(margins[0]),
+        'baseline': float(scorer.decision_function(reference)[0]),
+        'diagnosis': LABELS[int(margins[0] > 0)],
+        'features': [(names[i], float(features[i]), float(contributions[0, i])) for i in order.tolist()],
+    }
+
+
+# Contribution columns (<feature>_contribution) and Margin for every row of a
+# DataFrame holding the feature columns, or None when the model isn't linear
+def explain_frame(frame, model=None):
+    scorer = linear_scorer(_active_model() if model is None else model)
+    if scorer is None:
+        return None
+    contributions, margins = scorer.explain(frame[FEATURES].to_numpy(dtype=np.float64), load_reference())
+    columns = [f'{name}_contribution' for name in FEATURES]
+    explained = pd.DataFrame(contributions, columns=columns, index=frame.index)
+    explained['Margin'] = margins
+    return explained
+
+
+# Bar chart of the contributions with a caption, for the result screen
+def render_explanation(st, explanation):
+    if explanation is None:
+        return
+    chart = pd.DataFrame({'Contribution': [value for _, _, value in explanation['features']]},
+                         index=[f"{name} = {value:g}" for name, value, _ in explanation['features']])
+    st.markdown("**What drove this result**")
+    st.bar_chart(chart, horizontal=True, sort=False)
+    st.caption(f"Decision margin {explanation['margin']:+.2f} (above 0 means Diabetic). An average patient "
+               f"scores {explanation['baseline']:+.2f}; each bar shows how far that value moves your score "
+               f"from there, positive bars towards Diabetic.")
+
+
+# The few features that mattered most, as an HTML paragraph for the result email
+def explanation_html(explanation, top=3):
+    if explanation is None:
+        return ''
+    items = ''.join(
+        f"<li>{name} ({value:g}): {'raised' if contribution > 0 else 'lowered'} your risk score by "
+        f"{abs(contribution):.2f}</li>"
+        for name, value, contribution in explanation['features'][:top] if contribution)
+    return f"<p><strong><u>What drove your result:</u></strong></p><ol>{items}</ol>" if items else ''
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Nearest-facility lookups across county borders.
+
+Every facility is placed at its own coordinates when facility_coordinates.csv
+(NHIF_HOSPITAL_CODE, LATITUDE, LONGITUDE) lists it, otherwise at the
+approximate location of its county headquarters from county_centroids.csv.
+Points are stored as unit vectors in a KD-tree built once per loaded table.
+Straight-line (chord) distance between unit vectors orders points exactly as
+great-circle distance does, so a k-nearest query is a plain tree query.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from facility_store import load_data, normalize_county
+from metrics import timed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CENTROIDS_FILE = os.path.join(BASE_DIR, 'county_centroids.csv')
+COORDINATES_FILE = os.path.join(BASE_DIR, 'facility_coordinates.csv')
+EARTH_RADIUS_KM = 6371.0088
+
+
+_centroids = {}
+
+
+# name -> (latitude, longitude), names normalized like the store's counties,
+# read once per process.
+# `counties_only` drops the town rows that stand in for non-county values of
+# the COUNTY column. The dict is shared, so don't modify it.
+def load_centroids(path=CENTROIDS_FILE, counties_only=False):
+    key = (os.path.abspath(path), counties_only)
+    centroids = _centroids.get(key)
+    if centroids is None:
+        table = pd.read_csv(path)
+        if counties_only:
+            table = table[table['KIND'] == 'county']
+        centroids = _centroids[key] = {
+            normalize_county(name): (float(lat), float(lon))
+            for name, lat, lon in zip(table['NAME'], table['LATITUDE'], table['LONGITUDE'])}
+    return centroids
+
+
+# hospital code -> (latitude, longitude), empty when the optional file is absent
+def load_coordinates(path=COORDINATES_FILE):
+    if not os.path.exists(path):
+        return {}
+    table = pd.read_csv(path)
+    return {code: (float(lat), float(lon))
+            for code, lat, lon in zip(table['NHIF_HOSPITAL_CODE'], table['LATITUDE'], table['LONGITUDE'])}
+
+
+def _unit_vectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+# Great-circle distance in km from one point to arrays of points
+def haversine_km(lat, lon, lats, lons):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+class GeoIndex:
+
+    def __init__(self, data, centroids=None, coordinates=None):
+        from scipy.spatial import cKDTree
+
+        self.data = data
+        self.centroids = load_centroids() if centroids is None else centroids
+        coordinates = load_coordinates() if coordinates is None else coordinates
+
+        # Own coordinates where known, else the county's
+        def column(keys, points, axis):
+            return keys.map({key: point[axis] for key, point in points.items()}).to_numpy(dtype=np.float64, copy=True)
+
+        codes = data['NHIF_HOSPITAL_CODE']
+        counties = data['COUNTY'].map(normalize_county)
+        lat, lon = column(codes, coordinates, 0), column(codes, coordinates, 1)
+        exact = ~np.isnan(lat)
+        lat[~exact] = column(counties[~exact], self.centroids, 0)
+        lon[~exact] = column(counties[~exact], self.centroids, 1)
+
+        placed = ~np.isnan(lat)
+        self.positions = np.flatnonzero(placed)  # row positions of the points in the tree
+        self.unplaced = np.flatnonzero(~placed)  # rows with neither coordinates nor a known county
+        self.latitudes = lat[placed]
+        self.longitudes = lon[placed]
+        self.exact = exact[placed]
+        self.tree = cKDTree(_unit_vectors(self.latitudes, self.longitudes))
+
+    def __len__(self):
+        return len(self.positions)
+
+    # (latitude, longitude) of a county (or town in the COUNTY column), or None
+    def locate(self, county):
+        return self.centroids.get(normalize_county(county))
+
+    # Row positions of the k facilities closest to a point, nearest first,
+    # with their distances in km
+    def nearest(self, lat, lon, k=5):
+        k = min(k, len(self.positions))
+        if k == 0:
+            return self.positions[:0], np.empty(0)
+        chords, found = self.tree.query(_unit_vectors([lat], [lon])[0], k=k)
+        found = np.atleast_1d(found)
+        return self.positions[found], _chord_to_km(np.atleast_1d(chords))
+
+    def nearest_to_county(self, county, k=5):
+        point = self.locate(county)
+        if point is None:
+            raise KeyError(f"No location known for county {county!r}")
+        return self.nearest(*point, k=k)
+
+    # Same answer as `nearest` from a full scan (reference for benchmarks)
+    def nearest_brute(self, lat, lon, k=5):
+        distances = haversine_km(lat, lon, self.latitudes, self.longitudes)
+        order = np.argsort(distances, kind='stable')[:k]
+        return self.positions[order], distances[order]
+
+    # Facility rows nearest to a point with a DISTANCE_KM column, skipping
+    # `exclude` (e.g. the rows already shown for the selected county)
+    def nearest_rows(self, lat, lon, k=5, exclude=None):
+        extra = 0 if exclude is None else len(exclude)
+        positions, distances = self.nearest(lat, lon, k=k + extra)
+        if extra:
+            keep = ~np.isin(positions, exclude)
+            positions, distances = positions[keep], distances[keep]
+        rows = self.data.iloc[positions[:k]].copy()
+        rows['DISTANCE_KM'] = np.round(distances[:k], 1)
+        return rows
+
+
+_lock = threading.Lock()
+_cached = None
+
+
+# GeoIndex for the current facility table, rebuilt only when the table is reloaded
+def load_geo_index(data=None):
+    global _cached
+    if data is None:
+        data = load_data()
+    cached = _cached
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    with _lock:
+        if _cached is None or _cached[0] is not data:
+            with timed('geo_index_build'):
+                _cached = (data, GeoIndex(data))
+        return _cached[1]
+
+
+# Counties a user can pick: every county with a known location plus any
+# other value the facility table uses, one entry per normalized name
+def county_choices(index):
+    return sorted(set(index.counties) | set(load_centroids(counties_only=True)))
+
+
+# Facilities in the county plus the k nearest ones outside it (with a
+# DISTANCE_KM column), for the "Hospital Recommendation" sections
+def recommend(county, k=5, index=None, geo=None):
+    if index is None:
+        from facility_index import load_index
+        index = load_index()
+    if geo is None:
+        geo = load_geo_index(index.data)
+    positions = index.filter(county=county)
+    point = geo.locate(county)
+    if point is None:
+        return index.rows(positions), index.rows(positions[:0])
+    return index.rows(positions), geo.nearest_rows(*point, k=k, exclude=positions)
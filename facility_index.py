@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed lookup tables over the facility table.
+
+Every filter the apps offer (county, NHIF office, hospital code, hospital
+name) is answered from dictionaries of row positions built once per loaded
+table, so a rerun never has to scan the whole frame. When the store hands
+out a revised table that facility_ingest.py logged, the new index is derived
+from the old one by applying just the inserted, updated and deleted rows.
+"""
+
+import threading
+
+import numpy as np
+
+from facility_search import TrigramIndex
+from facility_store import changes_between, load_data, normalize_county
+from metrics import timed
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+# value -> sorted array of row positions holding that value
+def _group_positions(column):
+    return {key: np.asarray(positions, dtype=np.intp)
+            for key, positions in column.groupby(column.to_numpy()).indices.items()}
+
+
+def _normalize_name(name):
+    return ' '.join(str(name).upper().split())
+
+
+# Copy of `groups` (value -> sorted positions) for a revised table: old
+# positions are renumbered with `remap` (-1 drops them) and `added` maps new
+# positions to the values they join. Groups whose rows all sit before the
+# first moved position are shared with the old dict.
+def _regroup(groups, remap, added):
+    moved = np.flatnonzero(remap != np.arange(len(remap)))
+    first = moved[0] if len(moved) else len(remap)
+    result = {}
+    for key, positions in groups.items():
+        if len(positions) and positions[-1] >= first:
+            positions = remap[positions]
+            positions = positions[positions >= 0]
+        if len(positions):
+            result[key] = positions
+    joined = {}
+    for position, key in added.items():
+        if key == key:  # NaN has no group
+            joined.setdefault(key, []).append(position)
+    for key, positions in joined.items():
+        result[key] = np.sort(np.concatenate((result.get(key, _EMPTY), np.asarray(positions, dtype=np.intp))))
+    return result
+
+
+class FacilityIndex:
+
+    def __init__(self, data):
+        self.data = data
+        self.by_county = _group_positions(data['COUNTY'])
+        self.by_office = _group_positions(data['NHIF_OFFICE'])
+        self.by_code = {code: position for position, code in enumerate(data['NHIF_HOSPITAL_CODE'])}
+        self.name_search = TrigramIndex(data['HOSPITAL_NAME'])
+        self.office_search = TrigramIndex(data['NHIF_OFFICE'])
+        self.counties = sorted(self.by_county)
+        self.offices = sorted(self.by_office)
+        self._county_offices = {
+            county: sorted(data['NHIF_OFFICE'].iloc[positions].unique())
+            for county, positions in self.by_county.items()
+        }
+
+    def __len__(self):
+        return len(self.data)
+
+    # Index for `data`, the table this one's table becomes after the logged
+    # `changes` (facility_ingest.py entries, oldest first). The store keeps
+    # surviving rows in place, drops deleted ones and appends inserted ones;
+    # None when `data` isn't laid out that way (e.g. it was re-parsed from
+    # the workbook), in which case the caller rebuilds.
+    def updated(self, data, changes):
+        codes = self.data['NHIF_HOSPITAL_CODE'].to_numpy()
+        keep = np.ones(len(codes), dtype=bool)
+        touched, inserted = set(), {}
+        for change in changes:
+            for row in change['deleted']:
+                code = row['NHIF_HOSPITAL_CODE']
+                if inserted.pop(code, None) is None and code in self.by_code:
+                    keep[self.by_code[code]] = False
+            touched.update(row['NHIF_HOSPITAL_CODE'] for row in change['updated'])
+            inserted.update((row['NHIF_HOSPITAL_CODE'], True) for row in change['inserted'])
+        survivors = codes[keep]
+        new_codes = data['NHIF_HOSPITAL_CODE'].to_numpy()
+        if len(new_codes) != len(survivors) + len(inserted) or \
+                not np.array_equal(new_codes[:len(survivors)], survivors):
+            return None
+
+        remap = np.full(len(codes), -1, dtype=np.intp)
+        remap[keep] = np.arange(len(survivors), dtype=np.intp)
+        old_touched = np.asarray(sorted(self.by_code[code] for code in touched
+                                        if code in self.by_code and keep[self.by_code[code]]), dtype=np.intp)
+        new_touched = remap[old_touched]
+        appended = np.arange(len(survivors), len(data), dtype=np.intp)
+
+        index = object.__new__(FacilityIndex)
+        index.data = data
+        # Per column: rows whose value changed leave their old group and join
+        # the new one together with the inserted rows
+        for column, attribute, search in (('COUNTY', 'by_county', None),
+                                          ('NHIF_OFFICE', 'by_office', 'office_search'),
+                                          ('HOSPITAL_NAME', None, 'name_search')):
+            before = self.data[column].to_numpy()[old_touched]
+            after = data[column].to_numpy()[new_touched]
+            changed = np.asarray([a != b and not (a != a and b != b) for a, b in zip(before, after)], dtype=bool)
+            column_remap = remap.copy()
+            column_remap[old_touched[changed]] = -1
+            positions = np.concatenate((new_touched[changed], appended))
+            values = dict(zip(positions.tolist(), data[column].to_numpy()[positions]))
+            if attribute:
+                setattr(index, attribute, _regroup(getattr(self, attribute), column_remap, values))
+            if search:
+                setattr(index, search, getattr(self, search).updated(column_remap, len(data), values))
+
+        index.by_code = dict(self.by_code)
+        for code in codes[~keep].tolist():
+            del index.by_code[code]
+        first = int(np.argmin(keep)) if not keep.all() else len(survivors)
+        index.by_code.update(zip(new_codes[first:].tolist(), range(first, len(data))))
+
+        index.counties = sorted(index.by_county)
+        index.offices = sorted(index.by_office)
+        dirty = set(self.data['COUNTY'].to_numpy()[~keep]) | set(self.data['COUNTY'].to_numpy()[old_touched]) | \
+            set(data['COUNTY'].to_numpy()[np.concatenate((new_touched, appended))])
+        index._county_offices = {
+            county: offices for county, offices in self._county_offices.items()
+            if county in index.by_county and county not in dirty
+        }
+        for county in dirty:
+            if county in index.by_county:
+                index._county_offices[county] = sorted(
+                    data['NHIF_OFFICE'].iloc[index.by_county[county]].unique())
+        return index
+
+    # NHIF offices that serve at least one facility in the county (all offices if None)
+    def offices_in(self, county=None):
+        if county is None:
+            return self.offices
+        return self._county_offices.get(normalize_county(county), [])
+
+    # Counties are keyed as the store normalizes them, whatever the caller's spelling
+    def county_positions(self, county):
+        return self.by_county.get(normalize_county(county), _EMPTY)
+
+    def office_positions(self, office):
+        return self.by_office.get(office, _EMPTY)
+
+    # Exact (normalized) name matches, straight from the name search index
+    def name_positions(self, name):
+        term_id = self.name_search.term_ids.get(_normalize_name(name))
+        return _EMPTY if term_id is None else self.name_search.term_positions(term_id)
+
+    # Row for a hospital code, or None when the code is unknown
+    def lookup_code(self, code):
+        position = self.by_code.get(code)
+        if position is None:
+            return None
+        return self.data.iloc[position]
+
+    # Composite filter: intersect the position lists of every given criterion.
+    # Criteria left as None (or "All") do not restrict the result.
+    def filter(self, county=None, office=None, name=None):
+        postings = []
+        if county not in (None, 'All'):
+            postings.append(self.county_positions(county))
+        if office not in (None, 'All'):
+            postings.append(self.office_positions(office))
+        if name:
+            postings.append(self.name_positions(name))
+
+        if not postings:
+            return np.arange(len(self.data), dtype=np.intp)
+
+        postings.sort(key=len)
+        positions = postings[0]
+        for other in postings[1:]:
+            if not len(positions):
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    # Composite filter followed by the free-text NHIF office / hospital name
+    # searches; with a name query the result follows the search ranking
+    def search(self, county=None, office=None, office_query=None, name_query=None):
+        positions = self.filter(county=county, office=office)
+        if not (office_query or name_query):
+            return positions
+
+        allowed = None if len(positions) == len(self.data) else positions
+        if office_query:
+            allowed = self.office_search.match_positions(office_query, allowed=allowed)
+            if not len(allowed) or not name_query:
+                return allowed
+        return self.name_search.match_positions(name_query, allowed=allowed)
+
+    # Rows at the given positions. A run of consecutive positions (one county
+    # of the sorted sheet, say) is returned as a slice, which under pandas
+    # copy-on-write shares the table's memory instead of copying the rows.
+    def rows(self, positions):
+        if len(positions) > 1 and positions[-1] - positions[0] == len(positions) - 1 and \
+                (np.diff(positions) == 1).all():
+            return self.data.iloc[positions[0]:positions[-1] + 1]
+        return self.data.iloc[positions]
+
+
+_lock = threading.Lock()
+_cached = None  # (data, FacilityIndex)
+
+
+# Index for the currently loaded facility table. When the store hands out a
+# new table (i.e. the workbook changed) the index is carried forward through
+# the change log if it connects the two tables, and rebuilt otherwise.
+def load_index(data=None):
+    global _cached
+    if data is None:
+        data = load_data()
+    cached = _cached
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    with _lock:
+        if _cached is None or _cached[0] is not data:
+            with timed('index_build'):
+                index = None
+                if _cached is not None:
+                    changes = changes_between(_cached[0], data)
+                    if changes is not None:
+                        index = _cached[1].updated(data, changes)
+                _cached = (data, index or FacilityIndex(data))
+        return _cached[1]
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Apply a revised NHIF facility workbook to the facility store.
+
+    python facility_ingest.py apply new-list.xlsx [--dry-run]
+    python facility_ingest.py log [--limit 10]
+
+The new workbook is diffed against the current table on NHIF_HOSPITAL_CODE.
+Only the inserted, updated and deleted rows are applied: surviving facilities
+keep their row positions, deleted ones are dropped and new ones appended. The
+workbook then replaces Dialysis-Facilities.xlsx, the patched table becomes the
+store's snapshot (so nothing re-parses it) and the change is appended to the
+change log. Running apps pick the revision up on their next rerun and update
+their search/filter indexes from the logged change instead of rebuilding them.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from facility_store import (COLUMNS, FACILITY_FILE, change_log_path, compact, expand, file_hash, load_data,
+                            read_workbook, store_data)
+
+KEY = 'NHIF_HOSPITAL_CODE'
+FIELDS = [column for column in COLUMNS if column != KEY]
+
+
+def _plain(value):
+    return None if pd.isna(value) else value
+
+
+# Plain dicts (NaN as None) so the rows can go in the JSON change log
+def _records(frame):
+    return frame[COLUMNS].astype(object).where(frame[COLUMNS].notna(), None).to_dict('records')
+
+
+def _check_codes(data, label):
+    codes = data[KEY]
+    if codes.isna().any():
+        raise ValueError(f"{label}: {int(codes.isna().sum())} rows without an {KEY}")
+    duplicated = codes[codes.duplicated()].unique()
+    if len(duplicated):
+        raise ValueError(f"{label}: duplicate {KEY} values {', '.join(map(str, duplicated[:10]))}")
+
+
+# Rows inserted, updated (only the changed fields, before and after) and
+# deleted going from one table to the other, keyed on the hospital code
+def diff_tables(old, new):
+    _check_codes(old, 'current table')
+    _check_codes(new, 'new workbook')
+
+    deleted = old[~old[KEY].isin(new[KEY])]
+    inserted = new[~new[KEY].isin(old[KEY])]
+    common = new[new[KEY].isin(old[KEY])]
+    before = old.set_index(KEY).loc[common[KEY], FIELDS].astype(object)
+    after = common.set_index(KEY)[FIELDS].astype(object)
+    differs = (before.to_numpy() != after.to_numpy()) & ~(before.isna().to_numpy() & after.isna().to_numpy())
+
+    codes, before, after = after.index.tolist(), before.to_numpy(), after.to_numpy()
+    updated = []
+    for row in np.flatnonzero(differs.any(axis=1)).tolist():
+        columns = np.flatnonzero(differs[row]).tolist()
+        updated.append({
+            KEY: codes[row],
+            'before': {FIELDS[column]: _plain(before[row, column]) for column in columns},
+            'after': {FIELDS[column]: _plain(after[row, column]) for column in columns},
+        })
+    return {'inserted': _records(inserted), 'updated': updated, 'deleted': _records(deleted)}
+
+
+# The table after a change: deleted rows dropped, updated fields patched in
+# place, inserted rows appended (the layout FacilityIndex.updated expects)
+def apply_changes(data, change):
+    deleted = [row[KEY] for row in change['deleted']]
+    result = expand(data[~data[KEY].isin(deleted)])
+    if change['updated']:
+        positions = pd.Index(result[KEY]).get_indexer([row[KEY] for row in change['updated']])
+        if (positions < 0).any():
+            raise ValueError("change updates facilities that aren't in the table")
+        for field in FIELDS:
+            rows = [(position, row['after'][field]) for position, row in zip(positions.tolist(), change['updated'])
+                    if field in row['after']]
+            if rows:
+                where, values = zip(*rows)
+                values = [np.nan if value is None else value for value in values]
+                result.iloc[list(where), result.columns.get_loc(field)] = values
+    if change['inserted']:
+        inserted = pd.DataFrame(change['inserted'], columns=COLUMNS)
+        result = pd.concat([result, inserted.astype(result.dtypes.to_dict())], ignore_index=True)
+    result.index = pd.RangeIndex(1, len(result) + 1)
+    return compact(result)
+
+
+def _summary(change):
+    return (f"{len(change['inserted'])} inserted, {len(change['updated'])} updated, "
+            f"{len(change['deleted'])} deleted")
+
+
+def ingest(workbook, file_path=FACILITY_FILE, snapshot_dir=None, dry_run=False, log=print):
+    start = time.perf_counter()
+    file_path = os.path.abspath(file_path)
+    current = load_data(file_path, snapshot_dir)
+    sha256 = file_hash(workbook)
+    if sha256 == current.attrs.get('sha256'):
+        log(f"{os.path.basename(workbook)} is already the current facility list")
+        return {'inserted': 0, 'updated': 0, 'deleted': 0, 'rows': len(current), 'seconds': 0.0}
+
+    change = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': os.path.basename(workbook),
+        'from': current.attrs.get('sha256'),
+        'to': sha256,
+    }
+    change.update(diff_tables(current, read_workbook(workbook)))
+    data = apply_changes(current, change)
+
+    if not dry_run:
+        path = change_log_path(file_path, snapshot_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as handle:
+            handle.write(json.dumps(change, default=str) + '\n')
+        if os.path.abspath(workbook) != file_path:
+            shutil.copyfile(workbook, file_path + '.tmp')
+            os.replace(file_path + '.tmp', file_path)
+        data = store_data(data, file_path, snapshot_dir, sha256)
+
+    stats = {'inserted': len(change['inserted']), 'updated': len(change['updated']),
+             'deleted': len(change['deleted']), 'rows': len(data), 'seconds': time.perf_counter() - start}
+    log(f"{'Would apply' if dry_run else 'Applied'} {change['source']}: {_summary(change)}; "
+        f"{stats['rows']} facilities ({stats['seconds']:.2f} s)")
+    return stats
+
+
+def read_log(file_path=FACILITY_FILE, snapshot_dir=None):
+    try:
+        with open(change_log_path(file_path, snapshot_dir)) as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', default=FACILITY_FILE, help='workbook the apps load')
+    commands = parser.add_subparsers(dest='command', required=True)
+    apply = commands.add_parser('apply', help='diff a new workbook against the store and apply it')
+    apply.add_argument('workbook')
+    apply.add_argument('--dry-run', action='store_true', help='report the changes without applying them')
+    show = commands.add_parser('log', help='revisions applied so far, newest last')
+    show.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == 'apply':
+        ingest(args.workbook, args.store, dry_run=args.dry_run)
+    else:
+        for change in read_log(args.store)[-args.limit:]:
+            print(f"{change['time']}  {change['source']}: {_summary(change)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Trigram search over free-text facility columns (hospital name, NHIF office).
+
+Queries are answered from an inverted index of character trigrams instead of
+a `str.contains` scan. Substring matches are returned first (prefix and
+word-start matches ranked highest); when nothing contains the query, terms
+sharing trigrams with it are re-ranked by a bounded edit distance so that a
+single typo still finds the facility.
+
+`updated` derives the index for a revised table from the current one without
+re-normalizing or re-splitting the rows that didn't change.
+"""
+
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def normalize(text):
+    return ' '.join(str(text).upper().split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Smallest edit distance between the query and any substring of the term,
+# giving up as soon as it is certain to exceed the bound
+def substring_distance(query, term, bound):
+    # Pigeonhole filter: within `bound` edits, one of bound + 1 disjoint
+    # pieces of the query must appear verbatim in the term
+    step = max(1, len(query) // (bound + 1))
+    pieces = [query[i:i + step] for i in range(0, step * (bound + 1), step)]
+    pieces[-1] = query[step * bound:]
+    if len(query) > bound and not any(piece in term for piece in pieces):
+        return bound + 1
+
+    previous = [0] * (len(term) + 1)
+    for i, q_char in enumerate(query, 1):
+        current = [i]
+        left = i
+        for j, t_char in enumerate(term):
+            best = previous[j] + (q_char != t_char)
+            if previous[j + 1] < best:
+                best = previous[j + 1] + 1
+            if left + 1 < best:
+                best = left + 1
+            current.append(best)
+            left = best
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return min(previous)
+
+
+# Edits tolerated for a query of the given length
+def default_max_edits(length):
+    if length < 4:
+        return 0
+    if length < 8:
+        return 1
+    return 2
+
+
+class TrigramIndex:
+
+    def __init__(self, values, fuzzy_candidates=50):
+        self.fuzzy_candidates = fuzzy_candidates
+        self.terms = []       # distinct normalized values
+        self.postings = {}    # trigram -> sorted term ids
+
+        term_ids = {}
+        rows = {}
+        n_rows = 0
+        for position, value in enumerate(values):
+            n_rows = position + 1
+            if value is None or value != value:  # None / NaN
+                continue
+            term = normalize(value)
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(self.terms)
+                self.terms.append(term)
+                rows[term_id] = []
+            rows[term_id].append(position)
+
+        self.term_ids = term_ids
+        positions = [np.asarray(rows[term_id], dtype=np.intp) for term_id in range(len(self.terms))]
+        self.row_terms = np.full(n_rows, -1, dtype=np.intp)
+        for term_id, term_rows in enumerate(positions):
+            self.row_terms[term_rows] = term_id
+
+        # Flat arrays for vectorized verification, ranking and row gathering;
+        # the rows of term i are flat_rows[offsets[i]:offsets[i + 1]]
+        self.term_array = np.asarray(self.terms, dtype=str)
+        self.term_lengths = np.char.str_len(self.term_array) if self.terms else np.empty(0, dtype=np.intp)
+        sizes = np.fromiter((len(p) for p in positions), dtype=np.intp, count=len(positions))
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.intp)
+        self.flat_rows = np.concatenate(positions) if positions else _EMPTY
+        postings = {}
+        for term_id, term in enumerate(self.terms):
+            for gram in trigrams(term):
+                postings.setdefault(gram, []).append(term_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.intp) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.terms)
+
+    # Sorted row positions holding a term
+    def term_positions(self, term_id):
+        return self.flat_rows[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    # Index over a revised table. `remap` maps every old row position to its
+    # new one, or -1 for rows that were deleted or whose value changed;
+    # `values` maps new positions to the values of inserted and changed rows.
+    # The current index is left untouched (other sessions may be reading it).
+    # Terms that lose their last row become unreachable rather than renumbered.
+    def updated(self, remap, n_rows, values):
+        index = object.__new__(TrigramIndex)
+        index.fuzzy_candidates = self.fuzzy_candidates
+        index.terms = list(self.terms)
+        index.term_ids = dict(self.term_ids)
+
+        added_terms, added_rows = [], []
+        for position, value in values.items():
+            if value is None or value != value:
+                continue
+            term = normalize(value)
+            term_id = index.term_ids.get(term)
+            if term_id is None:
+                term_id = index.term_ids[term] = len(index.terms)
+                index.terms.append(term)
+            added_terms.append(term_id)
+            added_rows.append(position)
+
+        old_sizes = np.diff(self.offsets)
+        flat_terms = np.repeat(np.arange(len(self.terms), dtype=np.intp), old_sizes)
+        flat_rows = remap[self.flat_rows]
+        kept = flat_rows >= 0
+        flat_terms = np.concatenate((flat_terms[kept], np.asarray(added_terms, dtype=np.intp)))
+        flat_rows = np.concatenate((flat_rows[kept], np.asarray(added_rows, dtype=np.intp)))
+        order = np.lexsort((flat_rows, flat_terms))
+        flat_terms, index.flat_rows = flat_terms[order], flat_rows[order]
+
+        sizes = np.bincount(flat_terms, minlength=len(index.terms))
+        index.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.intp)
+        index.row_terms = np.full(n_rows, -1, dtype=np.intp)
+        index.row_terms[index.flat_rows] = flat_terms
+
+        new_terms = index.terms[len(self.terms):]
+        index.term_array = np.concatenate((self.term_array, np.asarray(new_terms, dtype=str))) if new_terms \
+            else self.term_array
+        index.term_lengths = np.char.str_len(index.term_array) if index.terms else np.empty(0, dtype=np.intp)
+
+        # Only the trigrams of terms that appeared or vanished change
+        removed, added = {}, {}
+        for term_id in np.flatnonzero((old_sizes > 0) & (sizes[:len(self.terms)] == 0)).tolist():
+            term = index.terms[term_id]
+            del index.term_ids[term]
+            for gram in trigrams(term):
+                removed.setdefault(gram, []).append(term_id)
+        for term_id, term in enumerate(new_terms, len(self.terms)):
+            for gram in trigrams(term):
+                added.setdefault(gram, []).append(term_id)
+        postings = dict(self.postings)
+        for gram, ids in removed.items():
+            postings[gram] = postings[gram][~np.isin(postings[gram], ids)]
+        for gram, ids in added.items():
+            # New term ids are larger than all old ones, so this stays sorted
+            postings[gram] = np.concatenate((postings.get(gram, _EMPTY), np.asarray(ids, dtype=np.intp)))
+        for gram in removed:
+            if not len(postings[gram]):
+                del postings[gram]
+        index.postings = postings
+        return index
+
+    # Term ids whose text contains the (normalized) query, plus where it starts
+    def _substring_terms(self, query):
+        if len(query) >= 3:
+            grams = sorted(trigrams(query), key=lambda gram: len(self.postings.get(gram, _EMPTY)))
+            candidates = self.postings.get(grams[0], _EMPTY)
+            for gram in grams[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, self.postings.get(gram, _EMPTY), assume_unique=True)
+        else:
+            # Too short for a trigram: walk the trigram vocabulary, not the rows
+            found = [ids for gram, ids in self.postings.items() if query in gram]
+            candidates = np.unique(np.concatenate(found)) if found else _EMPTY
+            if not len(candidates) and self.terms:
+                candidates = np.flatnonzero((np.char.find(self.term_array, query) >= 0) & (np.diff(self.offsets) > 0))
+        if not len(candidates):
+            return _EMPTY, _EMPTY
+        found_at = np.char.find(self.term_array[candidates], query)
+        keep = found_at >= 0
+        return candidates[keep], found_at[keep]
+
+    def _fuzzy_terms(self, query, max_edits, allowed_terms=None):
+        grams = [self.postings[gram] for gram in trigrams(query) if gram in self.postings]
+        if not grams:
+            return []
+        overlap = np.bincount(np.concatenate(grams), minlength=len(self.terms))
+        if allowed_terms is not None:
+            mask = np.zeros(len(self.terms), dtype=bool)
+            mask[allowed_terms] = True
+            overlap[~mask] = 0
+        candidates = np.flatnonzero(overlap)
+        if len(candidates) > self.fuzzy_candidates:
+            top = np.argpartition(-overlap[candidates], self.fuzzy_candidates)[:self.fuzzy_candidates]
+            candidates = candidates[top]
+
+        matches = []
+        for term_id in candidates.tolist():
+            distance = substring_distance(query, self.terms[term_id], max_edits)
+            if distance <= max_edits:
+                matches.append((distance, -overlap[term_id], len(self.terms[term_id]), self.terms[term_id], term_id))
+        matches.sort()
+        return [(match[-1], match[0]) for match in matches]
+
+    # Ranked (term ids, edit distances)
+    def _rank(self, query, max_edits, allowed_terms):
+        hits, found_at = self._substring_terms(query)
+        if allowed_terms is not None and len(hits):
+            keep = np.isin(hits, allowed_terms)
+            hits, found_at = hits[keep], found_at[keep]
+        if len(hits):
+            # Prefix matches first, then word-start matches, then the rest;
+            # shorter names first within each group, then alphabetical
+            kind = np.where(found_at == 0, 0, 2)
+            if len(hits) > 1 or kind[0]:
+                kind[(kind == 2) & (np.char.find(self.term_array[hits], ' ' + query) >= 0)] = 1
+            order = np.lexsort((self.term_array[hits], self.term_lengths[hits], kind))
+            return hits[order], np.zeros(len(hits), dtype=np.intp)
+
+        if max_edits is None:
+            max_edits = default_max_edits(len(query))
+        if not max_edits:
+            return _EMPTY, _EMPTY
+        fuzzy = self._fuzzy_terms(query, max_edits, allowed_terms)
+        return (np.asarray([term_id for term_id, _ in fuzzy], dtype=np.intp),
+                np.asarray([edits for _, edits in fuzzy], dtype=np.intp))
+
+    # Row positions of the given terms, in term order
+    def _gather(self, term_ids):
+        starts = self.offsets[term_ids]
+        sizes = self.offsets[term_ids + 1] - starts
+        if not len(sizes) or sizes.max() == 1:
+            return self.flat_rows[starts]
+        heads = np.cumsum(sizes) - sizes
+        within = np.arange(sizes.sum()) - np.repeat(heads, sizes)
+        return self.flat_rows[np.repeat(starts, sizes) + within]
+
+    def _allowed_terms(self, allowed):
+        if allowed is None:
+            return None
+        term_ids = self.row_terms[allowed]
+        return np.unique(term_ids[term_ids >= 0])
+
+    # Ranked (term, edits, row positions) tuples for the query, best first.
+    # `allowed` restricts the search to a set of row positions (e.g. one county).
+    def search(self, query, k=10, max_edits=None, allowed=None):
+        query = normalize(query)
+        if not query:
+            return []
+
+        term_ids, edits = self._rank(query, max_edits, self._allowed_terms(allowed))
+        if k is not None:
+            term_ids, edits = term_ids[:k], edits[:k]
+
+        results = []
+        for term_id, distance in zip(term_ids.tolist(), edits.tolist()):
+            positions = self.term_positions(term_id)
+            if allowed is not None:
+                positions = positions[np.isin(positions, allowed, assume_unique=True)]
+            results.append((self.terms[term_id], distance, positions))
+        return results
+
+    # Row positions matching the query, best matches first
+    def match_positions(self, query, allowed=None, k=None, max_edits=None):
+        query = normalize(query)
+        if not query:
+            return _EMPTY
+
+        term_ids, _ = self._rank(query, max_edits, self._allowed_terms(allowed))
+        if not len(term_ids):
+            return _EMPTY
+        positions = self._gather(term_ids)
+        if allowed is not None:
+            positions = positions[np.isin(positions, allowed, assume_unique=True)]
+        return positions if k is None else positions[:k]
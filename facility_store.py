@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Shared facility store for the dialysis hospital apps.
+
+The NHIF workbook is streamed once (every sheet with a recognizable header),
+written to a columnar snapshot next to it and served from memory afterwards.
+The table is held once per process in a compact form (see `compact`) and
+shared by every session; with pandas copy-on-write, the slices sessions take
+never copy it or write back into it. The snapshot is invalidated whenever the
+workbook's modification time/size change and its content hash differs.
+Every loaded table carries the workbook hash in `data.attrs['sha256']`, and
+facility_ingest.py records each applied revision in a change log next to the
+snapshot, so callers holding an older table can catch up incrementally.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+
+import pandas as pd
+
+from metrics import timed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FACILITY_FILE = os.path.join(BASE_DIR, 'Dialysis-Facilities.xlsx')
+SNAPSHOT_DIRNAME = '.facility_cache'
+COLUMNS = ['COUNTY', 'NHIF_OFFICE', 'NHIF_HOSPITAL_CODE', 'HOSPITAL_NAME']
+CATEGORICAL = ['COUNTY', 'NHIF_OFFICE']  # a few dozen distinct values each
+HEADER_ROWS = 20  # rows searched for the header before giving up
+CHUNK_ROWS = 10000  # rows per DataFrame handed out while streaming a workbook
+
+_lock = threading.Lock()
+_memory = {}  # absolute workbook path -> (stat key, DataFrame)
+
+
+# Accepted header labels per column, compared after _label()
+HEADER_LABELS = {
+    'COUNTY': ('COUNTY',),
+    'NHIF_OFFICE': ('NHIF OFFICE', 'NHIF BRANCH', 'NHIF BRANCH OFFICE'),
+    'NHIF_HOSPITAL_CODE': ('NHIF HOSPITAL CODE', 'NHIF CODE', 'HOSPITAL CODE', 'FACILITY CODE'),
+    'HOSPITAL_NAME': ('HOSPITAL NAME', 'HOSPITAL', 'FACILITY NAME'),
+}
+
+
+def _label(value):
+    return ' '.join(re.sub(r'[^A-Z0-9]+', ' ', str(value).upper()).split())
+
+
+# Cell number of each store column when `row` is a header row, else None
+def _header_cells(row):
+    labels = ['' if value is None else _label(value) for value in row]
+    cells = []
+    for column in COLUMNS:
+        found = [number for number, label in enumerate(labels) if label in HEADER_LABELS[column]]
+        if not found:
+            return None
+        cells.append(found[0])
+    return cells
+
+
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+# County as every lookup keys it: upper case, single spaces ('Kiambu ' and
+# 'KIAMBU' are one county). Missing values stay missing.
+def normalize_county(value):
+    if not isinstance(value, str):
+        return value
+    return ' '.join(value.upper().split()) or None
+
+
+# Hospital codes as ints; cells that aren't whole numbers become missing
+def _code(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def _frame(rows):
+    counties, offices, codes, names = zip(*rows)
+    codes = pd.array(codes, dtype='Int64')
+    return pd.DataFrame({
+        'COUNTY': pd.array(counties, dtype='str'),
+        'NHIF_OFFICE': pd.array(offices, dtype='str'),
+        'NHIF_HOSPITAL_CODE': codes if codes.isna().any() else codes.astype('int64'),
+        'HOSPITAL_NAME': pd.array(names, dtype='str'),
+    })
+
+
+# Stream the workbook in DataFrames of up to `chunk_rows` rows, sheet by
+# sheet, without loading it whole (openpyxl read-only mode). In each sheet
+# the header row is found by its labels (COUNTY, NHIF OFFICE, ...) among the
+# first HEADER_ROWS rows, in any column order; title rows above it, blank
+# rows and repeated header rows are skipped, and sheets without a header
+# (notes, cover pages) are ignored. `sheets` limits the sheets read.
+def iter_workbook(file_path=FACILITY_FILE, chunk_rows=CHUNK_ROWS, sheets=None):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    found = False
+    try:
+        for sheet in workbook.worksheets:
+            if sheets is not None and sheet.title not in sheets:
+                continue
+            rows = sheet.iter_rows(values_only=True)
+            cells = None
+            for _, row in zip(range(HEADER_ROWS), rows):
+                cells = _header_cells(row)
+                if cells is not None:
+                    break
+            if cells is None:
+                continue
+            found = True
+
+            width = max(cells) + 1
+            chunk = []
+            for row in rows:
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                county, office, code, name = (row[cell] for cell in cells)
+                if county is None and office is None and code is None and name is None:
+                    continue
+                number = _code(code)
+                if number is None and _header_cells(row) is not None:
+                    continue  # header repeated on a later page
+                chunk.append((_text(county), _text(office), number, _text(name)))
+                if len(chunk) >= chunk_rows:
+                    yield _frame(chunk)
+                    chunk = []
+            if chunk:
+                yield _frame(chunk)
+    finally:
+        workbook.close()
+    if not found:
+        raise ValueError(f"{file_path}: no sheet with a header row naming the columns {', '.join(COLUMNS)}")
+
+
+# The whole workbook as one table, rows numbered from 1 like they always were
+def read_workbook(file_path=FACILITY_FILE, sheets=None):
+    chunks = list(iter_workbook(file_path, sheets=sheets))
+    data = pd.concat(chunks, ignore_index=True) if chunks else _frame([(None,) * 4])[:0]
+    data.index = pd.RangeIndex(1, len(data) + 1)
+    return data
+
+
+# The form the store serves: counties normalized (see normalize_county),
+# county and office as categoricals (one small integer per row), hospital
+# codes in the smallest integer type that holds them and names left as
+# Arrow-backed strings (one buffer, no per-row Python objects). Returns the
+# table itself when it is already compact.
+def compact(data):
+    columns = {}
+    counties = data['COUNTY']
+    values = counties.dtype.categories if isinstance(counties.dtype, pd.CategoricalDtype) else counties.dropna().unique()
+    if any(normalize_county(value) != value for value in values):
+        columns['COUNTY'] = counties.astype('str').map(normalize_county, na_action='ignore').astype('category')
+    for column in CATEGORICAL:
+        if column not in columns and not isinstance(data[column].dtype, pd.CategoricalDtype):
+            columns[column] = data[column].astype('category')
+    codes = data['NHIF_HOSPITAL_CODE']
+    if codes.dtype.kind == 'i':
+        smaller = pd.to_numeric(codes, downcast='integer')
+        if smaller.dtype != codes.dtype:
+            columns['NHIF_HOSPITAL_CODE'] = smaller
+    return data.assign(**columns) if columns else data
+
+
+# The table with plain (non-categorical, int64) columns, for code that edits it
+def expand(data):
+    columns = {column: data[column].dtype.categories.dtype for column in CATEGORICAL
+               if isinstance(data[column].dtype, pd.CategoricalDtype)}
+    if data['NHIF_HOSPITAL_CODE'].dtype.kind == 'i':
+        columns['NHIF_HOSPITAL_CODE'] = 'int64'
+    return data.astype(columns)
+
+
+# Cheap change detection: modification time and size of the workbook
+def _stat_key(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Content hash, only computed when the cheap check says the file changed
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_paths(file_path, snapshot_dir):
+    if snapshot_dir is None:
+        snapshot_dir = os.path.join(os.path.dirname(file_path), SNAPSHOT_DIRNAME)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return snapshot_dir, os.path.join(snapshot_dir, stem + '.meta.json')
+
+
+# JSON-lines log of the revisions facility_ingest.py applied to the workbook
+def change_log_path(file_path=FACILITY_FILE, snapshot_dir=None):
+    snapshot_dir, _ = _snapshot_paths(os.path.abspath(file_path), snapshot_dir)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(snapshot_dir, stem + '.changes.jsonl')
+
+
+def _tag(data, file_path, snapshot_dir, sha256):
+    data.attrs['sha256'] = sha256
+    data.attrs['change_log'] = change_log_path(file_path, snapshot_dir)
+    return data
+
+
+def _write_snapshot(data, file_path, snapshot_dir, stat_key, sha256):
+    snapshot_dir, meta_path = _snapshot_paths(file_path, snapshot_dir)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+
+    # Parquet when pyarrow is available, pickle otherwise
+    try:
+        data_path = os.path.join(snapshot_dir, stem + '.parquet')
+        data.to_parquet(data_path + '.tmp')
+        fmt = 'parquet'
+    except (ImportError, ValueError, TypeError):
+        data_path = os.path.join(snapshot_dir, stem + '.pkl')
+        with open(data_path + '.tmp', 'wb') as handle:
+            pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        fmt = 'pickle'
+    os.replace(data_path + '.tmp', data_path)
+
+    meta = {
+        'source': os.path.basename(file_path),
+        'mtime_ns': stat_key[0],
+        'size': stat_key[1],
+        'sha256': sha256,
+        'format': fmt,
+        'data': os.path.basename(data_path),
+    }
+    with open(meta_path + '.tmp', 'w') as handle:
+        json.dump(meta, handle)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def _read_snapshot(file_path, snapshot_dir, stat_key):
+    snapshot_dir, meta_path = _snapshot_paths(file_path, snapshot_dir)
+    try:
+        with open(meta_path) as handle:
+            meta = json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+    if (meta['mtime_ns'], meta['size']) != tuple(stat_key):
+        # The file was touched; only rebuild if the content really changed
+        if meta['size'] != stat_key[1] or meta['sha256'] != file_hash(file_path):
+            return None
+        meta['mtime_ns'] = stat_key[0]
+        with open(meta_path + '.tmp', 'w') as handle:
+            json.dump(meta, handle)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    data_path = os.path.join(snapshot_dir, meta['data'])
+    try:
+        if meta['format'] == 'parquet':
+            data = pd.read_parquet(data_path)
+        else:
+            with open(data_path, 'rb') as handle:
+                data = pickle.load(handle)
+    except (OSError, ImportError, ValueError, pickle.UnpicklingError):
+        return None
+    return _tag(compact(data), file_path, snapshot_dir, meta['sha256'])
+
+
+# Load the dataset: memory first, then the snapshot, then the workbook itself.
+# The returned frame is shared between callers and must be treated as read-only.
+def load_data(file_path=FACILITY_FILE, snapshot_dir=None):
+    file_path = os.path.abspath(file_path)
+    stat_key = _stat_key(file_path)
+
+    cached = _memory.get(file_path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+
+    with _lock:
+        cached = _memory.get(file_path)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+
+        with timed('load_data'):
+            data = _read_snapshot(file_path, snapshot_dir, stat_key)
+            if data is None:
+                sha256 = file_hash(file_path)
+                data = _tag(compact(read_workbook(file_path)), file_path, snapshot_dir, sha256)
+                try:
+                    _write_snapshot(data, file_path, snapshot_dir, stat_key, sha256)
+                except OSError:
+                    pass  # A read-only deployment still works, just without the snapshot
+
+        _memory[file_path] = (stat_key, data)
+        return data
+
+
+# Install a table for a workbook that was just replaced (used by
+# facility_ingest.py, which already holds the table it wants served)
+def store_data(data, file_path=FACILITY_FILE, snapshot_dir=None, sha256=None):
+    file_path = os.path.abspath(file_path)
+    with _lock:
+        stat_key = _stat_key(file_path)
+        sha256 = sha256 or file_hash(file_path)
+        data = _tag(compact(data), file_path, snapshot_dir, sha256)
+        try:
+            _write_snapshot(data, file_path, snapshot_dir, stat_key, sha256)
+        except OSError:
+            pass
+        _memory[file_path] = (stat_key, data)
+        return data
+
+
+# The logged revisions leading from one loaded table to another, oldest
+# first; None when the log doesn't connect them
+def changes_between(old, new):
+    start, end = old.attrs.get('sha256'), new.attrs.get('sha256')
+    path = new.attrs.get('change_log')
+    if start is None or end is None or path is None:
+        return None
+    if start == end:
+        return []
+    try:
+        with open(path) as handle:
+            entries = [json.loads(line) for line in handle if line.strip()]
+    except (OSError, ValueError):
+        return None
+
+    # Walk back from the newest revision that produced `end`
+    chain = []
+    for entry in reversed(entries):
+        if entry['to'] == end:
+            chain.append(entry)
+            end = entry['from']
+            if end == start:
+                return chain[::-1]
+    return None
+
+
+# Drop the in-process copies (the on-disk snapshot is kept)
+def clear_memory_cache():
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+The model's inputs and outputs, shared by every module that scores.
+
+Kept free of imports so the prediction path can label a result without
+loading pandas or joblib.
+"""
+
+# Column order the model was trained on (diabetes.csv without Outcome)
+FEATURES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI',
+            'DiabetesPedigreeFunction', 'Age']
+LABELS = {0: 'Not Diabetic', 1: 'Diabetic'}
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Durable local queue for the Feedback tab.
+
+A submission is one insert into a SQLite queue (see sqlite_queue.py), so the
+Send button returns at once and nothing is lost if the remote form endpoint
+is slow or down. A background forwarder claims due submissions in batches
+and posts them over one pooled `requests.Session` (a few requests in flight
+at a time) with timeouts. Each submission carries an Idempotency-Key header
+so a retry after a lost response, or after another process takes over an
+expired lease, can't post it twice. Retryable failures (connection errors,
+timeouts, 429, 5xx) back off exponentially, honouring Retry-After.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from sqlite_queue import LEASE, SENDING, LeaseQueue  # noqa: F401 (SENDING: a submission's status)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FEEDBACK_FILE = os.path.join(BASE_DIR, '.outbox', 'feedback.db')
+FORMSPREE_ENDPOINT = "https://formspree.io/f/mbjnrbvv"
+
+PENDING = 'pending'
+FORWARDED = 'forwarded'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    endpoint TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    forwarded REAL,
+    claimed_by TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS feedback_due ON feedback (endpoint, status, next_attempt);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableError(Exception):
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class FeedbackQueue(LeaseQueue):
+
+    table = 'feedback'
+    scope_column = 'endpoint'
+    schema = _SCHEMA
+    waiting = PENDING
+    claim_columns = ('idempotency_key', 'payload')
+
+    def __init__(self, endpoint=FORMSPREE_ENDPOINT, path=FEEDBACK_FILE, batch_size=20, concurrency=4,
+                 timeout=(3.05, 10.0), max_attempts=8, backoff=2.0, max_backoff=600.0, lease=LEASE):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._http = None
+        self._http_lock = threading.Lock()
+        self._pool = None
+        self._thread = None
+        super().__init__(path, endpoint, max_attempts, backoff, max_backoff, lease)
+
+    # Store a submission; returns its id. Resubmitting the same key is a no-op.
+    def submit(self, payload, key=None):
+        key = key or uuid.uuid4().hex
+        now = time.time()
+        with self._db() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO feedback (endpoint, idempotency_key, payload, status, next_attempt, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (self.endpoint, key, json.dumps(payload), PENDING, now, now))
+            row = db.execute("SELECT id FROM feedback WHERE idempotency_key = ?", (key,)).fetchone()
+        self._wakeup.set()
+        return row[0]
+
+    def status(self, feedback_id):
+        row = self._db().execute("SELECT status, attempts, last_error, created, forwarded FROM feedback WHERE id = ?",
+                                 (feedback_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('status', 'attempts', 'last_error', 'created', 'forwarded'), row))
+
+    # One keep-alive session with a connection per concurrent request
+    def _session(self):
+        with self._http_lock:
+            if self._http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['Accept'] = 'application/json'
+                self._http = session
+            return self._http
+
+    def _post(self, key, payload):
+        import requests
+        try:
+            response = self._session().post(self.endpoint, data=json.loads(payload), timeout=self.timeout,
+                                            headers={'Idempotency-Key': key})
+        except (requests.ConnectionError, requests.Timeout) as error:
+            raise RetryableError(repr(error))
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"HTTP {response.status_code}", _retry_after(response))
+        if response.status_code >= 400:
+            raise ValueError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    def _attempt(self, claimed):
+        feedback_id, key, payload, attempts = claimed
+        try:
+            self._post(key, payload)
+        except Exception as error:
+            return feedback_id, attempts + 1, error
+        return feedback_id, attempts + 1, None
+
+    # Forward one batch; all status updates go in one transaction, and only
+    # for submissions this process still holds the claim on
+    def forward_batch(self):
+        claimed = self._claim(self.batch_size)
+        if self.concurrency > 1 and len(claimed) > 1:
+            if self._pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='feedback-post')
+            results = list(self._pool.map(self._attempt, claimed))
+        else:
+            results = [self._attempt(row) for row in claimed]
+
+        now = time.time()
+        with self._db() as db:
+            for feedback_id, attempts, error in results:
+                if error is None:
+                    self._release(db, feedback_id, FORWARDED, attempts=attempts, forwarded=now, last_error=None)
+                elif not isinstance(error, RetryableError) or attempts >= self.max_attempts:
+                    self._release(db, feedback_id, FAILED, attempts=attempts, last_error=str(error))
+                else:
+                    self._retry(db, feedback_id, attempts, str(error), error.retry_after)
+        return len(claimed)
+
+    # The forwarder never dies: any error (a locked or unreadable database, a
+    # bug) is logged and the loop carries on after a pause
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                if self.forward_batch():
+                    continue
+                timeout = self._idle_timeout()
+            except Exception:
+                logger.exception("Feedback forwarder failed, retrying")
+                timeout = 5.0
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._work, name='feedback-forwarder', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_lock = threading.Lock()
+_queues = {}
+
+
+# Process-wide queue for an endpoint, with its forwarder started on first use
+def get_feedback_queue(endpoint=FORMSPREE_ENDPOINT, path=FEEDBACK_FILE):
+    key = (endpoint, os.path.abspath(path))
+    with _lock:
+        queue = _queues.get(key)
+        if queue is None:
+            queue = _queues[key] = FeedbackQueue(endpoint, path).start()
+        return queue
+
+
+def submit_feedback(payload, endpoint=FORMSPREE_ENDPOINT, key=None):
+    return get_feedback_queue(endpoint).submit(payload, key)
+
+
+# Idempotency key for a message from one browser session, so a double click
+# on Send doesn't deliver it twice
+def session_key(session_state, message):
+    session = session_state.setdefault('feedback_session', uuid.uuid4().hex)
+    return f"{session}:{hashlib.sha256(message.encode()).hexdigest()[:16]}"
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Dependency-free scorer for the linear SVC in trained_model.sav.
+
+A linear SVC decides with sign(x . coef + intercept), so the pickled model can
+be reduced to its coefficients, intercept, class labels and feature order.
+`export` writes those to a small JSON artifact; `LinearScorer` reloads them
+with NumPy alone and offers the same `predict` contract as the sklearn model,
+plus per-feature `explain`.
+
+    python linear_model.py export   # model.sav -> model.linear.json
+    python linear_model.py check    # parity against the sklearn model on diabetes.csv
+
+Both default to the files of the registry's active version, falling back to
+trained_model.sav / trained_model.linear.json when there is none.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from model_registry import active_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The notebook's files, used when the registry has no active version
+MODEL_FILE = os.path.join(BASE_DIR, 'trained_model.sav')
+LINEAR_MODEL_FILE = os.path.join(BASE_DIR, 'trained_model.linear.json')
+DATA_FILE = os.path.join(BASE_DIR, 'diabetes.csv')
+
+FORMAT = 'linear-binary-classifier'
+FORMAT_VERSION = 1
+
+
+class LinearScorer:
+
+    def __init__(self, features, coef, intercept, classes, metadata=None):
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.coef_ = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+        self.intercept_ = np.asarray([intercept], dtype=np.float64).reshape(1)
+        self.classes_ = np.asarray(classes)
+        self.metadata = metadata or {}
+        self._weights = self.coef_[0]
+        self._bias = float(self.intercept_[0])
+        if len(self._weights) != len(self.feature_names_in_):
+            raise ValueError("coef and features have different lengths")
+
+    @classmethod
+    def from_file(cls, path=None):
+        path = path or default_artifact()
+        with open(path) as handle:
+            artifact = json.load(handle)
+        if artifact.get('format') != FORMAT or artifact.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} {FORMAT} artifact")
+        return cls(artifact['features'], artifact['coef'], artifact['intercept'], artifact['classes'], artifact)
+
+    @classmethod
+    def from_estimator(cls, model):
+        features = getattr(model, 'feature_names_in_', None)
+        scalers = []
+        if hasattr(model, 'steps'):
+            # Pipeline of StandardScalers followed by a linear model: fold the
+            # scaling into the weights so the scorer sees raw features
+            *scalers, (_, model) = model.steps
+            scalers = [step for _, step in scalers]
+            if not all(hasattr(step, 'mean_') and hasattr(step, 'scale_') for step in scalers):
+                raise ValueError("Only StandardScaler steps can be folded into a linear model")
+
+        coef = np.asarray(model.coef_.toarray() if hasattr(model.coef_, 'toarray') else model.coef_)
+        if coef.shape[0] != 1 or len(model.classes_) != 2:
+            raise ValueError("Only binary linear models can be exported")
+        weights = coef[0].astype(np.float64)
+        bias = float(model.intercept_[0])
+        for scaler in reversed(scalers):
+            mean = scaler.mean_ if scaler.with_mean else np.zeros_like(weights)
+            scale = scaler.scale_ if scaler.with_std else np.ones_like(weights)
+            weights = weights / scale
+            bias -= float(np.dot(weights, mean))
+
+        if features is None:
+            features = [f'x{i}' for i in range(len(weights))]
+        return cls(list(features), weights.tolist(), bias, model.classes_.tolist())
+
+    # Accepts a single row, a 2-D array/list or a DataFrame (columns are
+    # reordered by name, like sklearn does for models fitted on DataFrames).
+    # NaN or infinite values raise ValueError, as they do in sklearn.
+    def _as_matrix(self, X):
+        if hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)].to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self._weights):
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {len(self._weights)}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity.")
+        return X
+
+    def decision_function(self, X):
+        return self._as_matrix(X) @ self._weights + self._bias
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+    # Signed contribution of every feature to the decision function relative
+    # to a reference row (None: zeros, i.e. the raw coef * value terms), and
+    # the decision margins. Per row, contributions.sum() plus the reference's
+    # own decision value equals the margin.
+    def explain(self, X, reference=None):
+        X = self._as_matrix(X)
+        contributions = X - reference if reference is not None else X.copy()
+        contributions *= self._weights
+        return contributions, X @ self._weights + self._bias
+
+    def to_dict(self, source=None):
+        artifact = {
+            'format': FORMAT,
+            'format_version': FORMAT_VERSION,
+            'features': list(self.feature_names_in_),
+            'coef': self._weights.tolist(),
+            'intercept': self._bias,
+            'classes': self.classes_.tolist(),
+        }
+        if source is not None:
+            artifact['source'] = os.path.basename(source)
+            artifact['source_sha256'] = _file_hash(source)
+        return artifact
+
+
+def _file_hash(path):
+    with open(path, 'rb') as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+
+_scorers = {}
+
+
+# The registry's active version (see model_registry.py), else the notebook's
+# files; read when called, so a newly activated version is picked up
+def default_model_file():
+    return active_artifact('model') or MODEL_FILE
+
+
+def default_artifact():
+    return active_artifact('linear') or LINEAR_MODEL_FILE
+
+
+# Scorer for an exported artifact, loaded once per process
+def load_scorer(path=None):
+    path = os.path.abspath(path or default_artifact())
+    scorer = _scorers.get(path)
+    if scorer is None:
+        scorer = _scorers[path] = LinearScorer.from_file(path)
+    return scorer
+
+
+def _load_estimator(model_path):
+    import joblib
+    with open(model_path, 'rb') as handle:
+        return joblib.load(handle)
+
+
+def export_linear_model(model_path=None, output_path=None):
+    model_path = model_path or default_model_file()
+    output_path = output_path or default_artifact()
+    scorer = LinearScorer.from_estimator(_load_estimator(model_path))
+    with open(output_path + '.tmp', 'w') as handle:
+        json.dump(scorer.to_dict(source=model_path), handle, indent=2)
+    os.replace(output_path + '.tmp', output_path)
+    return scorer
+
+
+# Rows with a NaN or infinite feature, which both models must reject
+def non_finite_rows(row):
+    rows = []
+    for column in range(len(row)):
+        for value in (np.nan, np.inf, -np.inf):
+            probe = np.array(row, dtype=np.float64)
+            probe[column] = value
+            rows.append(probe.reshape(1, -1))
+    return rows
+
+
+def _rejects(model, X):
+    try:
+        model.predict(X)
+    except ValueError:
+        return True
+    return False
+
+
+# Compare the exported scorer with the sklearn model on a labelled CSV.
+# Returns (rows, mismatched predictions, largest decision function difference,
+# non-finite rows the two treat differently: rejected by one, scored by the other).
+def check_parity(model_path=None, artifact_path=None, data_path=DATA_FILE):
+    import pandas as pd
+
+    model_path = model_path or default_model_file()
+    artifact_path = artifact_path or default_artifact()
+    model = _load_estimator(model_path)
+    scorer = LinearScorer.from_file(artifact_path)
+    X = pd.read_csv(data_path)[list(scorer.feature_names_in_)]
+
+    mismatches = int((model.predict(X) != scorer.predict(X)).sum())
+    difference = float(np.abs(model.decision_function(X) - scorer.decision_function(X)).max())
+    probes = [pd.DataFrame(row, columns=X.columns) for row in non_finite_rows(X.iloc[0].to_numpy())]
+    disagreements = sum(_rejects(model, probe) != _rejects(scorer, probe) for probe in probes)
+    return len(X), mismatches, difference, disagreements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['export', 'check'])
+    parser.add_argument('--model', help='pickled sklearn model (default: the active version\'s)')
+    parser.add_argument('--artifact', help='exported linear artifact (default: the active version\'s)')
+    parser.add_argument('--data', default=DATA_FILE, help='CSV used for the parity check')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        output = args.artifact or default_artifact()
+        scorer = export_linear_model(args.model, output)
+        print(f"Wrote {output} ({len(scorer.feature_names_in_)} features)")
+        return 0
+
+    rows, mismatches, difference, disagreements = check_parity(args.model, args.artifact, args.data)
+    print(f"{rows} rows, {mismatches} mismatched predictions, "
+          f"max decision function difference {difference:.3g}, "
+          f"{disagreements} non-finite rows handled differently")
+    # libsvm sums over the support vectors, so allow for float rounding
+    return 1 if mismatches or disagreements or difference > 1e-6 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+In-process latency metrics for the Streamlit apps.
+
+Stages are timed with `timed("stage")`, usable as a context manager or a
+decorator. Each stage keeps a count, a running sum and a bounded window of
+recent samples from which p50/p95/p99 are computed. The numbers can be dumped
+as Prometheus text, as JSON, or shown in the admin panel.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 2048  # recent samples kept per stage
+
+
+class Histogram:
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.maximum = max(self.maximum, seconds)
+            self._samples.append(seconds)
+
+    # Nearest-rank percentiles over the recent window
+    def quantiles(self, quantiles=QUANTILES):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {q: 0.0 for q in quantiles}
+        return {q: samples[max(0, math.ceil(q * len(samples)) - 1)] for q in quantiles}
+
+    def summary(self):
+        values = self.quantiles()
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.maximum,
+            'p50': values[0.5],
+            'p95': values[0.95],
+            'p99': values[0.99],
+        }
+
+
+_lock = threading.Lock()
+_histograms = {}
+
+
+def histogram(stage):
+    found = _histograms.get(stage)
+    if found is None:
+        with _lock:
+            found = _histograms.setdefault(stage, Histogram())
+    return found
+
+
+def observe(stage, seconds):
+    histogram(stage).observe(seconds)
+
+
+class timed(ContextDecorator):
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        stack = getattr(self._starts, 'stack', None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self._starts.stack.pop())
+        return False
+
+
+# stage -> count/sum/max/p50/p95/p99 (seconds)
+def snapshot():
+    with _lock:
+        stages = sorted(_histograms.items())
+    return {stage: found.summary() for stage, found in stages}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def export_prometheus(prefix='kenyanhospitals_stage_seconds'):
+    lines = [f'# HELP {prefix} Latency of app stages in seconds.', f'# TYPE {prefix} summary']
+    for stage, summary in snapshot().items():
+        label = stage.replace('\\', '\\\\').replace('"', '\\"')
+        for name, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+            lines.append(f'{prefix}{{stage="{label}",quantile="{quantile}"}} {summary[name]:.9f}')
+        lines.append(f'{prefix}_sum{{stage="{label}"}} {summary["sum"]:.9f}')
+        lines.append(f'{prefix}_count{{stage="{label}"}} {summary["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def export_json(path=None):
+    payload = json.dumps({'generated': time.time(), 'pid': os.getpid(), 'stages': snapshot()}, indent=2)
+    if path is not None:
+        with open(path + '.tmp', 'w') as handle:
+            handle.write(payload)
+        os.replace(path + '.tmp', path)
+    return payload
+
+
+# Table of stage latencies plus both export formats, for an admin-only page
+def render_admin_panel(st):
+    import pandas as pd
+
+    st.subheader("Stage latencies")
+    stages = snapshot()
+    if not stages:
+        st.info("No timings recorded yet.")
+        return
+    table = pd.DataFrame.from_dict(stages, orient='index')
+    for column in ('sum', 'max', 'p50', 'p95', 'p99'):
+        table[column] = table[column] * 1000
+    table = table.rename(columns={column: f'{column} (ms)' for column in ('sum', 'max', 'p50', 'p95', 'p99')})
+    st.dataframe(table, use_container_width=True)
+    st.download_button("Prometheus text", export_prometheus(), file_name='metrics.prom')
+    st.download_button("JSON", export_json(), file_name='metrics.json')
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned model registry with hot reload.
+
+    models/
+        ACTIVE                      <- name of the version being served
+        <version>/model.json        <- metadata sidecar (see train_model.py)
+        <version>/model.sav
+        <version>/model.linear.json <- optional NumPy export, preferred when present
+
+One `ModelRegistry` per process serves every session. A watcher thread polls
+the ACTIVE pointer; when it names a new version, that version is loaded in the
+background and swapped in with a single reference assignment, so requests
+already holding the old model finish on it and none are dropped. A version
+that fails to load is reported and the previous one keeps serving.
+
+    python model_registry.py list
+    python model_registry.py activate <version>
+    python model_registry.py register trained_model.sav [--activate]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from metrics import timed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.path.join(BASE_DIR, 'models')
+ACTIVE_FILE = 'ACTIVE'
+METADATA_FILE = 'model.json'
+
+logger = logging.getLogger(__name__)
+
+
+# A loaded version plus what it cost to load
+class LoadedModel:
+
+    def __init__(self, version, model, metadata, load_seconds, memory_bytes, file_bytes):
+        self.version = version
+        self.model = model
+        self.metadata = metadata
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.file_bytes = file_bytes
+        self.loaded_at = time.time()
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'served_by': 'numpy' if 'linear' in self.metadata.get('files', {}) else 'sklearn',
+            'load_ms': self.load_seconds * 1000,
+            'memory_bytes': self.memory_bytes,
+            'file_bytes': self.file_bytes,
+            'loaded_at': self.loaded_at,
+        }
+
+
+class ModelRegistry:
+
+    def __init__(self, root=REGISTRY_DIR, poll_interval=2.0):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._current = None
+        self._pointer = None  # (inode, mtime_ns, size) of ACTIVE when last read; activate() replaces the file
+        self._history = {}  # version -> stats of every version loaded by this process
+        self._errors = {}  # version -> last load error
+        self._reload_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(self._path(name, METADATA_FILE)))
+
+    def metadata(self, version):
+        with open(self._path(version, METADATA_FILE)) as handle:
+            return json.load(handle)
+
+    def active_version(self):
+        try:
+            with open(self._path(ACTIVE_FILE)) as handle:
+                return handle.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    # Point ACTIVE at a version; watchers pick it up on their next poll
+    def activate(self, version):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version {version!r} in {self.root}")
+        pointer = self._path(ACTIVE_FILE)
+        with open(pointer + '.tmp', 'w') as handle:
+            handle.write(version + '\n')
+        os.replace(pointer + '.tmp', pointer)
+
+    # File a version is served from: the NumPy export when it has one
+    def artifact(self, version, metadata=None):
+        files = (metadata or self.metadata(version)).get('files', {})
+        return self._path(version, files.get('linear') or files.get('model', 'model.sav'))
+
+    # Load a version from disk, measuring wall time and estimating its memory
+    def load(self, version):
+        metadata = self.metadata(version)
+        path = self.artifact(version, metadata)
+
+        # Import the loaders first so only the model itself is timed
+        if 'linear' in metadata.get('files', {}):
+            from linear_model import LinearScorer
+        else:
+            import joblib
+
+        start = time.perf_counter()
+        if 'linear' in metadata.get('files', {}):
+            model = LinearScorer.from_file(path)
+        else:
+            with open(path, 'rb') as handle:
+                model = joblib.load(handle)
+        seconds = time.perf_counter() - start
+
+        return LoadedModel(version, model, metadata, seconds, footprint(model), os.path.getsize(path))
+
+    # Re-read the ACTIVE pointer and swap models if it changed. Returns True on a swap.
+    def refresh(self):
+        try:
+            stat = os.stat(self._path(ACTIVE_FILE))
+            pointer = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pointer = None
+        if pointer == self._pointer and self._current is not None:
+            return False
+
+        with self._reload_lock:
+            if pointer == self._pointer and self._current is not None:
+                return False
+            version = self.active_version()
+            if version is None:
+                raise FileNotFoundError(f"No active model: {self._path(ACTIVE_FILE)} is missing or empty")
+            if self._current is not None and self._current.version == version:
+                self._pointer = pointer
+                return False
+            try:
+                with timed('model_load'):
+                    loaded = self.load(version)
+            except Exception as error:
+                self._errors[version] = repr(error)
+                if self._current is None:
+                    raise
+                logger.exception("Could not load model %s, still serving %s", version, self._current.version)
+                self._pointer = pointer
+                return False
+            self._history[version] = loaded.stats()
+            self._errors.pop(version, None)
+            self._pointer = pointer
+            self._current = loaded  # the swap: one reference assignment
+            logger.info("Serving model %s (%.1f ms, %s bytes)", version,
+                        loaded.load_seconds * 1000, loaded.memory_bytes)
+            return True
+
+    # The model being served. Take one reference per request and use it throughout.
+    def current(self):
+        current = self._current
+        if current is None or self._thread is None:
+            self.refresh()
+            current = self._current
+        return current
+
+    def model(self):
+        return self.current().model
+
+    def _watch(self):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Model registry refresh failed")
+
+    def start(self):
+        if self._thread is None:
+            self.refresh()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # One row per version loaded by this process, newest first
+    def report(self):
+        active = self._current.version if self._current is not None else None
+        rows = [dict(stats, active=(version == active), error=self._errors.get(version))
+                for version, stats in self._history.items()]
+        rows += [{'version': version, 'active': False, 'error': error}
+                 for version, error in self._errors.items() if version not in self._history]
+        return sorted(rows, key=lambda row: row.get('loaded_at', 0), reverse=True)
+
+
+# Copy a pickled model (and its linear export, when it has one) into the
+# registry as a new version with a model.json sidecar
+def register(model_path, root=REGISTRY_DIR, version=None, metadata=None):
+    import joblib
+    from linear_model import LinearScorer
+
+    with open(model_path, 'rb') as handle:
+        digest = hashlib.sha256(handle.read()).hexdigest()
+        handle.seek(0)
+        estimator = joblib.load(handle)
+
+    created = datetime.now(timezone.utc)
+    version = version or f"{created:%Y%m%d-%H%M%S}-{digest[:8]}"
+    target = os.path.join(root, version)
+    os.makedirs(target)
+    shutil.copyfile(model_path, os.path.join(target, 'model.sav'))
+
+    files = {'model': 'model.sav'}
+    try:
+        scorer = LinearScorer.from_estimator(estimator)
+    except (AttributeError, ValueError):
+        scorer = None
+    if scorer is not None:
+        with open(os.path.join(target, 'model.linear.json'), 'w') as handle:
+            json.dump(scorer.to_dict(source=model_path), handle, indent=2)
+        files['linear'] = 'model.linear.json'
+
+    features = getattr(estimator, 'feature_names_in_', None)
+    sidecar = {
+        'version': version,
+        'created': created.isoformat(),
+        'features': list(features) if features is not None else None,
+        'classes': [int(c) for c in estimator.classes_],
+        'files': files,
+        'source': {'file': os.path.basename(model_path), 'sha256': digest},
+    }
+    sidecar.update(metadata or {})
+    with open(os.path.join(target, METADATA_FILE), 'w') as handle:
+        json.dump(sidecar, handle, indent=2)
+    return version
+
+
+# Memory a loaded model holds, estimated from its pickled size: the fitted
+# arrays dominate and pickle stores them raw. Process-wide measures (tracemalloc,
+# RSS) also count whatever other threads allocate during a load.
+def footprint(model):
+    try:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+
+
+# File the active version is served from, for CLIs that default to the model
+# the apps serve (`kind` 'model' or 'linear' asks for that file specifically).
+# None when there is no active version or it has no such file.
+def active_artifact(kind=None, root=REGISTRY_DIR):
+    registry = ModelRegistry(root)
+    version = registry.active_version()
+    if version is None:
+        return None
+    try:
+        metadata = registry.metadata(version)
+    except (OSError, ValueError):
+        return None
+    if kind is None:
+        return registry.artifact(version, metadata)
+    name = metadata.get('files', {}).get(kind)
+    return registry._path(version, name) if name else None
+
+
+_lock = threading.Lock()
+_registries = {}
+
+
+# Process-wide registry, shared by every session and watching ACTIVE
+def get_registry(root=REGISTRY_DIR):
+    root = os.path.abspath(root)
+    with _lock:
+        registry = _registries.get(root)
+        if registry is None:
+            registry = _registries[root] = ModelRegistry(root).start()
+        return registry
+
+
+# Loaded versions with their load time and memory, for an admin-only page
+def render_registry_panel(st, registry=None):
+    import pandas as pd
+
+    registry = registry or get_registry()
+    st.subheader("Models")
+    st.write(f"Active: `{registry.active_version()}` — available: {', '.join(registry.versions()) or 'none'}")
+    rows = registry.report()
+    if rows:
+        st.dataframe(pd.DataFrame(rows).set_index('version'), use_container_width=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='versions, the active one, and what each costs to load')
+    activate = commands.add_parser('activate', help='point ACTIVE at a version')
+    activate.add_argument('version')
+    add = commands.add_parser('register', help='add a pickled model as a new version')
+    add.add_argument('model')
+    add.add_argument('--version')
+    add.add_argument('--activate', action='store_true')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Active model: {args.version}")
+    elif args.command == 'register':
+        version = register(args.model, args.root, args.version)
+        if args.activate:
+            registry.activate(version)
+        print(f"Registered {version}" + (" (active)" if args.activate else ""))
+    else:
+        active = registry.active_version()
+        for version in registry.versions():
+            stats = registry.load(version).stats()
+            print(f"{'*' if version == active else ' '} {version}  {stats['served_by']:<7} "
+                  f"load {stats['load_ms']:7.2f} ms  memory {stats['memory_bytes'] or 0:>9,} B  "
+                  f"file {stats['file_bytes']:>9,} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide memoization of single-row predictions.
+
+Streamlit reruns and the sample rows on the help page send the same inputs
+again and again. Predictions are cached in a bounded LRU with a TTL,
+keyed on the validated float feature tuple plus the version of the model that
+produced them. When the registry swaps in a new model, the cache is cleared.
+Hit, miss, expiry and eviction counters show how much it helps.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+MAXSIZE = 4096
+TTL = 3600.0  # seconds
+N_FEATURES = 8
+
+
+class PredictionCache:
+
+    def __init__(self, maxsize=MAXSIZE, ttl=TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires, value), least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # (True, value) on a live hit, (False, None) otherwise
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Drop everything computed by another model version
+    def use_version(self, version):
+        if version == self.version:
+            return
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self._entries.clear()
+                    self.invalidations += 1
+                self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'version': self.version,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+# Validated, hashable form of one feature row: a tuple of finite floats
+# (-0.0 and 0.0, or 35 and 35.0, give the same key)
+def feature_key(features, n_features=N_FEATURES):
+    values = tuple(float(value) + 0.0 for value in features)
+    if len(values) != n_features:
+        raise ValueError(f"Expected {n_features} features, got {len(values)}")
+    if not all(math.isfinite(value) for value in values):
+        raise ValueError("Features must be finite numbers")
+    return values
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
+
+
+# Prediction for one feature row from the active model (or the already
+# resolved `loaded` one), memoized
+def cached_predict(features, registry=None, cache=None, loaded=None):
+    if loaded is None:
+        if registry is None:
+            from model_registry import get_registry
+            registry = get_registry()
+        loaded = registry.current()
+    if cache is None:
+        cache = get_cache()
+
+    key = feature_key(features)
+    cache.use_version(loaded.version)
+    found, prediction = cache.get((loaded.version, key))
+    if not found:
+        prediction = loaded.predict([key])[0]
+        cache.put((loaded.version, key), prediction)
+    return prediction
+
+
+# Hit/miss counters, for an admin-only page
+def render_cache_panel(st, cache=None):
+    stats = (get_cache() if cache is None else cache).stats()
+    st.subheader("Prediction cache")
+    columns = st.columns(4)
+    columns[0].metric("Hit rate", f"{stats['hit_rate']:.0%}")
+    columns[1].metric("Hits / misses", f"{stats['hits']} / {stats['misses']}")
+    columns[2].metric("Entries", f"{stats['size']} / {stats['maxsize']}")
+    columns[3].metric("Evicted / expired", f"{stats['evictions']} / {stats['expired']}")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Thin client for prediction_service.py with in-process fallback.
+
+When PREDICTION_SERVICE_URL is set (e.g. http://127.0.0.1:8502), predictions
+are requested from the service with a short timeout. If it is unset, slow,
+down or returns an error, the row is scored in process instead, and the
+service is skipped for RETRY_AFTER seconds so a dead service doesn't add its
+timeout to every click.
+"""
+
+import logging
+import os
+import threading
+import time
+
+TIMEOUT = 0.5  # seconds, connect and read
+RETRY_AFTER = 30.0
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_unavailable_until = {}  # url -> monotonic time to try it again
+
+
+def service_url():
+    return os.environ.get('PREDICTION_SERVICE_URL', '').rstrip('/') or None
+
+
+# One keep-alive HTTP session per thread
+def _session():
+    session = getattr(_local, 'session', None)
+    if session is None:
+        import requests
+        session = _local.session = requests.Session()
+    return session
+
+
+def _remote_predict(url, features, timeout):
+    response = _session().post(f'{url}/predict', json={'features': [float(value) for value in features]},
+                               timeout=timeout)
+    response.raise_for_status()
+    payload = response.json()
+    return payload['prediction'], payload.get('version')
+
+
+def _local_predict(features):
+    from model_registry import get_registry
+    from prediction_cache import cached_predict
+    loaded = get_registry().current()
+    return cached_predict(features, loaded=loaded), loaded.version
+
+
+# (prediction, model version) for one feature row: from the service when
+# configured and healthy, otherwise from `local` (the in-process cached
+# active model by default), which returns the same pair
+def predict(features, local=None, url=None, timeout=TIMEOUT):
+    local = local or _local_predict
+    url = url or service_url()
+    if url is None or time.monotonic() < _unavailable_until.get(url, 0.0):
+        return local(features)
+
+    try:
+        return _remote_predict(url, features, timeout)
+    except Exception as error:
+        _unavailable_until[url] = time.monotonic() + RETRY_AFTER
+        logger.warning("Prediction service at %s failed (%r); scoring in process for %.0f s",
+                       url, error, RETRY_AFTER)
+        return local(features)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Optional prediction microservice with request micro-batching (ASGI).
+
+    python prediction_service.py [--port 8502] [--window-ms 2] [--max-batch 64] [--no-batching]
+
+POST /predict with {"features": [8 numbers]} returns {"prediction": 0 or 1,
+"version": ..., "batch_size": ...}. Concurrent requests are collected for up
+to --window-ms (or until --max-batch rows are waiting) and scored with one
+vectorized `predict` call. The model is the registry's active version (hot
+reloaded like in the apps) unless --model names a pickled model or linear
+artifact. GET /health reports the model and batching counters; GET /metrics
+serves the stage latencies in Prometheus text format.
+
+The apps talk to it through prediction_client.py when PREDICTION_SERVICE_URL
+is set.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from metrics import export_prometheus, observe, timed
+from prediction_cache import feature_key
+
+WINDOW = 0.002  # seconds a batch stays open for more requests
+MAX_BATCH = 64
+
+
+# A fixed model behind the same interface as ModelRegistry.current()
+class StaticModel:
+
+    def __init__(self, model, version):
+        self.model = model
+        self.version = version
+
+    def current(self):
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+# Collects single rows from concurrent requests and scores them together
+class MicroBatcher:
+
+    def __init__(self, source, window=WINDOW, max_batch=MAX_BATCH):
+        self.source = source
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self.largest = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect(self):
+        pending = [await self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Anything that arrived meanwhile joins without waiting any longer
+        while len(pending) < self.max_batch and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        return pending
+
+    async def _run(self):
+        while True:
+            pending = await self._collect()
+            pending = [(row, future) for row, future in pending if not future.cancelled()]
+            if not pending:
+                continue
+            try:
+                loaded = self.source.current()
+                with timed('service_predict_batch'):
+                    predictions = loaded.predict(np.array([row for row, _ in pending]))
+            except Exception as error:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.batches += 1
+            self.rows += len(pending)
+            self.largest = max(self.largest, len(pending))
+            for (_, future), prediction in zip(pending, predictions):
+                if not future.done():
+                    future.set_result((prediction.item(), loaded.version, len(pending)))
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch': self.rows / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest,
+        }
+
+
+def create_app(source=None, batching=True, window=WINDOW, max_batch=MAX_BATCH):
+    if source is None:
+        from model_registry import get_registry
+        source = get_registry()
+    batcher = MicroBatcher(source, window, max_batch) if batching else None
+
+    async def predict(request):
+        start = time.perf_counter()
+        try:
+            payload = await request.json()
+            row = feature_key(payload['features'])
+        except (ValueError, KeyError, TypeError) as error:
+            return JSONResponse({'error': str(error) or 'features missing'}, status_code=400)
+
+        if batcher is not None:
+            prediction, version, size = await batcher.submit(row)
+        else:
+            loaded = source.current()
+            prediction, version, size = loaded.predict([row])[0].item(), loaded.version, 1
+        observe('service_request', time.perf_counter() - start)
+        return JSONResponse({'prediction': prediction, 'version': version, 'batch_size': size})
+
+    async def health(request):
+        return JSONResponse({
+            'status': 'ok',
+            'version': source.current().version,
+            'batching': batcher.stats() if batcher is not None else None,
+        })
+
+    async def prometheus(request):
+        return PlainTextResponse(export_prometheus())
+
+    async def lifespan(app):
+        if batcher is not None:
+            batcher.start()
+        yield
+        if batcher is not None:
+            await batcher.stop()
+
+    app = Starlette(routes=[
+        Route('/predict', predict, methods=['POST']),
+        Route('/health', health),
+        Route('/metrics', prometheus),
+    ], lifespan=lifespan)
+    app.state.batcher = batcher
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--window-ms', type=float, default=WINDOW * 1000)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--no-batching', action='store_true', help='score every request on its own')
+    parser.add_argument('--model', help='serve this pickled model or .linear.json artifact instead of the registry')
+    args = parser.parse_args(argv)
+
+    source = None
+    if args.model:
+        from batch_scoring import load_model
+        source = StaticModel(load_model(args.model), args.model)
+    app = create_app(source, not args.no_batching, args.window_ms / 1000, args.max_batch)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide services behind every page of app.py.
+
+Each service is created once per server process and shared by all sessions
+and pages: the model registry (hot-reloaded from models/) and its shadow
+evaluator, the prediction audit log, the facility index and geo index, the
+email outbox and the feedback queue. Pages only call the functions below. Heavy modules are
+imported on first use, so a page that doesn't need the model or pandas
+doesn't load them.
+"""
+
+import logging
+
+from metrics import timed
+
+SENDER_NAME = "Winfry Nyarangi"
+SENDER_EMAIL = "Winfrynyarangi@gmail.com"
+SENDER_PASSWORD = "zglj lqmq jqkw cioy"
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
+FEEDBACK_ENDPOINT = "https://formspree.io/f/mbjnrbvv"
+
+LINKEDIN_PROFILE = "https://www.linkedin.com/in/winfry-nyarangi-213a20225/"
+WEBAPP_URL = "https://diabetespredictionsystem-by-akshay.streamlit.app/"
+BANNER_URL = 'https://d2jx2rerrg6sh3.cloudfront.net/images/Article_Images/ImageForArticle_22744_16565132428524067.jpg'
+TIPS = """<p><strong><u>Tips for Diabetic Patients:</u></strong></p><ol>...</ol><p><strong><u>Tips for Diabetes Prevention:</u></strong></p><ol>...</ol>"""
+
+logger = logging.getLogger(__name__)
+
+
+# The diabetes model currently active in models/ (hot-swapped when
+# models/ACTIVE changes); loads are timed under model_load by the registry
+def registry():
+    from model_registry import get_registry
+    return get_registry()
+
+
+# Candidate models scored on the same rows in the background (see shadow.py)
+def shadow():
+    from shadow import get_shadow
+    return get_shadow(registry())
+
+
+# ('Diabetic' or 'Not Diabetic', model version) for one feature row. Scored
+# by the prediction service when PREDICTION_SERVICE_URL is set, otherwise in
+# process, where repeated inputs come from an LRU keyed on the model version.
+# The row is then queued for the shadow models if models/SHADOW lists any;
+# neither step loads the local model while the service answers.
+@timed('predict')
+def diagnose(features):
+    from features import LABELS
+    from prediction_client import predict
+    from shadow import shadowing
+    prediction, version = predict(features)
+    evaluator = shadowing()
+    if evaluator is not None:
+        evaluator.observe(features, int(prediction), version)
+    return LABELS[int(prediction)], version
+
+
+def predict(features):
+    return diagnose(features)[0]
+
+
+def audit():
+    from audit_log import get_audit_log
+    return get_audit_log()
+
+
+# Record a prediction shown to a user in the audit log (see audit_log.py),
+# under the version diagnose() returned (the active one if not given);
+# returns the id its county choice is recorded under
+def audit_prediction(features, diagnosis, version=None):
+    return audit().record_prediction(features, diagnosis, version or registry().current().version)
+
+
+def audit_county(prediction_id, county):
+    audit().record_county(prediction_id, county)
+
+
+# Per-feature contributions behind a prediction (None when the active model isn't linear)
+@timed('explain')
+def explain(features):
+    from explanations import explain
+    try:
+        return explain(features, registry().model())
+    except (OSError, ValueError):
+        return None
+
+
+# The indexes time their own (re)builds, and the store its reads, under the
+# index_build, geo_index_build and load_data stages (see metrics.py)
+def facility_index():
+    from facility_index import load_index
+    return load_index()
+
+
+def geo_index():
+    from facility_geo import load_geo_index
+    return load_geo_index(facility_index().data)
+
+
+def outbox():
+    from email_outbox import get_outbox
+    return get_outbox(SMTP_HOST, SMTP_PORT, SENDER_EMAIL, SENDER_PASSWORD)
+
+
+# Queue the thank-you email with the test result and contact details; the
+# outbox worker sends it over a pooled SMTP connection. Returns the message id.
+@timed('email')
+def send_result_email(name, email, diagnosis, explanation=None):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from explanations import explanation_html
+
+    banner = f"""<img src="{BANNER_URL}" alt="Banner Image" style="max-width: 100%; height: auto; margin-top: 20px;">"""
+    color = "red" if diagnosis == "Diabetic" else "green"
+    body = f"Dear {name},<br><br>Thank you for visiting the Diabetes Prediction Web Application!<br><br><b>Test Result:</b> <b style='color:{color}'>{diagnosis}</b>{explanation_html(explanation)}{banner}{TIPS}<br><br>WebApp URL: {WEBAPP_URL}<br><br>Connect: {LINKEDIN_PROFILE}<br><br><br>Best regards,<br>Akshay Ravella"
+
+    message = MIMEMultipart()
+    message["From"] = f"{SENDER_NAME} <{SENDER_EMAIL}>"
+    message["To"] = email
+    message["Subject"] = "Thank You for Visiting Diabetes Prediction Web Application!"
+    message.attach(MIMEText(body, "html"))
+    return outbox().enqueue(SENDER_EMAIL, email, message.as_string())
+
+
+def email_status(message_id):
+    from email_outbox import message_status
+    return message_status(message_id)
+
+
+# Stored locally and forwarded to Formspree in the background. False if the
+# local queue couldn't take it.
+def submit_feedback(message, session_state):
+    import sqlite3
+    from feedback_queue import session_key, submit_feedback
+    try:
+        submit_feedback({"message": message}, FEEDBACK_ENDPOINT, key=session_key(session_state, message))
+    except sqlite3.Error as error:
+        logger.error("Feedback not queued: %s", error)
+        return False
+    return True
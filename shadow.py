@@ -0,0 +1,512 @@
+# -*- coding: utf-8 -*-
+"""
+Shadow evaluation of candidate models on live prediction requests.
+
+    models/
+        SHADOW                      <- candidate versions, one per line
+
+Every row `services.predict` scores is also handed to the process-wide
+`ShadowEvaluator`. On the request path that is one append to a bounded
+in-memory deque; while none are listed it is at most one read of
+models/SHADOW every CHECK_INTERVAL, without loading the registry. A
+background worker, started once SHADOW lists a version and gone again once
+it lists none, sleeps until rows arrive and takes them off the deque in
+batches. It scores each batch
+with every candidate version in models/SHADOW (loaded through the model
+registry, next to the one being served) in one call per model. For every row
+and candidate it stores in SQLite whether the candidate agreed with what the
+user was served. The first few rows of each batch are also scored one at a
+time by the active model and each candidate, to compare single-row latency.
+At normal traffic every batch is one row, so every request is timed. When
+the deque is full, rows are dropped and counted rather than making the
+request wait. Results older than MAX_AGE, and the oldest beyond MAX_ROWS,
+are pruned as the worker goes. The served model is never changed here;
+promote a candidate with `model_registry.py activate`.
+
+    python shadow.py add <version>       # start shadowing a registered version
+    python shadow.py remove <version>
+    python shadow.py list
+    python shadow.py report [--hours 24]
+    python shadow.py prune [--days 30] [--rows 1000000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHADOW_DB = os.path.join(BASE_DIR, '.shadow', 'shadow.db')
+SHADOW_FILE = 'SHADOW'
+MAXSIZE = 10000  # rows waiting to be scored
+BATCH_SIZE = 256
+TIMED_ROWS = 8  # rows per batch also scored one at a time for latency
+MAX_AGE = 30 * 86400.0  # seconds a result is kept
+MAX_ROWS = 1_000_000  # results kept, newest first
+PRUNE_INTERVAL = 600.0  # seconds between prunes by the worker
+CHECK_INTERVAL = 2.0  # seconds between SHADOW reads by shadowing() while nothing is listed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shadow (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    served_version TEXT,
+    candidate TEXT NOT NULL,
+    features TEXT NOT NULL,
+    served INTEGER NOT NULL,
+    predicted INTEGER,
+    served_ms REAL,
+    candidate_ms REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS shadow_candidate ON shadow (candidate, created);
+CREATE INDEX IF NOT EXISTS shadow_created ON shadow (created);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+# Candidate versions listed in a SHADOW file, in order, without duplicates
+def read_candidates(path):
+    try:
+        with open(path) as handle:
+            lines = [line.strip() for line in handle]
+    except FileNotFoundError:
+        return []
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith('#')))
+
+
+def write_candidates(path, versions):
+    with open(path + '.tmp', 'w') as handle:
+        handle.writelines(version + '\n' for version in versions)
+    os.replace(path + '.tmp', path)
+
+
+# One prediction and the milliseconds it took
+def _timed_predict(loaded, X):
+    start = time.perf_counter()
+    prediction = loaded.predict(X)[0]
+    return int(prediction), (time.perf_counter() - start) * 1000
+
+
+class ShadowEvaluator:
+
+    def __init__(self, registry, path=SHADOW_DB, maxsize=MAXSIZE, batch_size=BATCH_SIZE, timed_rows=TIMED_ROWS,
+                 poll_interval=2.0, idle_wait=0.05, max_age=MAX_AGE, max_rows=MAX_ROWS,
+                 prune_interval=PRUNE_INTERVAL):
+        self.registry = registry
+        self.path = path
+        self.shadow_file = os.path.join(registry.root, SHADOW_FILE)
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.timed_rows = timed_rows
+        self.poll_interval = poll_interval
+        self.idle_wait = idle_wait
+        self.max_age = max_age
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self.candidates = ()  # versions loaded and being shadowed; observe() is a no-op while empty
+        self.listed = ()  # versions SHADOW names, loaded or not; the worker exits while empty
+        self.observed = 0
+        self.dropped = 0
+        self.scored = 0
+        self.processed = 0  # rows taken off the deque, scored or not
+        self._models = {}  # version -> LoadedModel
+        self._errors = {}  # version -> last load error
+        self._pointer = None  # (mtime_ns, size) of SHADOW when last read
+        self._pending = deque()
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._next_check = 0.0  # when observe() next looks for a SHADOW file
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    # Called on the request path with the row, what the user was served and,
+    # when known, the model version that served it (else the active one)
+    def observe(self, features, served, version=None):
+        if not self.candidates:
+            if self._thread is None and time.monotonic() >= self._next_check:
+                self._check()
+            return
+        if len(self._pending) >= self.maxsize:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), tuple(features), served, version))
+        self.observed += 1
+        if len(self._pending) == 1:
+            # The worker sleeps on an empty deque. Two racing appends can both
+            # miss this, which only delays the batch to the worker's next poll.
+            self._wakeup.set()
+
+    # Start the worker once SHADOW lists a version; at most one file read per
+    # poll_interval on the request path while no worker runs
+    def _check(self):
+        self._next_check = time.monotonic() + self.poll_interval
+        if read_candidates(self.shadow_file):
+            self.start()
+
+    # Re-read SHADOW and load or unload candidates if it changed. Returns True on a change.
+    def refresh(self):
+        try:
+            stat = os.stat(self.shadow_file)
+            pointer = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pointer = None
+        if pointer == self._pointer:
+            return False
+        self._pointer = pointer
+
+        models = {}
+        self.listed = tuple(read_candidates(self.shadow_file))
+        for version in self.listed:
+            loaded = self._models.get(version)
+            if loaded is None:
+                try:
+                    loaded = self.registry.load(version)
+                except Exception as error:
+                    self._errors[version] = repr(error)
+                    logger.exception("Could not load shadow model %s", version)
+                    continue
+            self._errors.pop(version, None)
+            models[version] = loaded
+        self._models = models
+        self.candidates = tuple(models)
+        logger.info("Shadowing %s", ', '.join(self.candidates) or 'no models')
+        return True
+
+    # Score a batch of observed rows with every candidate and store one result per row and candidate
+    def evaluate(self, batch):
+        active = self.registry.current()
+        models = [(version, loaded) for version, loaded in self._models.items() if version != active.version]
+        X = [list(features) for _, features, _, _ in batch]
+        timed = [X[number:number + 1] for number in range(min(len(X), self.timed_rows))]
+        served_ms = [_timed_predict(active, row)[1] for row in timed]
+        encoded = [json.dumps(features) for _, features, _, _ in batch]
+        rows = []
+        for version, loaded in models:
+            try:
+                predicted = [int(prediction) for prediction in loaded.predict(X)]
+                candidate_ms = [_timed_predict(loaded, row)[1] for row in timed]
+                error = None
+            except Exception as failure:
+                predicted, candidate_ms, error = [None] * len(X), [], repr(failure)
+            for number, (created, _, served, served_version) in enumerate(batch):
+                rows.append((created, served_version or active.version, version, encoded[number], int(served),
+                             predicted[number],
+                             served_ms[number] if number < len(served_ms) else None,
+                             candidate_ms[number] if number < len(candidate_ms) else None, error))
+        with self._db() as db:
+            db.executemany(
+                "INSERT INTO shadow (created, served_version, candidate, features, served, predicted, served_ms, "
+                "candidate_ms, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.scored += len(batch)
+        return len(rows)
+
+    # Drop this evaluator's results past its retention. Returns the rows deleted.
+    def prune(self):
+        return prune(self.path, self.max_age, self.max_rows, db=self._db())
+
+    def _take(self):
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popleft())
+        return batch
+
+    # Sleeps while the deque is empty, waking for new rows, to re-read SHADOW
+    # every poll_interval and to prune every prune_interval. Exits once SHADOW
+    # lists no versions and every row is scored; observe() starts it again.
+    def _work(self):
+        refreshed = pruned = float('-inf')
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            if now - refreshed >= self.poll_interval:
+                refreshed = now
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Shadow refresh failed")
+                with self._thread_lock:
+                    if not self.listed and not self._pending:
+                        self._thread = None
+                        return
+            if now - pruned >= self.prune_interval:
+                pruned = now
+                try:
+                    self.prune()
+                except Exception:
+                    logger.exception("Shadow pruning failed")
+            batch = self._take()
+            if batch:
+                try:
+                    self.evaluate(batch)
+                except Exception:
+                    logger.exception("Shadow evaluation of %d rows failed", len(batch))
+                self.processed += len(batch)
+                # Unless rows are piling up, let them collect: fewer, larger
+                # batches take the GIL from request threads less often
+                if len(batch) < self.batch_size:
+                    self._stopping.wait(self.idle_wait)
+                continue
+            self._wakeup.clear()
+            if not self._pending:
+                self._wakeup.wait(max(0.0, refreshed + self.poll_interval - time.monotonic()))
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._work, name='shadow-evaluator', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    # Block until every observed row has been scored (used by scripts and benchmarks)
+    def drain(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.processed < self.observed:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        return {
+            'candidates': list(self.candidates),
+            'errors': dict(self._errors),
+            'observed': self.observed,
+            'dropped': self.dropped,
+            'scored': self.scored,
+            'queued': len(self._pending),
+            'running': self._thread is not None,
+        }
+
+    def report(self, since=None):
+        return report(self.path, since)
+
+
+# Delete results older than `max_age` seconds, then all but the newest
+# `max_rows`. Returns the rows deleted.
+def prune(path=SHADOW_DB, max_age=MAX_AGE, max_rows=MAX_ROWS, db=None):
+    if db is None:
+        if not os.path.exists(path):
+            return 0
+        connection = sqlite3.connect(path, timeout=30)
+    else:
+        connection = db
+    try:
+        with connection:
+            deleted = 0
+            if max_age is not None:
+                deleted += connection.execute("DELETE FROM shadow WHERE created < ?",
+                                              (time.time() - max_age,)).rowcount
+            if max_rows is not None:
+                deleted += connection.execute(
+                    "DELETE FROM shadow WHERE id <= (SELECT id FROM shadow ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (max_rows,)).rowcount
+        return deleted
+    finally:
+        if db is None:
+            connection.close()
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+# One row per candidate and served version: agreement with what users were
+# served, the rows it would have flipped each way, and its single-row latency
+# against the active model's on the timed rows
+def report(path=SHADOW_DB, since=None):
+    if not os.path.exists(path):
+        return []
+    db = sqlite3.connect(path, timeout=30)
+    try:
+        rows = db.execute(
+            "SELECT candidate, served_version, served, predicted, served_ms, candidate_ms, created FROM shadow "
+            "WHERE created >= ? ORDER BY candidate, served_version", (since or 0.0,)).fetchall()
+    finally:
+        db.close()
+
+    groups = {}
+    for candidate, served_version, served, predicted, served_ms, candidate_ms, created in rows:
+        groups.setdefault((candidate, served_version), []).append(
+            (served, predicted, served_ms, candidate_ms, created))
+
+    summary = []
+    for (candidate, served_version), group in groups.items():
+        scored = [row for row in group if row[1] is not None]
+        timed = [row for row in scored if row[2] is not None and row[3] is not None]
+        served_ms = [row[2] for row in timed]
+        candidate_ms = [row[3] for row in timed]
+        deltas = [row[3] - row[2] for row in timed]
+        summary.append({
+            'candidate': candidate,
+            'served_version': served_version,
+            'requests': len(group),
+            'errors': len(group) - len(scored),
+            'timed': len(timed),
+            'agreement': sum(row[0] == row[1] for row in scored) / len(scored) if scored else None,
+            'to_diabetic': sum(row[0] == 0 and row[1] == 1 for row in scored),
+            'to_not_diabetic': sum(row[0] == 1 and row[1] == 0 for row in scored),
+            'served_p50_ms': _percentile(served_ms, 0.5),
+            'candidate_p50_ms': _percentile(candidate_ms, 0.5),
+            'candidate_p99_ms': _percentile(candidate_ms, 0.99),
+            'delta_p50_ms': _percentile(deltas, 0.5),
+            'first': min(row[4] for row in group),
+            'last': max(row[4] for row in group),
+        })
+    return summary
+
+
+_lock = threading.Lock()
+_evaluators = {}
+_next_check = {}  # models root -> when shadowing() next reads its SHADOW file
+
+
+# Process-wide evaluator for a registry. Its worker only runs while
+# models/SHADOW lists candidates.
+def get_shadow(registry=None):
+    if registry is None:
+        from model_registry import get_registry
+        registry = get_registry()
+    evaluator = _evaluators.get(registry.root)
+    if evaluator is not None:
+        return evaluator
+    with _lock:
+        evaluator = _evaluators.get(registry.root)
+        if evaluator is None:
+            evaluator = _evaluators[registry.root] = ShadowEvaluator(registry)
+        return evaluator
+
+
+# The process-wide evaluator for a models root once its SHADOW file lists a
+# version, else None. Made for the request path: until then it only reads
+# SHADOW, at most once per CHECK_INTERVAL, and neither builds the model
+# registry nor loads a model.
+def shadowing(root=None):
+    if root is None:
+        from model_registry import REGISTRY_DIR
+        root = REGISTRY_DIR
+    root = os.path.abspath(root)
+    evaluator = _evaluators.get(root)
+    if evaluator is not None:
+        return evaluator
+    now = time.monotonic()
+    if now < _next_check.get(root, 0.0):
+        return None
+    _next_check[root] = now + CHECK_INTERVAL
+    if not read_candidates(os.path.join(root, SHADOW_FILE)):
+        return None
+    from model_registry import get_registry
+    return get_shadow(get_registry(root))
+
+
+# Candidates, queue counters and the report, for an admin-only page
+def render_shadow_panel(st, evaluator=None):
+    import pandas as pd
+
+    evaluator = evaluator or get_shadow()
+    stats = evaluator.stats()
+    st.subheader("Shadow models")
+    st.write(f"Shadowing: {', '.join(stats['candidates']) or 'none (list versions in models/SHADOW)'}")
+    columns = st.columns(3)
+    columns[0].metric("Scored", stats['scored'])
+    columns[1].metric("Queued", stats['queued'])
+    columns[2].metric("Dropped", stats['dropped'])
+    for version, error in stats['errors'].items():
+        st.warning(f"{version}: {error}")
+    rows = evaluator.report()
+    if rows:
+        st.dataframe(pd.DataFrame(rows).set_index('candidate'), use_container_width=True)
+
+
+def _ms(value):
+    return f"{value:8.3f}" if value is not None else f"{'-':>8}"
+
+
+def main(argv=None):
+    from model_registry import REGISTRY_DIR, ModelRegistry
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    parser.add_argument('--db', default=SHADOW_DB)
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='shadow a registered version')
+    add.add_argument('version')
+    remove = commands.add_parser('remove', help='stop shadowing a version')
+    remove.add_argument('version')
+    commands.add_parser('list', help='versions being shadowed')
+    summarize = commands.add_parser('report', help='agreement and latency of each candidate')
+    summarize.add_argument('--hours', type=float, help='only requests from the last HOURS')
+    trim = commands.add_parser('prune', help='delete old results')
+    trim.add_argument('--days', type=float, default=MAX_AGE / 86400, help='keep results from the last DAYS')
+    trim.add_argument('--rows', type=int, default=MAX_ROWS, help='keep at most ROWS results')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    path = os.path.join(args.root, SHADOW_FILE)
+    candidates = read_candidates(path)
+    if args.command == 'add':
+        if args.version not in registry.versions():
+            parser.error(f"unknown model version {args.version!r} in {args.root}")
+        if args.version not in candidates:
+            write_candidates(path, candidates + [args.version])
+        print(f"Shadowing {args.version}")
+    elif args.command == 'remove':
+        write_candidates(path, [version for version in candidates if version != args.version])
+        print(f"No longer shadowing {args.version}")
+    elif args.command == 'prune':
+        print(f"Deleted {prune(args.db, args.days * 86400, args.rows)} results")
+    elif args.command == 'list':
+        active = registry.active_version()
+        for version in candidates:
+            print(f"{version}{'  (active: not scored)' if version == active else ''}")
+    else:
+        since = time.time() - args.hours * 3600 if args.hours else None
+        rows = report(args.db, since)
+        if not rows:
+            print("No shadow results yet")
+            return 0
+        print(f"{'candidate':<28} {'served':<28} {'requests':>8} {'agree':>7} {'->diab':>6} {'->not':>6} "
+              f"{'errors':>6} {'timed':>7} {'served p50':>10} {'cand p50':>8} {'cand p99':>8} {'delta p50':>9}")
+        for row in rows:
+            agreement = f"{row['agreement']:6.1%}" if row['agreement'] is not None else f"{'-':>6}"
+            print(f"{row['candidate']:<28} {row['served_version'] or '-':<28} {row['requests']:>8} {agreement:>7} "
+                  f"{row['to_diabetic']:>6} {row['to_not_diabetic']:>6} {row['errors']:>6} {row['timed']:>7} "
+                  f"{_ms(row['served_p50_ms']):>10} {_ms(row['candidate_p50_ms'])} {_ms(row['candidate_p99_ms'])} "
+                  f"{_ms(row['delta_p50_ms']):>9}")
+        print("->diab / ->not: requests the candidate would have answered differently; latencies in ms, "
+              "single-row predict timed in the shadow worker on the timed rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite work queue with leased claims, the base of email_outbox.py and
+feedback_queue.py.
+
+Each queue is one table in a SQLite (WAL) file, partitioned by a scope column
+(the SMTP account, the form endpoint). Every row has a status, an attempt
+count and the time of its next attempt. Several processes can share the
+queue: a worker claims due rows by marking them `sending` with its process's
+owner id, and that claim is a lease. A row is only finished by the owner
+that still holds it, and goes back in the queue once the lease has expired
+(its process died mid-send), so a live process's claim is never taken over.
+Failed attempts back off exponentially with jitter.
+
+Subclasses set the table, its schema and status names, and the columns a
+claim returns, and run their own worker threads around `_claim`/`_release`.
+"""
+
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+LEASE = 300.0  # seconds a claimed row stays with its worker; well above a send's timeouts
+SENDING = 'sending'
+
+
+# Identifies this process's claims in a queue shared by several processes
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseQueue:
+
+    table = None
+    scope_column = None
+    schema = None
+    waiting = None  # status of a row waiting for its next attempt
+    claim_columns = ()  # returned by _claim after the id; attempts always comes last
+
+    def __init__(self, path, scope, max_attempts, backoff, max_backoff, lease=LEASE):
+        self.path = path
+        self.scope = scope
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.owner = _owner()
+        self._swept = 0.0
+
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._db() as db:
+            db.executescript(self.schema)
+        self.requeue_expired()
+
+    # One connection per thread
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def counts(self):
+        rows = self._db().execute(f"SELECT status, COUNT(*) FROM {self.table} WHERE {self.scope_column} = ? "
+                                  "GROUP BY status", (self.scope,)).fetchall()
+        return dict(rows)
+
+    # Rows whose worker's lease ran out go back in the queue. Claims of live
+    # processes, here or elsewhere, are left alone. Returns the rows requeued.
+    def requeue_expired(self):
+        now = time.time()
+        self._swept = now
+        with self._db() as db:
+            return db.execute(
+                f"UPDATE {self.table} SET status = ?, claimed_by = NULL, claimed_at = NULL "
+                f"WHERE {self.scope_column} = ? AND status = ? AND (claimed_at IS NULL OR claimed_at < ?)",
+                (self.waiting, self.scope, SENDING, now - self.lease)).rowcount
+
+    # Up to `limit` due rows, leased to this process in the same transaction
+    def _claim(self, limit=1):
+        if time.time() - self._swept > self.lease / 4:
+            self.requeue_expired()
+        with self._claim_lock, self._db() as db:
+            now = time.time()
+            rows = db.execute(
+                f"SELECT id, {', '.join(self.claim_columns)}, attempts FROM {self.table} "
+                f"WHERE {self.scope_column} = ? AND status = ? AND next_attempt <= ? "
+                "ORDER BY next_attempt, id LIMIT ?", (self.scope, self.waiting, now, limit)).fetchall()
+            claimed = []
+            for row in rows:
+                # Another process sharing the queue may have claimed it first
+                if db.execute(f"UPDATE {self.table} SET status = ?, claimed_by = ?, claimed_at = ? "
+                              "WHERE id = ? AND status = ?", (SENDING, self.owner, now, row[0], self.waiting)).rowcount:
+                    claimed.append(row)
+        return claimed
+
+    # Set a claimed row's status and columns, only while this process still
+    # holds the claim: after an expired lease the row belongs to whoever
+    # requeued and claimed it. Runs in the caller's transaction.
+    def _release(self, db, row_id, status, **columns):
+        assignments = ''.join(f'{column} = ?, ' for column in columns)
+        db.execute(f"UPDATE {self.table} SET status = ?, {assignments}claimed_by = NULL "
+                   "WHERE id = ? AND claimed_by = ?", (status, *columns.values(), row_id, self.owner))
+
+    # Back in the queue after a failed attempt, after an exponential backoff
+    # with jitter (at least `retry_after` seconds, when the remote asked)
+    def _retry(self, db, row_id, attempts, error, retry_after=None):
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+        delay = min(self.max_backoff, max(delay, retry_after or 0.0))
+        self._release(db, row_id, self.waiting, attempts=attempts, next_attempt=time.time() + delay,
+                      last_error=error)
+
+    def _next_due(self):
+        row = self._db().execute(f"SELECT MIN(next_attempt) FROM {self.table} WHERE {self.scope_column} = ? "
+                                 "AND status = ?", (self.scope, self.waiting)).fetchone()
+        return row[0]
+
+    # Seconds to sleep before looking for due rows again (at most 5)
+    def _idle_timeout(self):
+        due = self._next_due()
+        return 5.0 if due is None else max(0.0, min(5.0, due - time.time()))
+
+    # Block until nothing is waiting or being sent (used by scripts and benchmarks)
+    def drain(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            counts = self.counts()
+            if not counts.get(self.waiting) and not counts.get(SENDING):
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Makes the repository's flat modules importable from every test file, and
+provides a local SMTP sink for the email tests (requires aiosmtpd).
+"""
+
+import asyncio
+import os
+import socket
+import sys
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# Accepts every message except for recipients starting with 'refused' (550
+# at RCPT) and the first `transient` messages to ones starting with 'flaky'
+# (451 at DATA). Counts deliveries per recipient.
+class SMTPSink:
+
+    def __init__(self):
+        self.delivered = Counter()
+        self.transient = 0
+        self.latency = 0.0
+        self.port = None
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('refused'):
+            return '550 5.1.1 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.transient and any(address.startswith('flaky') for address in envelope.rcpt_tos):
+            self.transient -= 1
+            return '451 4.3.0 Try again later'
+        self.delivered.update(envelope.rcpt_tos)
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp_sink():
+    controller_module = pytest.importorskip('aiosmtpd.controller')
+    sink = SMTPSink()
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        sink.port = probe.getsockname()[1]
+    controller = controller_module.Controller(sink, hostname='127.0.0.1', port=sink.port)
+    controller.start()
+    yield sink
+    controller.stop()
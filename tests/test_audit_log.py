@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Audit segments survive the JSONL to Parquet rewrite, and queries read across rotated segments."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from audit_log import AuditLog, compact_stale, query, segments
+
+pytest.importorskip('pyarrow')
+
+START = 1_767_225_600.0  # 2026-01-01T00:00:00Z
+ROWS = [[2, 120, 70, 30, 80, 25.0, 0.5, 35], [6, 190, 80, 35, 200, 38.5, 1.2, 52], [1, 89, 66, 23, 94, 28.1, 0.167, 21]]
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return self.now
+
+
+def test_compact_stale_round_trip(tmp_path):
+    clock = Clock()
+    audit = AuditLog(str(tmp_path), columnar=False, clock=clock)
+    ids = []
+    for number, row in enumerate(ROWS):
+        clock.now += 1.5
+        ids.append(audit.record_prediction(row, 'Diabetic' if number == 1 else 'Not Diabetic', 'v1'))
+    clock.now += 1
+    audit.record_county(ids[1], 'NAIROBI')
+    audit.stop()
+    (jsonl,) = segments(str(tmp_path))
+    before = query(str(tmp_path), events=True)
+
+    assert compact_stale(str(tmp_path)) == []  # still fresh: its writer may be alive
+    os.utime(jsonl, (START, START))
+    (parquet,) = compact_stale(str(tmp_path))
+    assert segments(str(tmp_path)) == [parquet]
+    assert os.path.basename(parquet).startswith('predictions-20260101T000001500000-20260101T000005500000-')
+
+    after = query(str(tmp_path), events=True)
+    pd.testing.assert_frame_equal(after, before, check_dtype=False)
+    assert len(after) == 4 and after['BMI'].tolist()[:3] == [25.0, 38.5, 28.1]
+
+
+# Three segments rolled by age: the first two rewritten as Parquet, the
+# last still JSONL. A county picked in a later segment belongs to the
+# prediction in an earlier one.
+def test_query_across_rolled_segments(tmp_path):
+    clock = Clock()
+    audit = AuditLog(str(tmp_path), max_age=60.0, clock=clock)
+    first = audit.record_prediction(ROWS[0], 'Not Diabetic', 'v1')
+    audit.flush()
+    clock.now += 61
+    audit.record_county(first, 'KIAMBU')
+    second = audit.record_prediction(ROWS[1], 'Diabetic', 'v1')
+    audit.flush()
+    clock.now += 61
+    third = audit.record_prediction(ROWS[2], 'Diabetic', 'v2')
+    audit.record_county(second, 'MOMBASA')
+    audit.record_county(first, 'NAIROBI')
+    audit.flush()
+
+    assert [path.rsplit('.', 1)[1] for path in segments(str(tmp_path))] == ['parquet', 'parquet', 'jsonl']
+    predictions = query(str(tmp_path))
+    assert predictions['prediction_id'].tolist() == [first, second, third]
+    assert predictions['county'].fillna('').tolist() == ['NAIROBI', 'MOMBASA', '']
+    assert predictions['model_version'].tolist() == ['v1', 'v1', 'v2']
+    assert predictions['Glucose'].tolist() == [120, 190, 89]
+
+    assert query(str(tmp_path), outcome='Diabetic')['prediction_id'].tolist() == [second, third]
+    assert query(str(tmp_path), model_version='v1', county='MOMBASA')['prediction_id'].tolist() == [second]
+    # The first segment is skipped by its name; its prediction is out of range
+    assert len(segments(str(tmp_path), since=START + 61)) == 2
+    later = query(str(tmp_path), since=START + 61, until=START + 200)
+    assert later['prediction_id'].tolist() == [second, third]
+    assert len(query(str(tmp_path), since=START + 61, events=True)) == 5
+    audit.stop()
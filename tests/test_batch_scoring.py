@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Rows with unusable feature values are found and left unscored."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import FEATURES, LABELS, invalid_features, load_model, score_file, score_frame
+from conftest import ROOT
+
+
+def test_invalid_features():
+    row = dict(zip(FEATURES, [1, 120, 70, 30, 80, 25.0, 0.5, 35]))
+    frame = pd.DataFrame([row, dict(row, Glucose=None), dict(row, BMI='abc', Age=np.inf), dict(row, Insulin='80')])
+    assert invalid_features(frame).tolist() == ['', 'Glucose', 'BMI, Age', '']
+
+
+# A blank or non-numeric cell leaves that row unscored instead of stopping the file
+def test_score_file_skips_invalid_rows(tmp_path):
+    patients = pd.read_csv(os.path.join(ROOT, 'diabetes.csv')).head(6).drop(columns='Outcome').astype(object)
+    patients.loc[1, 'Glucose'] = ''
+    patients.loc[3, 'BMI'] = 'abc'
+    source = tmp_path / 'patients.csv'
+    patients.to_csv(source, index=False)
+    model = load_model()
+    expected = score_frame(model, patients.drop(index=[1, 3]))
+
+    for chunksize in (1, 4, 10):
+        stats = score_file(str(source), str(tmp_path / 'scored.csv'), model=model, chunksize=chunksize)
+        scored = pd.read_csv(tmp_path / 'scored.csv')
+        assert (stats['rows'], stats['invalid']) == (6, 2)
+        assert scored['Problem'].fillna('').tolist() == ['', 'invalid features: Glucose', '',
+                                                         'invalid features: BMI', '', '']
+        assert scored['Prediction'].isna().tolist() == [False, True, False, True, False, False]
+        assert scored['Prediction'].dropna().astype(int).tolist() == list(expected)
+        assert scored['Diagnosis'].dropna().tolist() == [LABELS[value] for value in expected]
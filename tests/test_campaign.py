@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Campaigns skip invalid rows, fail refused addresses, and resume after a transient error."""
+
+import os
+import smtplib
+
+import pandas as pd
+import pytest
+
+from batch_scoring import load_model
+from campaign import EmailTemplate, run_campaign
+from conftest import ROOT
+from email_outbox import SMTPConfig
+
+EMAILS = ['ann@example.com', 'refused@example.com', 'bo@example.com', 'flaky@example.com',
+          'cy@example.com', 'di@example.com', 'ed@example.com', 'fay@example.com']
+
+
+@pytest.fixture(scope='module')
+def model():
+    return load_model()
+
+
+# Eight patients; the third has a blank Glucose and is never sent
+@pytest.fixture
+def cohort(tmp_path):
+    frame = pd.read_csv(os.path.join(ROOT, 'diabetes.csv')).head(len(EMAILS)).drop(columns='Outcome')
+    frame = frame.astype(object)
+    frame.loc[2, 'Glucose'] = ''
+    frame.insert(0, 'Name', [email.split('@')[0].title() for email in EMAILS])
+    frame.insert(1, 'Email', EMAILS)
+    path = tmp_path / 'cohort.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def checkpoint(cohort):
+    with open(cohort + '.sent') as handle:
+        return {line.split('\t')[0]: line.split('\t')[1] for line in handle}
+
+
+def campaign(cohort, smtp_sink, model):
+    config = SMTPConfig('127.0.0.1', smtp_sink.port, starttls=False, timeout=5)
+    return run_campaign(cohort, config, EmailTemplate('Clinic', 'clinic@example.com'), model=model, nearest=0,
+                        log=lambda line: None)
+
+
+def test_resumes_after_a_transient_error(cohort, smtp_sink, model):
+    smtp_sink.transient = 1
+    with pytest.raises(smtplib.SMTPDataError):
+        campaign(cohort, smtp_sink, model)
+    assert checkpoint(cohort) == {'0:ann@example.com': 'sent', '1:refused@example.com': 'failed',
+                                  '2:bo@example.com': 'failed'}
+
+    stats = campaign(cohort, smtp_sink, model)
+    assert (stats['sent'], stats['failed'], stats['skipped'], stats['invalid']) == (5, 0, 2, 1)
+    assert list(checkpoint(cohort).values()).count('sent') == 6
+    assert smtp_sink.delivered == dict.fromkeys(
+        [email for email in EMAILS if email not in ('refused@example.com', 'bo@example.com')], 1)
+
+
+def test_invalid_and_refused_rows_are_marked_failed(cohort, smtp_sink, model):
+    stats = campaign(cohort, smtp_sink, model)
+    assert (stats['rows'], stats['invalid'], stats['sent'], stats['failed']) == (8, 1, 6, 2)
+    marks = checkpoint(cohort)
+    assert marks['2:bo@example.com'] == marks['1:refused@example.com'] == 'failed'
+    with open(cohort + '.sent') as handle:
+        details = {line.split('\t')[0]: line.rstrip('\n').split('\t')[2] for line in handle}
+    assert details['2:bo@example.com'] == 'invalid features: Glucose'
+    assert 'SMTPRecipientsRefused' in details['1:refused@example.com']
+    assert set(smtp_sink.delivered) == set(EMAILS) - {'refused@example.com', 'bo@example.com'}
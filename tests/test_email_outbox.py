@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""The outbox retries what may succeed later, fails what won't, and sends each message once."""
+
+import time
+
+from email_outbox import FAILED, QUEUED, SENDING, SENT, Outbox, SMTPConfig
+
+SENDER = 'clinic@example.com'
+BODY = 'Subject: Test result\n\nNot Diabetic'
+
+
+def make_outbox(smtp_sink, tmp_path, **options):
+    config = SMTPConfig('127.0.0.1', smtp_sink.port, starttls=False, timeout=5)
+    return Outbox(config, path=str(tmp_path / 'outbox.db'), **options)
+
+
+def test_transient_failure_is_retried_with_backoff(smtp_sink, tmp_path):
+    smtp_sink.transient = 2
+    outbox = make_outbox(smtp_sink, tmp_path, backoff=0.2).start()
+    try:
+        message_id = outbox.enqueue(SENDER, 'flaky@example.com', BODY)
+        time.sleep(0.1)
+        status = outbox.status(message_id)
+        assert (status['status'], status['attempts']) == (QUEUED, 1)
+        assert '451' in status['last_error']
+        assert outbox.drain(timeout=10)
+    finally:
+        outbox.stop()
+    status = outbox.status(message_id)
+    assert (status['status'], status['attempts'], status['last_error']) == (SENT, 3, None)
+    assert smtp_sink.delivered == {'flaky@example.com': 1}
+
+
+def test_permanent_failure_is_not_retried(smtp_sink, tmp_path):
+    outbox = make_outbox(smtp_sink, tmp_path, backoff=0.01).start()
+    try:
+        refused = outbox.enqueue(SENDER, 'refused@example.com', BODY)
+        delivered = outbox.enqueue(SENDER, 'patient@example.com', BODY)
+        assert outbox.drain(timeout=10)
+    finally:
+        outbox.stop()
+    status = outbox.status(refused)
+    assert (status['status'], status['attempts']) == (FAILED, 1)
+    assert '550' in status['last_error']
+    assert outbox.status(delivered)['status'] == SENT
+    assert smtp_sink.delivered == {'patient@example.com': 1}
+
+
+# Every worker holds at most one message at a time, and no message is sent twice
+def test_each_worker_claims_one_message(smtp_sink, tmp_path):
+    smtp_sink.latency = 0.005
+    outbox = make_outbox(smtp_sink, tmp_path, workers=4).start()
+    try:
+        recipients = [f'patient{number}@example.com' for number in range(60)]
+        for recipient in recipients:
+            outbox.enqueue(SENDER, recipient, BODY)
+        in_flight = []
+        deadline = time.monotonic() + 20
+        while outbox.counts().get(SENT, 0) < len(recipients) and time.monotonic() < deadline:
+            in_flight.append(outbox.counts().get(SENDING, 0))
+            time.sleep(0.002)
+    finally:
+        outbox.stop()
+    assert outbox.counts() == {SENT: len(recipients)}
+    assert 1 <= max(in_flight) <= 4
+    assert smtp_sink.delivered == dict.fromkeys(recipients, 1)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""County names are normalized once, so every lookup agrees on a county's rows."""
+
+import pandas as pd
+import pytest
+
+from facility_geo import county_choices, recommend
+from facility_index import FacilityIndex, load_index
+from facility_store import compact
+
+
+@pytest.fixture(scope='module')
+def index():
+    return load_index()
+
+
+def test_compact_normalizes_counties():
+    data = compact(pd.DataFrame({
+        'COUNTY': ['KIAMBU', 'Kiambu', ' kiambu ', None],
+        'NHIF_OFFICE': ['THIKA', 'THIKA', 'RUIRU', 'RUIRU'],
+        'NHIF_HOSPITAL_CODE': [1, 2, 3, 4],
+        'HOSPITAL_NAME': ['A', 'B', 'C', 'D'],
+    }))
+    assert list(data['COUNTY'].cat.categories) == ['KIAMBU']
+    assert data['COUNTY'].isna().tolist() == [False, False, False, True]
+    assert compact(data) is data
+    assert FacilityIndex(data).filter(county='Kiambu').tolist() == [0, 1, 2]
+
+
+def test_one_choice_per_county(index):
+    choices = county_choices(index)
+    assert len({choice.upper() for choice in choices}) == len(choices)
+
+
+def test_recommend_keeps_the_county_together(index):
+    inside, outside = recommend('KIAMBU', index=index)
+    assert 'GATUNDU LEVEL V HOSPITAL' in set(inside['HOSPITAL_NAME'])
+    assert (outside['COUNTY'] != 'KIAMBU').all()
+    assert recommend('Kiambu', index=index)[0].equals(inside)
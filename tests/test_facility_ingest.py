@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Indexes updated from logged revisions match a rebuild; a broken log means rebuilding."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from facility_index import FacilityIndex
+from facility_ingest import apply_changes, diff_tables
+from facility_store import changes_between, expand, load_data
+
+QUERIES = ['kenyatta', 'kenyata', 'nairobi', 'westlnds', 'mission hospital', 'annex', 'lamu', 'st']
+
+
+@pytest.fixture(scope='module')
+def facilities():
+    return load_data()
+
+
+# Two revisions of the real sheet: the first deletes, renames, moves and adds
+# facilities (a new county and office among them); the second touches rows
+# the first one added or changed
+@pytest.fixture(scope='module')
+def revisions(facilities):
+    first = expand(facilities).reset_index(drop=True)
+    first = first.drop(index=[0, 5, 60]).reset_index(drop=True)
+    first.loc[3, 'HOSPITAL_NAME'] = first.loc[3, 'HOSPITAL_NAME'] + ' ANNEX'
+    first.loc[10, ['COUNTY', 'NHIF_OFFICE']] = first.loc[90, ['COUNTY', 'NHIF_OFFICE']].tolist()
+    first.loc[20, 'NHIF_OFFICE'] = np.nan
+    added = first.iloc[[40, 41]].copy()
+    added['NHIF_HOSPITAL_CODE'] = [900001, 900002]
+    added['HOSPITAL_NAME'] = ['LAMU ISLAND RENAL CENTRE', 'KENYATTA SATELLITE UNIT']
+    added.loc[added.index[0], ['COUNTY', 'NHIF_OFFICE']] = ['ATLANTIS', 'ATLANTIS OFFICE']
+    first = pd.concat([first, added], ignore_index=True)
+
+    second = first.drop(index=[len(first) - 1, 7]).reset_index(drop=True)
+    second.loc[3, 'HOSPITAL_NAME'] = second.loc[3, 'HOSPITAL_NAME'].replace(' ANNEX', '')
+    second.loc[len(second) - 1, 'COUNTY'] = second.loc[0, 'COUNTY']
+
+    changes, data = [], facilities
+    for revision in (first, second):
+        changes.append(diff_tables(data, revision))
+        data = apply_changes(data, changes[-1])
+    return changes, data
+
+
+def searches(index):
+    results = {}
+    for query in QUERIES:
+        for attribute in ('name_search', 'office_search'):
+            search = getattr(index, attribute)
+            results[attribute, query] = (
+                sorted((term, edits, tuple(positions.tolist()))
+                       for term, edits, positions in search.search(query, k=None)),
+                sorted(search.match_positions(query).tolist()))
+    return results
+
+
+def test_incremental_update_matches_a_rebuild(facilities, revisions):
+    changes, data = revisions
+    assert [len(change[kind]) for change in changes for kind in ('inserted', 'updated', 'deleted')] == \
+        [2, 3, 3, 0, 2, 2]
+    updated = FacilityIndex(facilities).updated(data, changes)
+    rebuilt = FacilityIndex(data)
+
+    assert updated is not None
+    assert updated.counties == rebuilt.counties and 'ATLANTIS' not in rebuilt.counties
+    assert updated.offices == rebuilt.offices
+    for attribute in ('by_county', 'by_office'):
+        found, expected = getattr(updated, attribute), getattr(rebuilt, attribute)
+        assert found.keys() == expected.keys()
+        assert all(np.array_equal(found[key], expected[key]) for key in expected)
+    assert updated.by_code == rebuilt.by_code
+    assert updated._county_offices == rebuilt._county_offices
+    assert searches(updated) == searches(rebuilt)
+    for county in rebuilt.counties:
+        assert np.array_equal(updated.search(county=county, name_query='hospital'),
+                              rebuilt.search(county=county, name_query='hospital'))
+
+
+def tagged(frame, sha256, log):
+    frame = frame.copy()
+    frame.attrs.update(sha256=sha256, change_log=str(log))
+    return frame
+
+
+def test_changes_between_follows_the_log(facilities, tmp_path):
+    log = tmp_path / 'changes.jsonl'
+    entries = [{'from': 'a', 'to': 'b', 'n': 1}, {'from': 'x', 'to': 'y', 'n': 2}, {'from': 'b', 'to': 'c', 'n': 3}]
+    log.write_text(''.join(json.dumps(entry) + '\n' for entry in entries))
+    table = facilities.head(3)
+
+    assert [entry['n'] for entry in changes_between(tagged(table, 'a', log), tagged(table, 'c', log))] == [1, 3]
+    assert changes_between(tagged(table, 'b', log), tagged(table, 'b', log)) == []
+    # No logged revision leads from 'c' to 'a', or out of an unlogged sha
+    assert changes_between(tagged(table, 'c', log), tagged(table, 'a', log)) is None
+    assert changes_between(tagged(table, 'q', log), tagged(table, 'c', log)) is None
+
+
+def test_a_broken_chain_falls_back(facilities, tmp_path):
+    log = tmp_path / 'changes.jsonl'
+    log.write_text(json.dumps({'from': 'a', 'to': 'b'}) + '\n' + json.dumps({'from': 'c', 'to': 'd'}) + '\n')
+    table = facilities.head(3)
+    assert changes_between(tagged(table, 'a', log), tagged(table, 'd', log)) is None
+    # No log to read, or a table that was never tagged
+    assert changes_between(tagged(table, 'a', log), tagged(table, 'b', tmp_path / 'missing.jsonl')) is None
+    assert changes_between(pd.DataFrame(), tagged(table, 'b', log)) is None
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""The trigram index finds what `str.contains` finds on the real sheet, ranked, and survives a typo."""
+
+import numpy as np
+import pytest
+
+from facility_search import TrigramIndex, normalize
+from facility_store import load_data
+
+QUERIES = ['hospital', 'dialysis', 'kenyatta', 'mission', 'county referral', 'moi', 'ltd', 'level 5', 'embu',
+           'centre', 'x-ray clinic']
+
+
+@pytest.fixture(scope='module')
+def facilities():
+    return load_data()
+
+
+# Rows `str.contains` matches, in the order the index promises: names
+# starting with the query, then ones with a word starting with it, then the
+# rest; shorter names first, then alphabetical, then row order
+def contains_ranking(values, query):
+    found = values.str.contains(query, case=False, regex=False, na=False).to_numpy()
+    query = normalize(query)
+    ranked = []
+    for position in np.flatnonzero(found).tolist():
+        term = normalize(values.iloc[position])
+        kind = 0 if term.startswith(query) else 1 if ' ' + query in term else 2
+        ranked.append((kind, len(term), term, position))
+    return [position for *_, position in sorted(ranked)]
+
+
+@pytest.mark.parametrize('column', ['HOSPITAL_NAME', 'NHIF_OFFICE'])
+def test_matches_str_contains(facilities, column):
+    index = TrigramIndex(facilities[column])
+    for query in QUERIES:
+        assert index.match_positions(query).tolist() == contains_ranking(facilities[column], query), query
+
+
+def test_a_typo_falls_back_to_edit_distance(facilities):
+    names = facilities['HOSPITAL_NAME']
+    index = TrigramIndex(names)
+    assert not names.str.contains('kenyata', case=False).any()
+
+    results = index.search('kenyata', k=3)
+    assert results and all(edits == 1 for _, edits, _ in results)
+    assert results[0][0].startswith('KENYATTA NATIONAL HOSPITAL')
+    assert names.iloc[index.match_positions('kenyata', k=1)[0]].startswith('KENYATTA')
+    assert not len(index.match_positions('kenyata', max_edits=0))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Feedback submissions survive a crashed forwarder and failing endpoints."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from feedback_queue import FAILED, FORWARDED, SENDING, FeedbackQueue
+
+
+# A form endpoint on localhost. Replies come off `replies` in order (200 once
+# it is empty); a message containing 'bad' is always refused with a 400.
+class FormStub(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        self.server.received.append((self.headers['Idempotency-Key'], form['message'][0]))
+        status = 400 if 'bad' in form['message'][0] else (self.server.replies.pop(0) if self.server.replies else 200)
+        self.send_response(status)
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FormStub)
+    server.received, server.replies = [], []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_queue(endpoint, tmp_path, **options):
+    return FeedbackQueue(f'http://127.0.0.1:{endpoint.server_port}/f', str(tmp_path / 'feedback.db'),
+                         backoff=0.01, **options)
+
+
+# A forwarder that dies mid-batch keeps its claim until the lease runs out;
+# then another process forwards the submission, under the same key
+def test_expired_lease_is_claimed_again(endpoint, tmp_path):
+    crashed = make_queue(endpoint, tmp_path, lease=0.3)
+    feedback_id = crashed.submit({'message': 'hello'}, key='k1')
+    assert [row[0] for row in crashed._claim()] == [feedback_id]
+
+    survivor = make_queue(endpoint, tmp_path, lease=0.3)
+    assert survivor.forward_batch() == 0
+    assert survivor.requeue_expired() == 0
+    assert survivor.status(feedback_id)['status'] == SENDING
+
+    time.sleep(0.4)
+    assert survivor.requeue_expired() == 1
+    assert survivor.forward_batch() == 1
+    assert survivor.status(feedback_id)['status'] == FORWARDED
+    assert endpoint.received == [('k1', 'hello')]
+
+    # The crashed forwarder's late result no longer counts
+    with crashed._db() as db:
+        crashed._release(db, feedback_id, FAILED, last_error='late')
+    assert survivor.status(feedback_id)['status'] == FORWARDED
+
+
+# Retryable replies back off and retry, refusals fail at once, and the
+# forwarder keeps going through both
+def test_forwarder_survives_http_errors(endpoint, tmp_path):
+    endpoint.replies = [503, 500]
+    queue = make_queue(endpoint, tmp_path, concurrency=1).start()
+    try:
+        retried = queue.submit({'message': 'hello'})
+        refused = queue.submit({'message': 'bad'})
+        assert queue.drain(timeout=10)
+        later = queue.submit({'message': 'after'})
+        assert queue.drain(timeout=10)
+        assert queue._thread.is_alive()
+    finally:
+        queue.stop()
+
+    assert queue.status(retried)['status'] == FORWARDED
+    assert queue.status(retried)['attempts'] == 3
+    assert queue.status(refused)['status'] == FAILED
+    assert queue.status(refused)['attempts'] == 1
+    assert queue.status(refused)['last_error'].startswith('HTTP 400')
+    assert queue.status(later)['status'] == FORWARDED
+    assert queue.counts() == {FORWARDED: 2, FAILED: 1}
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Parity of the NumPy scorer (linear_model.py) with the sklearn model it was exported from."""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from linear_model import (DATA_FILE, LINEAR_MODEL_FILE, MODEL_FILE, LinearScorer, _load_estimator,
+                          check_parity, non_finite_rows)
+
+
+@pytest.fixture(scope='module')
+def models():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return _load_estimator(MODEL_FILE), LinearScorer.from_file(LINEAR_MODEL_FILE)
+
+
+@pytest.fixture(scope='module')
+def data(models):
+    return pd.read_csv(DATA_FILE)[list(models[1].feature_names_in_)]
+
+
+def test_predictions_match(models, data):
+    model, scorer = models
+    assert (model.predict(data) == scorer.predict(data)).all()
+
+
+def test_decision_function_matches(models, data):
+    model, scorer = models
+    # libsvm sums over the support vectors, so allow for float rounding
+    np.testing.assert_allclose(scorer.decision_function(data), model.decision_function(data), atol=1e-6)
+
+
+@pytest.mark.parametrize('probe', range(24))
+def test_non_finite_rows_rejected_like_sklearn(models, data, probe):
+    model, scorer = models
+    X = pd.DataFrame(non_finite_rows(data.iloc[0].to_numpy())[probe], columns=data.columns)
+    with pytest.raises(ValueError):
+        model.predict(X)
+    with pytest.raises(ValueError):
+        scorer.predict(X)
+    with pytest.raises(ValueError):
+        scorer.explain(X)
+
+
+def test_single_row_with_nan_is_not_scored(models):
+    with pytest.raises(ValueError):
+        models[1].predict([np.nan, 148, 72, 35, 0, 33.6, 0.627, 50])
+
+
+def test_check_parity():
+    rows, mismatches, difference, disagreements = check_parity()
+    assert rows == 768
+    assert mismatches == 0 and disagreements == 0
+    assert difference < 1e-6
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Hot swaps in the model registry, and a broken version leaving the last good one serving."""
+
+import json
+import os
+import warnings
+
+import pytest
+
+from linear_model import MODEL_FILE
+from model_registry import METADATA_FILE, ModelRegistry, register
+
+ROW = [[2, 120, 70, 30, 80, 25.0, 0.5, 35]]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    root = str(tmp_path)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        register(MODEL_FILE, root, 'first')
+        register(MODEL_FILE, root, 'second')
+    registry = ModelRegistry(root)
+    registry.activate('first')
+    return registry
+
+
+def test_activate_swaps_the_served_model(registry):
+    assert registry.refresh()
+    first = registry.current()
+    assert first.version == 'first'
+    assert not registry.refresh()
+
+    registry.activate('second')
+    assert registry.refresh()
+    assert registry.current().version == 'second'
+    assert registry.current() is not first
+    # A request still holding the old model finishes on it
+    assert list(first.predict(ROW)) == list(registry.current().predict(ROW))
+    assert [row['version'] for row in registry.report()] == ['second', 'first']
+
+
+def test_broken_version_keeps_the_previous_one_serving(registry):
+    registry.refresh()
+    broken = os.path.join(registry.root, 'broken')
+    os.makedirs(broken)
+    with open(os.path.join(broken, METADATA_FILE), 'w') as handle:
+        json.dump({'version': 'broken', 'files': {'model': 'model.sav'}}, handle)
+    with open(os.path.join(broken, 'model.sav'), 'w') as handle:
+        handle.write('not a pickle')
+
+    registry.activate('broken')
+    assert not registry.refresh()
+    assert registry.current().version == 'first'
+    rows = {row['version']: row for row in registry.report()}
+    assert rows['first']['active'] and rows['first']['error'] is None
+    assert not rows['broken']['active'] and rows['broken']['error']
+
+
+def test_unknown_version_is_refused(registry):
+    with pytest.raises(ValueError):
+        registry.activate('missing')
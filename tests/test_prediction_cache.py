@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Cached predictions never outlive their model version, their TTL or the LRU bound."""
+
+import warnings
+
+import pytest
+
+from linear_model import MODEL_FILE
+from model_registry import ModelRegistry, register
+from prediction_cache import PredictionCache, cached_predict, feature_key
+
+ROW = [2, 120, 70, 30, 80, 25.0, 0.5, 35]
+
+
+# Always answers the same, so a stale cached answer can be told apart
+class Constant:
+
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return [self.value] * len(X)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        register(MODEL_FILE, str(tmp_path), 'first')
+        register(MODEL_FILE, str(tmp_path), 'second')
+    registry = ModelRegistry(str(tmp_path))
+    registry.activate('first')
+    registry.refresh()
+    return registry
+
+
+def test_version_swap_invalidates(registry):
+    cache = PredictionCache()
+    first = cached_predict(ROW, registry, cache)
+    assert cached_predict(ROW, registry, cache) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    registry.activate('second')
+    registry.refresh()
+    registry.current().model = Constant(1 - first)
+    assert cached_predict(ROW, registry, cache) == 1 - first
+    assert (cache.version, cache.invalidations, cache.misses, len(cache)) == ('second', 1, 2, 1)
+    assert cached_predict(ROW, registry, cache) == 1 - first
+    assert cache.hits == 2
+
+
+def test_entries_expire_after_the_ttl():
+    now = [0.0]
+    cache = PredictionCache(ttl=10.0, clock=lambda: now[0])
+    key = ('v1', feature_key(ROW))
+    cache.put(key, 1)
+    now[0] = 9.9
+    assert cache.get(key) == (True, 1)
+    now[0] = 10.0
+    assert cache.get(key) == (False, None)
+    assert (cache.expired, len(cache)) == (1, 0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=3)
+    for number in range(3):
+        cache.put(number, number)
+    assert cache.get(0) == (True, 0)
+    cache.put(3, 3)
+    assert len(cache) == 3 and cache.evictions == 1
+    assert cache.get(1) == (False, None)
+    assert [cache.get(number)[0] for number in (0, 2, 3)] == [True, True, True]
+    for number in range(4, 100):
+        cache.put(number, number)
+    assert len(cache) == 3 and cache.evictions == 97
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Scripted, reproducible replacement for retraining in Model.ipynb.
+
+    python train_model.py [--jobs -1] [--tolerance 0.01] [--output models]
+
+Loads diabetes.csv, sets aside the same stratified hold-out split the
+notebook used, and runs a cross-validated grid search over several model
+families (in parallel across processes) on the rest. It picks the fastest
+candidate (single-row inference latency) whose cross-validated accuracy is
+within --tolerance of the best. The hold-out split is scored once, for the
+chosen model only, so its test accuracy isn't inflated by the selection.
+The winner is written to the model registry (see model_registry.py) as
+<output>/<version>/model.sav with a model.json metadata sidecar (and
+model.linear.json when it can be served by the NumPy scorer); the full
+leaderboard goes to candidates.json. --activate also points the registry's ACTIVE file at the new version, which running apps
+pick up without a restart.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn import svm
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from linear_model import LinearScorer
+from model_registry import ModelRegistry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(BASE_DIR, 'diabetes.csv')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+TARGET = 'Outcome'
+SEED = 2  # the notebook's random_state
+
+
+# family -> (estimator, parameter grid)
+def candidate_families():
+    return {
+        'linear_svc': (
+            make_pipeline(StandardScaler(), svm.SVC(kernel='linear')),
+            {'svc__C': [0.1, 1.0, 10.0]}),
+        'logistic_regression': (
+            make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)),
+            {'logisticregression__C': [0.01, 0.1, 1.0, 10.0]}),
+        'random_forest': (
+            RandomForestClassifier(random_state=SEED),
+            {'n_estimators': [100, 300], 'max_depth': [None, 6]}),
+        'gradient_boosting': (
+            GradientBoostingClassifier(random_state=SEED),
+            {'learning_rate': [0.05, 0.1], 'max_depth': [2, 3]}),
+        'knn': (
+            make_pipeline(StandardScaler(), KNeighborsClassifier()),
+            {'kneighborsclassifier__n_neighbors': [5, 11, 21]}),
+    }
+
+
+def file_hash(path):
+    with open(path, 'rb') as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+
+# Median microseconds per row for one-row calls (a plain feature row, as the
+# apps pass it) and for a large DataFrame batch
+def measure_latency(model, X, single_calls=200, batch_rows=10000):
+    values = X.to_numpy(dtype=np.float64)
+    samples = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)  # sklearn: "X does not have valid feature names"
+        for i in range(single_calls):
+            row = values[i % len(values)].reshape(1, -1)
+            start = time.perf_counter()
+            model.predict(row)
+            samples.append(time.perf_counter() - start)
+
+    batch = X.iloc[np.arange(batch_rows) % len(X)]
+    batch_samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        model.predict(batch)
+        batch_samples.append(time.perf_counter() - start)
+
+    return {
+        'single_row_us': float(np.median(samples) * 1e6),
+        'batch_row_us': float(np.median(batch_samples) / batch_rows * 1e6),
+    }
+
+
+# The model the apps would actually serve: the NumPy scorer when the
+# estimator is linear, the sklearn estimator otherwise
+def serving_model(estimator):
+    try:
+        return LinearScorer.from_estimator(estimator)
+    except (AttributeError, ValueError):
+        return None
+
+
+def train(data_path=DATA_FILE, jobs=-1, folds=5, tolerance=0.01, max_latency_us=None, log=print):
+    data = pd.read_csv(data_path)
+    X = data.drop(columns=TARGET)
+    y = data[TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=SEED)
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=SEED)
+
+    candidates = []
+    for family, (estimator, grid) in candidate_families().items():
+        start = time.perf_counter()
+        search = GridSearchCV(estimator, grid, cv=cv, scoring='accuracy', n_jobs=jobs)
+        search.fit(X_train, y_train)
+        best = search.best_estimator_
+
+        exported = serving_model(best)
+        served = exported if exported is not None else best
+        candidate = {
+            'family': family,
+            'params': {key: value for key, value in search.best_params_.items()},
+            'cv_accuracy': float(search.best_score_),
+            'train_accuracy': float((best.predict(X_train) == y_train).mean()),
+            'latency': measure_latency(served, X_train),
+            'served_by': 'numpy' if exported is not None else 'sklearn',
+            'search_seconds': time.perf_counter() - start,
+            'estimator': best,
+            'exported': exported,
+        }
+        candidates.append(candidate)
+        log(f"{family:<20} cv {candidate['cv_accuracy']:.3f}  "
+            f"{candidate['latency']['single_row_us']:8.1f} us/row single  "
+            f"{candidate['latency']['batch_row_us']:6.2f} us/row batch  ({candidate['served_by']})")
+
+    chosen = select(candidates, tolerance, max_latency_us)
+    # The only look at the hold-out split
+    chosen['test_accuracy'] = float((chosen['estimator'].predict(X_test) == y_test).mean())
+    log(f"chosen: {chosen['family']}, test accuracy {chosen['test_accuracy']:.3f}")
+    return chosen, candidates, {'rows': len(data), 'sha256': file_hash(data_path), 'path': data_path}
+
+
+# Fastest candidate whose cross-validated accuracy is within `tolerance` of
+# the best (ties broken by that accuracy), optionally under a latency budget.
+# The hold-out split plays no part in the choice.
+def select(candidates, tolerance, max_latency_us=None):
+    pool = candidates
+    if max_latency_us is not None:
+        pool = [c for c in candidates if c['latency']['single_row_us'] <= max_latency_us] or candidates
+    best_accuracy = max(c['cv_accuracy'] for c in pool)
+    eligible = [c for c in pool if c['cv_accuracy'] >= best_accuracy - tolerance]
+    return min(eligible, key=lambda c: (c['latency']['single_row_us'], -c['cv_accuracy']))
+
+
+def _public(candidate):
+    return {key: value for key, value in candidate.items() if key not in ('estimator', 'exported')}
+
+
+def write_artifact(chosen, candidates, dataset, output_dir=MODELS_DIR, tolerance=0.01):
+    created = datetime.now(timezone.utc)
+    version = f"{created:%Y%m%d-%H%M%S}-{dataset['sha256'][:8]}"
+    target = os.path.join(output_dir, version)
+    os.makedirs(target)
+
+    joblib.dump(chosen['estimator'], os.path.join(target, 'model.sav'))
+    files = {'model': 'model.sav'}
+    if chosen['exported'] is not None:
+        with open(os.path.join(target, 'model.linear.json'), 'w') as handle:
+            json.dump(chosen['exported'].to_dict(source=os.path.join(target, 'model.sav')), handle, indent=2)
+        files['linear'] = 'model.linear.json'
+
+    metadata = {
+        'version': version,
+        'created': created.isoformat(),
+        'features': [column for column in pd.read_csv(dataset['path'], nrows=0).columns if column != TARGET],
+        'classes': [int(c) for c in chosen['estimator'].classes_],
+        'files': files,
+        'dataset': {'file': os.path.basename(dataset['path']), 'rows': dataset['rows'], 'sha256': dataset['sha256']},
+        'selection': {'rule': 'fastest within tolerance of best cross-validated accuracy', 'tolerance': tolerance},
+        'environment': {'python': platform.python_version(), 'sklearn': sklearn.__version__},
+        **_public(chosen),
+    }
+    with open(os.path.join(target, 'model.json'), 'w') as handle:
+        json.dump(metadata, handle, indent=2)
+    with open(os.path.join(target, 'candidates.json'), 'w') as handle:
+        json.dump([_public(c) for c in candidates], handle, indent=2)
+    return version, target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--output', default=MODELS_DIR)
+    parser.add_argument('--jobs', type=int, default=-1, help='worker processes for the grid search (-1: all cores)')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='accuracy a faster model may give up against the most accurate one')
+    parser.add_argument('--max-latency-us', type=float, default=None, help='single-row latency budget')
+    parser.add_argument('--activate', action='store_true', help='make the new version the one the apps serve')
+    args = parser.parse_args(argv)
+
+    chosen, candidates, dataset = train(args.data, args.jobs, args.folds, args.tolerance, args.max_latency_us)
+    version, target = write_artifact(chosen, candidates, dataset, args.output, args.tolerance)
+    print(f"\nChose {chosen['family']} {chosen['params']} -> {target}")
+    if args.activate:
+        ModelRegistry(args.output).activate(version)
+        print(f"Active model: {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())